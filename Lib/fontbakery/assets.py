@@ -0,0 +1,295 @@
+"""
+Precompiled data assets.
+
+Some checks and conditions rely on data sets which are expensive to prepare:
+the expected contour counts of `fontbakery.glyphdata` (a very large Python
+literal), the vendor IDs registered at Microsoft (parsed from a cached HTML
+page) and the Google Fonts axis registry (parsed from textproto files).
+
+`fontbakery build-assets` compiles them into compact binary tables in
+`data/compiled`. A table is memory mapped the first time it is used and keys
+are looked up by binary search, decoding only the entries that are accessed.
+A run that uses none of these checks doesn't pay anything for them.
+
+Each table records the version of its sources: the version of the package
+they come from (e.g. axisregistry), or a hash of the files shipped with
+fontbakery they are built from. If the installed sources don't match (another
+version of the package, or edited files), the table is compiled in memory
+instead, until the assets are built again.
+
+Table format (little endian):
+    magic b"FBAT", uint32 count, uint32 size of the source version
+    the source version, UTF-8
+    uint32[count + 1] key offsets
+    uint32[count + 1] value offsets
+    the keys, sorted by their bytes
+    the values, in the order of the keys
+Offsets are relative to the start of the keys and of the values.
+"""
+from collections import namedtuple
+from collections.abc import Mapping
+from functools import lru_cache
+import hashlib
+from importlib import metadata
+import mmap
+import os
+import re
+import struct
+
+MAGIC = b"FBAT"
+_HEADER = struct.Struct("<4sII")
+_SPAN = struct.Struct("<2I")
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "data", "compiled")
+_GLYPHDATA = os.path.join(os.path.dirname(__file__), "glyphdata.py")
+_VENDORLIST = os.path.join(os.path.dirname(__file__),
+                           "data", "fontbakery-microsoft-vendorlist.cache")
+
+
+def _in_PUA_range(codepoint):
+    """
+      In Unicode, a Private Use Area (PUA) is a range of code points that,
+      by definition, will not be assigned characters by the Unicode Consortium.
+      Three private use areas are defined:
+        one in the Basic Multilingual Plane (U+E000–U+F8FF),
+        and one each in, and nearly covering, planes 15 and 16
+        (U+F0000–U+FFFFD, U+100000–U+10FFFD).
+    """
+    return (codepoint >= 0xE000 and codepoint <= 0xF8FF) or \
+           (codepoint >= 0xF0000 and codepoint <= 0xFFFFD) or \
+           (codepoint >= 0x100000 and codepoint <= 0x10FFFD)
+
+
+def _glyph_contours_by_codepoint():
+    from fontbakery.glyphdata import desired_glyph_data
+    # since the glyph in PUA ranges have unspecified meaning,
+    # it doesnt make sense for us to have an expected contour cont for them
+    return {glyph['unicode']: glyph['contours']
+            for glyph in desired_glyph_data
+            if not _in_PUA_range(glyph['unicode'])}
+
+
+def _glyph_contours_by_name():
+    from fontbakery.glyphdata import desired_glyph_data
+    return {glyph['name']: glyph['contours']
+            for glyph in desired_glyph_data}
+
+
+def _vendor_ids():
+    from bs4 import BeautifulSoup
+
+    registered_vendor_ids = {}
+    content = open(_VENDORLIST, encoding='utf-8').read()
+    # Strip all <A> HTML tags from the raw HTML. The current page contains a
+    # closing </A> for which no opening <A> is present, which causes
+    # beautifulsoup to silently stop processing that section from the error
+    # onwards. We're not using the href's anyway.
+    content = re.sub("<a[^>]*>", "", content, flags=re.IGNORECASE)
+    content = re.sub("</a>", "", content, flags=re.IGNORECASE)
+    soup = BeautifulSoup(content, 'html.parser')
+
+    IDs = [chr(c + ord('a')) for c in range(ord('z') - ord('a') + 1)]
+    IDs.append("0-9-")
+
+    for section_id in IDs:
+        section = soup.find('h2', {'id': section_id})
+        table = section.find_next_sibling('table')
+        if not table: continue
+
+        for row in table.findAll('tr'):
+            cells = row.findAll('td')
+            if not cells:
+                continue
+
+            labels = [label for label in cells[1].stripped_strings]
+
+            # pad the code to make sure it is a 4 char string,
+            # otherwise eg "CF  " will not be matched to "CF"
+            code = cells[0].string.strip()
+            code = code + (4 - len(code)) * ' '
+            registered_vendor_ids[code] = labels[0]
+
+            # Do the same with NULL-padding:
+            code = cells[0].string.strip()
+            code = code + (4 - len(code)) * chr(0)
+            registered_vendor_ids[code] = labels[0]
+
+    return registered_vendor_ids
+
+
+def _axis_registry():
+    from axisregistry import AxisRegistry
+    return AxisRegistry()
+
+
+def _axis_registry_version():
+    try:
+        return "axisregistry " + metadata.version("axisregistry")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _files_version(*paths):
+    """Returns the version function of an asset built from files shipped
+    with fontbakery: a hash of their contents."""
+    def version():
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as fh:
+                digest.update(fh.read())
+        return "sha256 " + digest.hexdigest()
+    return version
+
+
+def _decode_axis(data):
+    from axisregistry.axes_pb2 import AxisProto
+    return AxisProto.FromString(data)
+
+
+# (encode, decode) pairs, between the keys or values of an asset and bytes.
+TEXT = (str.encode, bytes.decode)
+CODEPOINT = (lambda codepoint: codepoint.to_bytes(4, "big"),
+             lambda data: int.from_bytes(data, "big"))
+COUNTS = (bytes, list)
+AXIS = (lambda axis: axis.SerializeToString(deterministic=True), _decode_axis)
+
+# version: returns the version of the sources of the asset, None if unknown.
+Asset = namedtuple("Asset", "build key_codec value_codec version")
+
+ASSETS = {
+    "glyph-contours-by-codepoint": Asset(_glyph_contours_by_codepoint, CODEPOINT, COUNTS,
+                                         _files_version(_GLYPHDATA)),
+    "glyph-contours-by-name": Asset(_glyph_contours_by_name, TEXT, COUNTS,
+                                    _files_version(_GLYPHDATA)),
+    "vendor-ids": Asset(_vendor_ids, TEXT, TEXT, _files_version(_VENDORLIST)),
+    "gf-axis-registry": Asset(_axis_registry, TEXT, AXIS, _axis_registry_version),
+}
+
+
+def compile_table(items, version=""):
+    """Returns the bytes of a table of the (key, value) byte strings in items,
+    built from sources of the given version."""
+    items = sorted(items)
+    version = version.encode()
+    key_offsets, value_offsets = [0], [0]
+    for key, value in items:
+        key_offsets.append(key_offsets[-1] + len(key))
+        value_offsets.append(value_offsets[-1] + len(value))
+    offsets = struct.Struct(f"<{len(items) + 1}I")
+    return b"".join([_HEADER.pack(MAGIC, len(items), len(version)),
+                     version,
+                     offsets.pack(*key_offsets),
+                     offsets.pack(*value_offsets)]
+                    + [key for key, _ in items]
+                    + [value for _, value in items])
+
+
+def compile_asset(name):
+    """Builds the asset `name` from its sources, returns the table bytes."""
+    asset = ASSETS[name]
+    encode_key, encode_value = asset.key_codec[0], asset.value_codec[0]
+    return compile_table(((encode_key(key), encode_value(value))
+                          for key, value in asset.build().items()),
+                         get_source_version(name) or "")
+
+
+def get_source_version(name):
+    """The version of the sources of the asset `name`, None if unknown."""
+    return ASSETS[name].version()
+
+
+def asset_path(name, directory=ASSETS_DIR):
+    return os.path.join(directory, f"{name}.bin")
+
+
+def build_assets(directory=ASSETS_DIR):
+    """Compiles all assets into `directory`, returns the paths written."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name in ASSETS:
+        path = asset_path(name, directory)
+        with open(path, "wb") as fh:
+            fh.write(compile_asset(name))
+        paths.append(path)
+    return paths
+
+
+class AssetTable(Mapping):
+    """
+    A read-only mapping over the bytes of a compiled table, usually a memory
+    map. Keys are found by binary search over the encoded keys, values are
+    decoded on access.
+    """
+    def __init__(self, name, data):
+        magic, count, version_size = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f'"{name}" is not a compiled asset table.')
+        asset = ASSETS[name]
+        self.name = name
+        self.version = bytes(data[_HEADER.size:_HEADER.size + version_size]).decode()
+        self._data = data
+        self._encode_key, self._decode_key = asset.key_codec
+        self._decode_value = asset.value_codec[1]
+        self._count = count
+        self._key_offsets = _HEADER.size + version_size
+        self._value_offsets = self._key_offsets + 4 * (count + 1)
+        self._keys = self._value_offsets + 4 * (count + 1)
+        # The last key offset is the size of all keys.
+        self._values = self._keys + struct.unpack_from("<I", data, self._value_offsets - 4)[0]
+
+    def _slice(self, offsets, start, index):
+        begin, end = _SPAN.unpack_from(self._data, offsets + 4 * index)
+        return self._data[start + begin:start + end]
+
+    def _key(self, index):
+        return self._slice(self._key_offsets, self._keys, index)
+
+    def __getitem__(self, key):
+        try:
+            encoded = self._encode_key(key)
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            raise KeyError(key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count or self._key(low) != encoded:
+            raise KeyError(key)
+        return self._decode_value(self._slice(self._value_offsets, self._values, low))
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._decode_key(self._key(index))
+
+    def __len__(self):
+        return self._count
+
+    def __reduce__(self):
+        # Pickled by name, e.g. for the condition cache or worker processes.
+        return load_asset, (self.name,)
+
+    def __repr__(self):
+        return f"<AssetTable {self.name}: {self._count} entries>"
+
+
+@lru_cache(maxsize=None)
+def load_asset(name):
+    """Returns the AssetTable of the asset `name`.
+
+    The compiled file is memory mapped. Without it, or if it was built from
+    another version of its sources (e.g. in a source checkout after editing
+    one of them, before running `fontbakery build-assets`), the table is
+    compiled in memory."""
+    try:
+        with open(asset_path(name), "rb") as fh:
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return AssetTable(name, compile_asset(name))
+    table = AssetTable(name, data)
+    version = get_source_version(name)
+    if version is not None and table.version != version:
+        table = AssetTable(name, compile_asset(name))
+    return table
@@ -0,0 +1,322 @@
+"""
+Font Bakery benchmark runs the checks of profiles over a corpus of font
+families and records, per check and per condition, the wall time, the CPU
+time and the memory peak (via tracemalloc). The results are saved as JSON
+and can be compared to an earlier result, the baseline, to detect checks
+or conditions that became slower or use more memory.
+
+The time of a check doesn't include the conditions it triggered, those are
+recorded by condition name. Times are summed over all check executions or
+condition evaluations of a run, memory peaks are the maximum. With several
+repetitions, the lowest value of each measurement is kept.
+
+`run_scaling_benchmark` runs the checks over synthetic fonts instead (see
+fontbakery.synthetic), one per value of a parameter such as the number of
+glyphs, and estimates how the time of each check grows with it.
+
+`measure_startup` measures how long `fontbakery check-PROFILE --list-checks`
+takes, in a fresh interpreter, and which modules it imports.
+
+usage:
+>> results = run_benchmark(["universal"], ["data/test"])
+>> save_results(results, "baseline.json")
+>> ...
+>> regressions = compare(run_benchmark(["universal"], ["data/test"]),
+>>                       load_results("baseline.json"))
+>> scaling = run_scaling_benchmark(["universal"], "glyphs", [1000, 4000, 16000])
+>> startup = measure_startup("universal")
+"""
+from collections import defaultdict
+from importlib import import_module
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from fontbakery.checkrunner import CheckRunner
+from fontbakery.configuration import Configuration
+
+BENCHMARK_FORMAT = "fontbakery-benchmark"
+SCALING_FORMAT = "fontbakery-scaling"
+DEFAULT_PROFILES = ("universal", "googlefonts", "notofonts", "adobefonts", "iso15008")
+# A measurement regressed if it grew by more than DEFAULT_THRESHOLD relative
+# to the baseline, and by more than the minimum in absolute terms, which
+# keeps the noise of tiny measurements out.
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_TIME = 0.01
+DEFAULT_MIN_MEMORY = 1024 * 1024
+METRICS = ("wall", "memory")
+# A growth exponent from which the time grows clearly faster than linearly.
+SUPERLINEAR = 1.5
+# Seconds for `--list-checks`, not counting the startup of the interpreter.
+STARTUP_BUDGET = 0.3
+
+STARTUP_SCRIPT = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+from fontbakery.cli import main
+sys.argv = ["fontbakery", sys.argv[1], "--list-checks"]
+try:
+    with contextlib.redirect_stdout(io.StringIO()):
+        main()
+except SystemExit:
+    pass
+print(json.dumps({"seconds": time.perf_counter() - start,
+                  "modules": sorted(sys.modules)}))
+"""
+
+
+def find_families(paths, accepted_files):
+    """Groups the files in `paths` (files or directories, which are walked)
+    by directory. Each directory that contains fonts is a family. Returns a
+    list of values dicts, e.g. {"fonts": [...], "metadata_pb": [...]}, the
+    files are classified by the FileDescriptions of `accepted_files`."""
+    directories = defaultdict(list)
+    for path in paths:
+        if not os.path.isdir(path):
+            directories[os.path.dirname(path)].append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            # UFO sources are directories with plenty of files.
+            dirs[:] = sorted(name for name in dirs if not name.endswith(".ufo"))
+            directories[root] += [os.path.join(root, name) for name in files]
+
+    families = []
+    for directory in sorted(directories):
+        values = {}
+        for filename in sorted(directories[directory]):
+            for description in accepted_files:
+                if any(filename.endswith(extension)
+                       for extension in description.extensions):
+                    values.setdefault(description.name, []).append(filename)
+        if values.get("fonts"):
+            families.append(values)
+    return families
+
+
+def _add(record, wall, cpu, memory):
+    record["count"] = record.get("count", 0) + 1
+    record["wall"] = record.get("wall", 0.0) + max(wall, 0.0)
+    record["cpu"] = record.get("cpu", 0.0) + max(cpu, 0.0)
+    if memory is not None:
+        record["memory"] = max(record.get("memory", 0), memory)
+
+
+def _add_measurements(totals, instrumentation):
+    for key, record in instrumentation.checks.items():
+        wall, cpu = record["wall"], record["cpu"]
+        for _, condition_record in instrumentation.get_check_conditions(key):
+            wall -= condition_record["wall"]
+            cpu -= condition_record["cpu"]
+        _add(totals["checks"][key[1]], wall, cpu, record.get("memory"))
+    for (name, _), record in instrumentation.conditions.items():
+        _add(totals["conditions"][name], record["wall"], record["cpu"],
+             record.get("memory"))
+
+
+def _keep_best(best, totals):
+    for kind, records in totals.items():
+        for name, record in records.items():
+            if name not in best[kind]:
+                best[kind][name] = dict(record)
+                continue
+            for metric, value in record.items():
+                best[kind][name][metric] = min(best[kind][name].get(metric, value), value)
+
+
+def benchmark_profile(profile, families, config=None, trace_memory=True, repeat=1):
+    """Runs the checks of `profile` over each family (a values dict, see
+    `find_families`), `repeat` times. Returns {"checks": {check id: record},
+    "conditions": {condition name: record}}, with records like
+    {"count": executions, "wall": seconds, "cpu": seconds, "memory": bytes}."""
+    if config is None:
+        config = Configuration(full_lists=True)
+    best = {"checks": {}, "conditions": {}}
+    tracing = tracemalloc.is_tracing()
+    try:
+        for _ in range(repeat):
+            totals = {"checks": defaultdict(dict), "conditions": defaultdict(dict)}
+            for values in families:
+                runner = CheckRunner(profile, dict(values), config,
+                                     trace_memory=trace_memory)
+                for _ in runner.run():
+                    pass
+                _add_measurements(totals, runner.instrumentation)
+            _keep_best(best, totals)
+    finally:
+        if not tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return best
+
+
+def _meta(trace_memory, repeat):
+    from fontbakery import __version__
+    return {
+        "fontbakery": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "trace_memory": trace_memory,
+        "repeat": repeat,
+    }
+
+
+def _load_profile(name):
+    return import_module(f"fontbakery.profiles.{name}").profile
+
+
+def run_benchmark(profile_names, paths, config=None, trace_memory=True, repeat=1):
+    """Benchmarks the profiles (names of modules in fontbakery.profiles) over
+    the font families in `paths`. Returns the results document."""
+    results = {
+        "format": BENCHMARK_FORMAT,
+        "meta": _meta(trace_memory, repeat),
+        "profiles": {},
+    }
+    for name in profile_names:
+        profile = _load_profile(name)
+        families = find_families(paths, profile.accepted_files)
+        profile_results = benchmark_profile(
+            profile, families, config=config, trace_memory=trace_memory, repeat=repeat
+        )
+        profile_results["families"] = len(families)
+        profile_results["fonts"] = sum(len(values["fonts"]) for values in families)
+        results["profiles"][name] = profile_results
+    return results
+
+
+def measure_startup(profile_name, repeat=3):
+    """Runs `fontbakery check-PROFILE --list-checks` in a fresh interpreter
+    `repeat` times (the first run may have to compile the bytecode). Returns
+    the fastest run, {"seconds": ..., "modules": [imported modules]}."""
+    env = dict(os.environ)
+    # Measure the command itself, not a submission to the daemon.
+    env.pop("FONTBAKERY_DAEMON", None)
+    subcommand = "check-" + profile_name.replace("_", "-")
+    return min(
+        (
+            json.loads(
+                subprocess.check_output(
+                    [sys.executable, "-c", STARTUP_SCRIPT, subcommand], env=env
+                )
+            )
+            for _ in range(repeat)
+        ),
+        key=lambda result: result["seconds"],
+    )
+
+
+def run_scaling_benchmark(profile_names, parameter, values, parameters=None,
+                          config=None, trace_memory=True, repeat=1,
+                          directory=None):
+    """Benchmarks the profiles over synthetic fonts, built with `parameters`
+    (see fontbakery.synthetic.PARAMETERS) and each of the `values` for
+    `parameter`. The fonts are saved to `directory`, where they are reused
+    by later runs (large fonts take minutes to build), or to a temporary
+    directory that is removed afterwards.
+
+    Returns the results document, in which each check and condition has a
+    list of records, one per value (None when it wasn't run)."""
+    from fontbakery.synthetic import build_font, check_parameters, font_filename
+
+    parameters = dict(parameters or {})
+    for value in values:
+        check_parameters({**parameters, parameter: value})
+    profiles = {name: _load_profile(name) for name in profile_names}
+    results = {
+        "format": SCALING_FORMAT,
+        "meta": _meta(trace_memory, repeat),
+        "parameter": parameter,
+        "values": list(values),
+        "parameters": parameters,
+        "profiles": {name: {"checks": defaultdict(lambda: [None] * len(values)),
+                            "conditions": defaultdict(lambda: [None] * len(values))}
+                     for name in profile_names},
+    }
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory() as temporary:
+        for index, value in enumerate(values):
+            font_parameters = {**parameters, parameter: value}
+            filename = os.path.join(directory or temporary,
+                                    font_filename(font_parameters))
+            if not os.path.exists(filename):
+                build_font(**font_parameters).save(filename)
+            for name, profile in profiles.items():
+                profile_results = benchmark_profile(
+                    profile, [{"fonts": [filename]}], config=config,
+                    trace_memory=trace_memory, repeat=repeat
+                )
+                for kind, records in profile_results.items():
+                    for record_name, record in records.items():
+                        results["profiles"][name][kind][record_name][index] = record
+    for profile_results in results["profiles"].values():
+        for kind in ("checks", "conditions"):
+            profile_results[kind] = dict(profile_results[kind])
+    return results
+
+
+def growth(values, times):
+    """Returns the exponent k of the power law time ~ value ** k that fits
+    the measurements best (in the least squares sense, on a log-log scale):
+    about 1 for linear growth, 2 for quadratic growth. Returns None if there
+    are less than two usable measurements."""
+    points = [(math.log(value), math.log(time))
+              for value, time in zip(values, times)
+              if value and time]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def save_results(results, filename):
+    with open(filename, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, sort_keys=True, indent=1)
+
+
+def load_results(filename):
+    with open(filename, encoding="utf-8") as fh:
+        results = json.load(fh)
+    if results.get("format") != BENCHMARK_FORMAT:
+        raise ValueError(f"{filename} is not a benchmark result of fontbakery.")
+    return results
+
+
+def compare(results, baseline,
+            threshold=DEFAULT_THRESHOLD,
+            min_time=DEFAULT_MIN_TIME,
+            min_memory=DEFAULT_MIN_MEMORY):
+    """Returns a list of the regressions of `results` compared to `baseline`,
+    as dicts with the keys "profile", "kind" ("checks" or "conditions"),
+    "name", "metric" ("wall" or "memory"), "baseline" and "value". Checks and
+    conditions that aren't in the baseline are ignored."""
+    minimums = {"wall": min_time, "memory": min_memory}
+    regressions = []
+    for profile_name, profile_results in sorted(results["profiles"].items()):
+        baseline_profile = baseline["profiles"].get(profile_name, {})
+        for kind in ("checks", "conditions"):
+            baseline_records = baseline_profile.get(kind, {})
+            for name, record in sorted(profile_results[kind].items()):
+                baseline_record = baseline_records.get(name)
+                if baseline_record is None:
+                    continue
+                for metric in METRICS:
+                    if metric not in record or metric not in baseline_record:
+                        continue
+                    old, new = baseline_record[metric], record[metric]
+                    if new > old * (1 + threshold) and new - old > minimums[metric]:
+                        regressions.append({"profile": profile_name,
+                                            "kind": kind,
+                                            "name": name,
+                                            "metric": metric,
+                                            "baseline": old,
+                                            "value": new})
+    return regressions
@@ -0,0 +1,307 @@
+"""
+Font Bakery cache is a persistent, on-disk key/value store for results
+computed by the CheckRunner. It allows to reuse those results across runs
+as long as their inputs did not change.
+
+Keys are derived from the inputs (files are hashed by their path and their
+content, not by their modification time) and from a fingerprint of the source
+code that produced the value. Values are stored pickled, anything that can't
+be pickled is simply not cached.
+
+Separation of Concerns Disclaimer:
+While created specifically for checking fonts and font-families this
+module has no domain knowledge about fonts. It can be used for any kind
+of (document) checking. Please keep it so. It will be valuable for other
+domains as well.
+Domain specific knowledge should be encoded only in the Profile (Checks,
+Conditions) and MAYBE in *customized* reporters e.g. subclasses.
+"""
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+
+from fontbakery import __version__ as fontbakery_version
+
+# 512 MB
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+
+CACHE_FILE_SUFFIX = ".pickle"
+
+
+def get_default_cache_dir():
+    """The per-user cache directory, following the XDG convention."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "fontbakery")
+
+
+# Hashing the same file over and over is what we want to avoid in the first
+# place. The memo is keyed by (path, size, mtime), a changed file will be
+# hashed again.
+_file_hashes = {}
+
+
+def hash_file(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_hashes.get(memo_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = _file_hashes[memo_key] = sha.hexdigest()
+    return digest
+
+
+def hash_value(value):
+    """Return a hex digest describing the content of `value`.
+
+    Strings that point to existing files are hashed by their absolute path
+    and the file content: a touched, but otherwise unchanged file produces
+    the same hash, a renamed or moved one doesn't (values may depend on the
+    name or directory of a file). Containers are hashed recursively,
+    anything else by its `repr`.
+    """
+    sha = hashlib.sha256()
+    if isinstance(value, str) and os.path.isfile(value):
+        sha.update(b"file:")
+        sha.update(os.path.abspath(value).encode())
+        sha.update(b"\0")
+        sha.update(hash_file(value).encode())
+    elif isinstance(value, (list, tuple)):
+        sha.update(b"sequence:")
+        for item in value:
+            sha.update(hash_value(item).encode())
+    elif isinstance(value, dict):
+        sha.update(b"mapping:")
+        for key in sorted(value, key=str):
+            sha.update(str(key).encode())
+            sha.update(hash_value(value[key]).encode())
+    else:
+        sha.update(b"value:")
+        sha.update(repr(value).encode())
+    return sha.hexdigest()
+
+
+_IMMUTABLE_TYPES = (str, bytes, int, float, bool, tuple, frozenset, type(None))
+
+
+def callable_fingerprint(func):
+    """Return a hex digest of the source code of `func`.
+
+    Wrapped callables (e.g. FontBakeryCheck, or the checks created by
+    `check_log_override`) are followed all the way down, the immutable
+    closures of the wrappers are part of the fingerprint, because they
+    carry e.g. the override rules. The whole source file of each callable
+    is part of the fingerprint too, it holds the helpers the callable uses
+    (see also `code_fingerprint`).
+    """
+    sha = hashlib.sha256()
+    seen = set()
+    while func is not None and id(func) not in seen:
+        seen.add(id(func))
+        try:
+            sha.update(inspect.getsource(func).encode())
+            sha.update(hash_file(inspect.getsourcefile(func)).encode())
+        except (OSError, TypeError):
+            sha.update(repr(func).encode())
+        for cell in getattr(func, "__closure__", None) or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:  # empty cell
+                continue
+            # Only immutable values, a mutable closure (e.g. a list that
+            # collects results) would change the fingerprint on each call.
+            if isinstance(contents, _IMMUTABLE_TYPES):
+                sha.update(repr(contents).encode())
+        func = getattr(func, "__wrapped__", None)
+    return sha.hexdigest()
+
+
+_code_fingerprint = None
+
+
+def code_fingerprint():
+    """Return a hex digest of the files of the fontbakery package and of the
+    versions of the distributions it requires.
+
+    `callable_fingerprint` only covers a check or a condition and its
+    module, not the helpers it calls elsewhere (e.g. in fontbakery.utils)
+    nor the libraries it uses (e.g. fontTools). Computed once per process.
+    """
+    global _code_fingerprint  # pylint: disable=global-statement
+    if _code_fingerprint is not None:
+        return _code_fingerprint
+    import re
+    from importlib import metadata
+
+    sha = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for filename in sorted(files):
+            if filename.endswith((".pyc", ".pyo")):
+                continue
+            path = os.path.join(root, filename)
+            sha.update(os.path.relpath(path, package_dir).encode())
+            sha.update(hash_file(path).encode())
+    try:
+        requirements = metadata.requires("fontbakery") or []
+    except metadata.PackageNotFoundError:
+        requirements = []
+    for requirement in sorted(requirements):
+        name = re.match(r"[A-Za-z0-9_.\-]+", requirement).group(0)
+        try:
+            version = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            version = None
+        sha.update(f"{name}=={version}".encode())
+    _code_fingerprint = sha.hexdigest()
+    return _code_fingerprint
+
+
+class PersistentCache:
+    """
+    A size bounded, content addressed on-disk cache.
+
+    usage:
+    >> cache = PersistentCache('~/.cache/fontbakery', namespace='conditions')
+    >> key = cache.make_key('my_condition', hash_value('font.ttf'))
+    >> hit, value = cache.get(key)
+    >> if not hit:
+    >>     cache.set(key, compute_value())
+
+    Entries are files below `directory/namespace`. When the total size of
+    the namespace exceeds `max_size` bytes, the least recently used entries
+    are removed. Writes are atomic, so concurrent processes (e.g. the
+    workers of a multiprocessing run) can share a cache directory.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_SIZE, namespace="conditions"):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = max_size
+        self.namespace = namespace
+        self._size = None  # total size on disk, read lazily
+
+    def __getstate__(self):
+        # Instances are passed to multiprocessing workers, the size
+        # accounting is re-initialized in each process.
+        state = self.__dict__.copy()
+        state["_size"] = None
+        return state
+
+    def with_namespace(self, namespace):
+        return type(self)(self.directory, self.max_size, namespace)
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.namespace)
+
+    @staticmethod
+    def make_key(*parts):
+        sha = hashlib.sha256()
+        sha.update(fontbakery_version.encode())
+        for part in parts:
+            sha.update(b"\0")
+            sha.update(str(part).encode())
+        return sha.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + CACHE_FILE_SUFFIX)
+
+    def get(self, key):
+        """Returns a tuple (hit, value)."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            return False, None
+        except Exception:  # pylint: disable=broad-except
+            # Corrupt or incompatible entry, e.g. a class changed its layout.
+            self._remove(entry_path)
+            return False, None
+        try:
+            # mark as recently used for the eviction
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return True, value
+
+    def set(self, key, value):
+        """Store value, returns False if value can't be pickled."""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:  # pylint: disable=broad-except
+            # Typically a value that holds an open file or a C extension object.
+            return False
+        if len(data) > self.max_size:
+            return False
+        entry_path = self._entry_path(key)
+        size = self.size
+        try:
+            # e.g. a stale entry that is stored again
+            replaced_size = os.stat(entry_path).st_size
+        except OSError:
+            replaced_size = 0
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path),
+                                        suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            self._remove(tmp_path)
+            return False
+        self._size = size + len(data) - replaced_size
+        if self._size > self.max_size:
+            self.evict()
+        return True
+
+    def _entries(self):
+        for root, _, files in os.walk(self.path):
+            for filename in files:
+                if not filename.endswith(CACHE_FILE_SUFFIX):
+                    continue
+                entry_path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                yield entry_path, stat.st_size, stat.st_mtime
+
+    @property
+    def size(self):
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def evict(self, target_size=None):
+        """Remove least recently used entries until the cache is smaller
+        than target_size, which defaults to 80% of max_size."""
+        if target_size is None:
+            target_size = int(self.max_size * 0.8)
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(size for _, size, _ in entries)
+        for entry_path, entry_size, _ in entries:
+            if size <= target_size:
+                break
+            if self._remove(entry_path):
+                size -= entry_size
+        self._size = size
+
+    def clear(self):
+        self.evict(target_size=0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -141,7 +141,14 @@ class FontBakeryCondition(FontbakeryCallable):
                  name = None, # very short text
                  description = None, # short text
                  documentation=None, # long text, markdown?
-                 force=False):
+                 force=False,
+                 shared=False, # evaluated once by the parent process of a
+                               # multiprocessing run and sent to the workers,
+                               # the value must be cheap to pickle.
+                 persistent=True): # False if the value depends on more than
+                                   # the arguments, e.g. on other files next
+                                   # to a font or on the network: it is never
+                                   # stored in the persistent condition cache.
         super().__init__(func)
         # self.id = id
         self.name = func.__name__ if name is None else name
@@ -149,6 +156,8 @@ class FontBakeryCondition(FontbakeryCallable):
                                                             description,
                                                             documentation)
         self.force = force
+        self.shared = shared
+        self.persistent = persistent
 
 class FontBakeryCheck(FontbakeryCallable):
     def __init__(self,
@@ -164,6 +173,10 @@ class FontBakeryCheck(FontbakeryCallable):
                                 # This is typically a github issue or pull request.
                  severity=None, # numeric value from 1=min to 10=max, denoting check severity
                  configs=None, # items from config[self.id] to inject into the check's namespace.
+                 persistent=True, # False if the results depend on more than the
+                                  # arguments and conditions of the check, e.g. on
+                                  # other files next to a font or on the network:
+                                  # they are never replayed from the result cache.
                  misc_metadata=None, # Miscelaneous free-form metadata fields
                                      # Some of them may be promoted to 1st-class metadata fields
                                      # if they start being used by the check-runner.
@@ -227,6 +240,7 @@ class FontBakeryCheck(FontbakeryCallable):
                                                             description,
                                                             documentation)
         self.configs = configs
+        self.persistent = persistent
         self.proposal = proposal
         self.severity = severity
         if not self.description:
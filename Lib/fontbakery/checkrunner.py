@@ -12,23 +12,31 @@ Conditions) and MAYBE in *customized* reporters e.g. subclasses.
 
 """
 import os
+import signal
+import sys
+import threading
+import time
 import types
-from collections import OrderedDict, Counter
+from collections import OrderedDict, Counter, defaultdict
+from functools import partial
 import importlib
 import inspect
 from typing import Dict, Any
 
+from fontbakery.cache import callable_fingerprint, code_fingerprint, hash_value
 from fontbakery.callable import (
     FontbakeryCallable,
     FontBakeryCheck,
     FontBakeryCondition,
     FontBakeryExpectedValue,
 )
+from fontbakery.instrumentation import Instrumentation
 from fontbakery.message import Message
 from fontbakery.profile import Profile, get_module_profile
 from fontbakery.utils import is_negated
 from fontbakery.errors import (
     APIViolationError,
+    CheckTimeout,
     CircularDependencyError,
     FailedCheckError,
     FailedConditionError,
@@ -58,6 +66,190 @@ from fontbakery.status import (
 )
 
 
+class ExecutionPlan:
+    """
+    What the CheckRunner needs to know about the names of a profile to
+    dispatch a check execution, compiled once per name (or check, or
+    condition) and reused by all executions:
+      * how a name is resolved: values win over the profile namespace,
+        aliases are followed,
+      * the arguments of checks and conditions, and the parsed (maybe
+        negated) conditions of checks,
+      * the iterargs a condition depends on, directly or through other
+        conditions, to project the iterargs of a check execution onto the
+        cache key of the condition value,
+      * the conditions reachable from a name, to release condition values.
+
+    The values must not change after the plan was created.
+    """
+    def __init__(self, profile, values):
+        self._profile = profile
+        self._values = values
+        self._resolutions = {}
+        self._arguments = {}
+        self._conditions = {}
+        self._used_iterargs = {}
+        self._projections = {}
+        self._dependency_names = {}
+        self._deep_dependencies = {}
+        self._reachable_conditions = {}
+
+    def resolve(self, name):
+        """Returns (nametype, resolved name, target). `nametype` is "values"
+        if the resolved name is in the values, otherwise its type in the
+        profile namespace or None. `target` is the default of expected
+        values, the plural of iterargs and (condition name, simple) of
+        derived iterables."""
+        resolution = self._resolutions.get(name)
+        if resolution is None:
+            resolution = self._resolutions[name] = self._resolve(name)
+        return resolution
+
+    def _resolve(self, original_name):
+        # try this once before resolving aliases and once after
+        if original_name in self._values:
+            return "values", original_name, None
+        name = self._profile.resolve_alias(original_name)
+        if name in self._values:
+            return "values", name, None
+
+        nametype = self._profile.get_type(name, None)
+        if nametype == "expected_values":
+            # No need to validate
+            expected_value = self._profile.get(name)
+            if expected_value.has_default:
+                return nametype, name, expected_value.default
+            # has no default: fallback or MissingValueError
+            return None, name, None
+        if nametype in ("iterargs", "derived_iterables"):
+            return nametype, name, self._profile.get(name)
+        if nametype in ("conditions", "config"):
+            return nametype, name, None
+        return None, name, None
+
+    def arguments(self, item):
+        """The (name, is optional) arguments of a check or condition."""
+        arguments = self._arguments.get(item)
+        if arguments is None:
+            # iterargs can't be optional arguments yet, we wouldn't generate
+            # an execution with an empty list. I don't know if that would be
+            # even feasible, so I don't add this complication for the sake of
+            # clarity. If this is needed for anything useful, we'll have to
+            # figure this out.
+            arguments = self._arguments[item] = tuple(
+                (name, name in item.optionalArgs) for name in dict.fromkeys(item.args)
+            )
+        return arguments
+
+    def conditions(self, check):
+        """The (condition, negate, name) conditions of check."""
+        conditions = self._conditions.get(check)
+        if conditions is None:
+            conditions = self._conditions[check] = tuple(
+                (condition,) + is_negated(condition) for condition in check.conditions
+            )
+        return conditions
+
+    def used_iterargs(self, name):
+        """The names of all arguments of the condition `name` and of the
+        conditions it depends on, of which the iterargs are relevant."""
+        used = self._used_iterargs.get(name)
+        if used is None:
+            allArgs = set()
+            names = list(self._profile.conditions[name].args)
+            while names:
+                arg = names.pop()
+                if arg in allArgs:
+                    continue
+                allArgs.add(arg)
+                if arg in self._profile.conditions:
+                    names += self._profile.conditions[arg].args
+            used = self._used_iterargs[name] = frozenset(allArgs)
+        return used
+
+    def project(self, name, iterargs):
+        """The iterargs of a check execution that condition `name` uses."""
+        key = (name, iterargs)
+        projection = self._projections.get(key)
+        if projection is None:
+            used = self.used_iterargs(name)
+            projection = self._projections[key] = tuple(
+                item for item in iterargs if item[0] in used
+            )
+        return projection
+
+    def dependency_names(self, check):
+        """The names of the arguments and conditions of check."""
+        names = self._dependency_names.get(check)
+        if names is None:
+            names = self._dependency_names[check] = tuple(
+                [name for name, _ in self.arguments(check)]
+                + [name for _, _, name in self.conditions(check)]
+            )
+        return names
+
+    def deep_dependencies(self, name):
+        """All names `name` depends on, including itself, following
+        aliases, conditions and derived iterables."""
+        dependencies = self._deep_dependencies.get(name)
+        if dependencies is not None:
+            return dependencies
+        profile = self._profile
+        seen = set()
+        names = [name]
+        while names:
+            dependency = profile.resolve_alias(names.pop())
+            if dependency in seen:
+                continue
+            seen.add(dependency)
+            if dependency in profile.conditions:
+                names += profile.conditions[dependency].args
+            elif dependency in profile.derived_iterables:
+                condition_name, _ = profile.derived_iterables[dependency]
+                names.append(condition_name)
+                # A derived iterable spans all values of the iterargs
+                # its condition uses, i.e. the whole plural value.
+                condition = profile.conditions[condition_name]
+                names += [
+                    profile.iterargs[singular]
+                    for singular in profile.get_iterargs(condition)
+                ]
+        dependencies = self._deep_dependencies[name] = frozenset(seen)
+        return dependencies
+
+    def reachable_conditions(self, names):
+        """Returns (conditions, derived) of the conditions that may be
+        evaluated to resolve the tuple of `names` with the iterargs of the
+        caller and of the conditions of derived iterables, which are
+        evaluated for all iterargs they use."""
+        reachable = self._reachable_conditions.get(names)
+        if reachable is not None:
+            return reachable
+        profile = self._profile
+        conditions = set()
+        derived = set()
+        seen = set()
+        key = names
+        names = list(names)
+        while names:
+            dependency = names.pop()
+            if dependency in seen:
+                continue
+            seen.add(dependency)
+            dependency = profile.resolve_alias(dependency)
+            if dependency in self._values:
+                # values always win, the condition is never evaluated
+                continue
+            if dependency in profile.conditions:
+                conditions.add(dependency)
+                names += profile.conditions[dependency].args
+            elif dependency in profile.derived_iterables:
+                derived.add(profile.derived_iterables[dependency][0])
+        reachable = self._reachable_conditions[key] = (frozenset(conditions),
+                                                       frozenset(derived))
+        return reachable
+
+
 class CheckRunner:
     def __init__(
         self,
@@ -66,6 +258,11 @@ class CheckRunner:
         config,
         values_can_override_profile_names=True,
         use_cache=True,
+        condition_cache=None,
+        result_cache=None,
+        release_conditions=True,
+        trace_memory=False,
+        condition_values=None,
     ):
         # TODO: transform all iterables that are list like to tuples
         # to make sure that they won't change anymore.
@@ -100,9 +297,31 @@ class CheckRunner:
                 f"Validation of expected values failed:\n" f"{message}"
             )
         self._values = values
+        self._plan = ExecutionPlan(profile, values)
 
         self.use_cache = use_cache
-        self._cache = {"conditions": {}, "order": None}
+        self._cache = {"conditions": {}, "order": None, "persistent_keys": {}}
+        # Values of conditions evaluated elsewhere, e.g. the shared conditions
+        # evaluated by the parent of a multiprocessing run, see
+        # `get_shared_condition_values`.
+        for key, value in (condition_values or {}).items():
+            self._cache["conditions"][key] = None, value
+        # An optional fontbakery.cache.PersistentCache, used to reuse
+        # condition values across runs.
+        self.condition_cache = condition_cache
+        # An optional fontbakery.cache.PersistentCache, used to replay check
+        # results of earlier runs if none of the inputs of a check changed.
+        self.result_cache = result_cache
+        self._fingerprints = {}
+        # If True, `run` drops condition values from the cache as soon as
+        # no remaining check of the order needs them anymore.
+        self.release_conditions = release_conditions
+        # The releases of an externally controlled run, see `expect_checks`.
+        self._expected_releases = None
+        self.max_cached_conditions = 0
+        # Wall time, CPU time and, with trace_memory, the memory peak of
+        # each check execution and condition evaluation.
+        self.instrumentation = Instrumentation(trace_memory=trace_memory)
 
     def clearCache(self):
         # no need to clear 'order' cache IMO
@@ -231,25 +450,82 @@ class CheckRunner:
             return error, None
 
     def _filter_condition_used_iterargs(self, name, iterargs):
-        allArgs = set()
-        names = list(self._profile.conditions[name].args)
-        while names:
-            name = names.pop()
-            if name in allArgs:
-                continue
-            allArgs.add(name)
+        return self._plan.project(name, iterargs)
+
+    def _get_deep_dependencies(self, name):
+        """All names `name` depends on, including itself, following
+        aliases, conditions and derived iterables."""
+        return self._plan.deep_dependencies(name)
+
+    def _get_fingerprint(self, item):
+        fingerprint = self._fingerprints.get(id(item))
+        if fingerprint is None:
+            fingerprint = self._fingerprints[id(item)] = callable_fingerprint(item)
+        return fingerprint
+
+    def _get_input_fingerprints(self, names, iterargs):
+        """Yields (name, fingerprint) for all `names` that are inputs to
+        the run: source code of conditions and content of values."""
+        iterargsDict = dict(iterargs)
+        for name in sorted(names):
             if name in self._profile.conditions:
-                names += self._profile.conditions[name].args
-        return tuple((name, value) for name, value in iterargs if name in allArgs)
+                yield name, self._get_fingerprint(self._profile.conditions[name])
+            elif name in iterargsDict:
+                value = self.get_iterarg(name, iterargsDict[name])
+                yield name, hash_value(value)
+            elif name in self._values:
+                yield name, hash_value(self._values[name])
+            elif name == "config":
+                yield name, hash_value(self.config)
+            elif name in self._profile.expected_values:
+                expected_value = self._profile.expected_values[name]
+                if expected_value.has_default:
+                    yield name, hash_value(expected_value.default)
+
+    def _is_persistent(self, names):
+        """False if a condition among `names` has inputs that aren't part of
+        the persistent cache keys, e.g. files next to a font or the network,
+        see FontBakeryCondition(persistent=False)."""
+        return all(self._profile.conditions[name].persistent
+                   for name in names if name in self._profile.conditions)
+
+    def _get_persistent_condition_key(self, name, used_iterargs):
+        """The key of a condition value in self.condition_cache, None if
+        the value must not be persisted."""
+        key = (name, used_iterargs)
+        if key not in self._cache["persistent_keys"]:
+            dependencies = self._get_deep_dependencies(name)
+            persistent_key = None
+            if self._is_persistent(dependencies):
+                parts = ["condition", name, code_fingerprint()]
+                for item in self._get_input_fingerprints(dependencies, used_iterargs):
+                    parts += item
+                persistent_key = self.condition_cache.make_key(*parts)
+            self._cache["persistent_keys"][key] = persistent_key
+        return self._cache["persistent_keys"][key]
 
     def _get_condition(self, name, iterargs, path=None):
         # conditions are evaluated lazily
-        used_iterargs = self._filter_condition_used_iterargs(name, iterargs)
+        used_iterargs = self._plan.project(name, iterargs)
         key = (name, used_iterargs)
         if not self.use_cache or key not in self._cache["conditions"]:
-            err, val = self._evaluate_condition(name, used_iterargs, path)
+            hit = False
+            persistent_key = None
+            if self.use_cache and self.condition_cache is not None:
+                persistent_key = self._get_persistent_condition_key(name, used_iterargs)
+            if persistent_key is not None:
+                hit, val = self.condition_cache.get(persistent_key)
+                err = None
+            if not hit:
+                with self.instrumentation.measure_condition(key):
+                    err, val = self._evaluate_condition(name, used_iterargs, path)
+                if persistent_key is not None and not err:
+                    self.condition_cache.set(persistent_key, val)
             if self.use_cache:
                 self._cache["conditions"][key] = err, val
+                self.max_cached_conditions = max(
+                    self.max_cached_conditions, len(self._cache["conditions"])
+                )
         else:
             err, val = self._cache["conditions"][key]
         return err, val
@@ -294,79 +570,55 @@ class CheckRunner:
                 yield (iterargs, value)
 
     def _get(self, name, iterargs, path, *args):
-        iterargsDict = dict(iterargs)
-        has_fallback = bool(len(args))
-        if has_fallback:
-            fallback = args[0]
-
-        # try this once before resolving aliases and once after
-        if name in self._values:
-            return self._values[name]
+        nametype, resolved, target = self._plan.resolve(name)
 
-        original_name = name
-        name = self._profile.resolve_alias(name)
-        if name != original_name and name in self._values:
-            return self._values[name]
-
-        nametype = self._profile.get_type(name, None)
-
-        if name in self._values:
-            return self._values[name]
+        if nametype == "values":
+            return self._values[resolved]
 
         if nametype == "expected_values":
-            # No need to validate
-            expected_value = self._profile.get(name)
-            if expected_value.has_default:
-                # has no default: fallback or MissingValueError
-                return expected_value.default
+            return target
 
-        if nametype == "iterargs" and name in iterargsDict:
-            index = iterargsDict[name]
-            plural = self._profile.get(name)
-            return self._values[plural][index]
+        if nametype == "iterargs":
+            for iterarg, index in iterargs:
+                if iterarg == resolved:
+                    return self._values[target][index]
 
-        if nametype == "conditions":
-            error, value = self._get_condition(name, iterargs, path)
+        elif nametype == "conditions":
+            error, value = self._get_condition(resolved, iterargs, path)
             if error:
                 raise error
             return value
 
-        if nametype == "derived_iterables":
-            condition_name, simple = self._profile.get(name)
+        elif nametype == "derived_iterables":
+            condition_name, simple = target
             return self._derive_iterable_condition(condition_name, simple, path)
 
-        if nametype == "config":
+        elif nametype == "config":
             return self.config
 
-        if has_fallback:
-            return fallback
+        if args:
+            # has fallback
+            return args[0]
 
-        if original_name != name:
-            report_name = f'"{original_name}" as "{name}"'
+        if name != resolved:
+            report_name = f'"{name}" as "{resolved}"'
         else:
             report_name = f'"{name}"'
         raise MissingValueError(f"Value {report_name} is undefined.")
 
     def _get_args(self, item, iterargs, path=None):
-        # iterargs can't be optional arguments yet, we wouldn't generate
-        # an execution with an empty list. I don't know if that would be even
-        # feasible, so I don't add this complication for the sake of clarity.
-        # If this is needed for anything useful, we'll have to figure this out.
         args = {}
-        for name in item.args:
-            if name in args:
-                continue
+        for name, optional in self._plan.arguments(item):
             try:
                 args[name] = self._get(name, iterargs, path)
             except MissingValueError:
-                if name not in item.optionalArgs:
+                if not optional:
                     raise
         return args
 
     def _get_check_dependencies(self, check, iterargs):
         unfulfilled_conditions = []
-        for condition in check.conditions:
-            negate, name = is_negated(condition)
+        for condition, negate, name in self._plan.conditions(check):
             if name in self._values:
                 # this is a handy way to set flags from the outside
                 err, val = None, self._values[name]
@@ -405,7 +657,7 @@ class CheckRunner:
             args = self._get_args(check, iterargs)
             # Run the generators now, so we can test if they're empty
             for k, v in args.items():
-                if inspect.isgenerator(v) or inspect.isgeneratorfunction(v):
+                if inspect.isgenerator(v) or (callable(v) and inspect.isgeneratorfunction(v)):
                     args[k] = list(v)
 
             if all(x is None for x in args.values()):
@@ -438,6 +690,8 @@ class CheckRunner:
 
         if not skipped:
             skipped, args = self._get_check_dependencies(check, iterargs)
+            if skipped is None:
+                self._profile.before_check(check, args)
 
         # FIXME: check is not a message
         # so, to use it as a message, it should have a "message-interface"
@@ -498,20 +752,198 @@ class CheckRunner:
         """
         order must be a subset of self.order
         """
-        own_order = self.order
+        own_order = self._cache.get("order_index", None)
+        if own_order is None:
+            own_order = self._cache["order_index"] = {
+                self._get_identity_key(identity): identity for identity in self.order
+            }
         for item in order:
-            if item not in own_order:
+            own_item = own_order.get(self._get_identity_key(item))
+            if own_item is None or (own_item is not item and own_item != item):
                 raise ValueError(f"Order item {item} not found.")
         return order
 
-    def _check_protocol_generator(self, next_check_identity):
-        section, check, iterargs = next_check_identity
+    def _get_check_result_key(self, check, iterargs):
+        """The key of the results of a check execution in self.result_cache,
+        None if the results must not be replayed."""
+        dependencies = set()
+        for name in self._profile.get_deep_check_dependencies(check):
+            dependencies |= self._get_deep_dependencies(name)
+        if not check.persistent or not self._is_persistent(dependencies):
+            return None
+        check_config = self.config.get(check.id, {})
+        parts = [
+            "check",
+            check.id,
+            self._get_fingerprint(check),
+            code_fingerprint(),
+            hash_value({name: check_config.get(name) for name in check.configs or ()}),
+            hash_value(self.config.get("overrides", {}).get(check.id)),
+        ]
+        if self._profile.check_skip_filter:
+            parts.append(self._get_fingerprint(self._profile.check_skip_filter))
+        for item in self._get_input_fingerprints(dependencies, iterargs):
+            parts += item
+        return self.result_cache.make_key(*parts)
+
+    def _run_check_cached(self, check, iterargs):
+        """Like _run_check, but replays the results of an earlier run
+        from self.result_cache if none of the inputs changed."""
+        key = self._get_check_result_key(check, iterargs)
+        if key is None:
+            yield from self._run_check(check, iterargs)
+            return
+        hit, check_data = self.result_cache.get(key)
+        if hit:
+            yield from check_protocol_from_data(check_data)
+            return
+
+        check_data = {"statuses": []}
         for status, message in self._run_check(check, iterargs):
+            if status == ENDCHECK:
+                check_data["result"] = message.name
+            elif status >= DEBUG:
+                check_data["statuses"].append(check_log_to_data(status, message))
+            yield status, message
+        # ERRORs are likely a problem of the environment or fontbakery
+        # itself, we want to see them again.
+        if check_data["result"] != ERROR.name:
+            self.result_cache.set(key, check_data)
+
+    @staticmethod
+    def _get_identity_key(identity):
+        section, check, iterargs = identity
+        return str(section), check.id, iterargs
+
+    def _get_condition_keys(self, names, iterargs):
+        """The keys of all conditions in self._cache["conditions"] that
+        may be used to resolve `names` with `iterargs`."""
+        keys = set()
+        seen = set()
+        stack = [(tuple(names), iterargs)]
+        while stack:
+            item = stack.pop()
+            if item in seen:
+                continue
+            seen.add(item)
+            names, iterargs = item
+            conditions, derived = self._plan.reachable_conditions(names)
+            for condition_name in conditions:
+                keys.add((condition_name, self._plan.project(condition_name, iterargs)))
+            for condition_name in derived:
+                condition = self._profile.conditions[condition_name]
+                requirements = [
+                    (singular, self._iterargs[singular])
+                    for singular in self._profile.get_iterargs(condition)
+                ]
+                for derived_iterargs in self._generate_iterargs(requirements):
+                    stack.append(((condition_name,), derived_iterargs))
+        return keys
+
+    def get_shared_condition_values(self, shards):
+        """Evaluates the conditions declared as `shared` that the check
+        executions of more than one of `shards` (lists of indexes into the
+        order, e.g. the jobs of the worker processes) need. Returns for each
+        shard {(name, iterargs): value} of the ones it needs, to pass as the
+        `condition_values` of its runner. A shared condition that only one
+        shard needs is left to the runner of that shard, and so are the
+        conditions that fail.
+
+        The conditions that the shared ones depend on (e.g. `ttFont`) are
+        dropped from the cache again."""
+        shared = {name for name, condition in self._profile.conditions.items()
+                  if condition.shared}
+        if not shared:
+            return [{} for _ in shards]
+        keys_per_shard = []
+        for indexes in shards:
+            keys = set()
+            for index in indexes:
+                _, check, iterargs = self.order[index]
+                names = self._plan.dependency_names(check)
+                keys.update(key for key in self._get_condition_keys(names, iterargs)
+                            if key[0] in shared)
+            keys_per_shard.append(keys)
+        counts = Counter(key for keys in keys_per_shard for key in keys)
+        cached = dict(self._cache["conditions"])
+        values = {}
+        try:
+            for name, iterargs in sorted(key for key, count in counts.items()
+                                         if count > 1):
+                err, value = self._get_condition(name, iterargs)
+                if not err:
+                    values[(name, iterargs)] = value
+        finally:
+            self._cache["conditions"] = cached
+        return [{key: values[key] for key in sorted(keys) if key in values}
+                for keys in keys_per_shard]
+
+    def _get_condition_releases(self, order):
+        """Returns a dict {identity key: [condition keys]} of the cached
+        conditions that are used for the last time by the check execution
+        of `identity`, when the checks are executed in `order`."""
+        last_use = {}
+        for identity in order:
+            _, check, iterargs = identity
+            names = self._plan.dependency_names(check)
+            identity_key = self._get_identity_key(identity)
+            for key in self._get_condition_keys(names, iterargs):
+                last_use[key] = identity_key
+        releases = defaultdict(list)
+        for key, identity_key in last_use.items():
+            releases[identity_key].append(key)
+        return releases
+
+    def _check_protocol_generator(self, next_check_identity, releases=None):
+        section, check, iterargs = next_check_identity
+        if self.result_cache is not None:
+            check_protocol = self._run_check_cached(check, iterargs)
+        else:
+            check_protocol = self._run_check(check, iterargs)
+        timeout = self.get_check_timeout(check)
+        if timeout:
+            check_protocol = limit_time(
+                check_protocol, timeout,
+                on_timeout=partial(self._forget_conditions, iterargs)
+            )
+        check_protocol = self.instrumentation.measure_check(
+            self.instrumentation.get_check_key(next_check_identity), check_protocol
+        )
+        for status, message in check_protocol:
             yield status, message, (section, check, iterargs)
+        if releases:
+            identity_key = self._get_identity_key(next_check_identity)
+            for key in releases.pop(identity_key, ()):
+                self._cache["conditions"].pop(key, None)
+
+    def _forget_conditions(self, iterargs):
+        """Drops the cached condition values that depend on `iterargs`, also
+        through derived iterables. A check that was aborted may have left
+        one of them half-built (e.g. a lazily loaded part of a document),
+        they are evaluated again when they are needed."""
+        items = set(iterargs)
+        names = {name for name, _ in iterargs}
+        derived = {plural
+                   for plural, (condition, _) in self._profile.derived_iterables.items()
+                   if names & self._plan.used_iterargs(condition)}
+        for key in list(self._cache["conditions"]):
+            name, used_iterargs = key
+            if items.intersection(used_iterargs) \
+                    or derived & self._get_deep_dependencies(name):
+                del self._cache["conditions"][key]
 
     def session_protocol_generator(self, order=None):
         order = order if order is not None else self.order
-        yield from session_protocol_generator(self._check_protocol_generator, order)
+        check_protocol_generator = self._check_protocol_generator
+        if self.use_cache and self.release_conditions:
+            # This is only valid if the checks are actually executed in
+            # `order`, as in `run`. A mispredicted release is not an error
+            # though, the condition is evaluated again if it is needed.
+            releases = self._get_condition_releases(order)
+            check_protocol_generator = partial(
+                self._check_protocol_generator, releases=releases
+            )
+        yield from session_protocol_generator(check_protocol_generator, order)
 
     def run(self, order=None):
         order = order if order is not None else self.order
@@ -520,11 +952,64 @@ class CheckRunner:
         yield from drive_session_protocol(session_gen, next_check_gen)
 
     def run_externally_controlled(self, receive_result_fn, next_check_gen, order=None):
+        """Runs the check executions that `next_check_gen` yields. Without
+        `expect_checks`, the execution order is not known in advance and
+        no conditions are released."""
         order = order if order is not None else self.order
-        session_gen = self.session_protocol_generator(order)
+
+        def check_protocol_generator(next_check_identity):
+            return self._check_protocol_generator(next_check_identity,
+                                                  releases=self._expected_releases)
+
+        session_gen = session_protocol_generator(check_protocol_generator, order)
         for result in drive_session_protocol(session_gen, next_check_gen):
             receive_result_fn(result)
 
+    def expect_checks(self, identities):
+        """Tells an externally controlled run that it continues with the
+        check executions `identities`, in this order, e.g. the jobs of a
+        worker process. The cached conditions are then released after
+        their last use among them, as in `run`."""
+        if self.use_cache and self.release_conditions:
+            self._expected_releases = self._get_condition_releases(identities)
+
+    def clear_conditions(self):
+        """Forget all cached condition values, e.g. between independent
+        batches of an externally controlled run. A condition that is
+        needed again is evaluated again."""
+        self._cache["conditions"].clear()
+
+    def get_check_timeout(self, check):
+        """The time budget in seconds of `check`, or None.
+
+        Configured per check id, e.g.:
+            [com.google.fonts/check/outline_short_segments]
+            timeout = 60
+        or globally with the "timeout" key.
+        """
+        timeout = self.config.get(check.id, {}).get("timeout", self.config.get("timeout"))
+        return float(timeout) if timeout else None
+
+    def get_timing(self, identity):
+        """Returns the measurements of the check execution of `identity`,
+        including the conditions it triggered first, in a serializable
+        form, or None if the check was not executed."""
+        key = self.instrumentation.get_check_key(identity)
+        record = self.instrumentation.checks.get(key)
+        if record is None:
+            return None
+        timing = dict(record)
+        conditions = []
+        for (name, iterargs), condition_record in \
+                self.instrumentation.get_check_conditions(key):
+            condition_timing = {"name": name, "iterargs": dict(iterargs)}
+            condition_timing.update(condition_record)
+            del condition_timing["check"]
+            conditions.append(condition_timing)
+        if conditions:
+            timing["conditions"] = conditions
+        return timing
+
     def _override_status(self, result, check):
         # Potentially override the status based on the config file.
         # Replaces the status with config["overrides"][check.id][message.code]
@@ -539,6 +1024,138 @@ class CheckRunner:
         return Status(status_overrides[message.code]), message
 
 
+def check_log_to_data(status, message):
+    """Turn a log of the check protocol into a dict that only contains
+    data which can be serialized, e.g. to JSON.
+
+    Keys are:
+      "status": the name of the status
+      "message": the message as a string
+      "code": only if message is a Message, used to explicitly overwrite
+              specific (FAIL) statuses
+      "traceback": only provided if message is an Exception and likely
+                   if status is "ERROR"
+    """
+    # message can be a lot here, currently we know about:
+    #    string, an Exception, a Message. Probably we should leave it
+    #    like this. Message should be the ultimate answer if it's not
+    #    an Exception or a string.
+    log = {"status": status.name}
+
+    if hasattr(message, "traceback"):
+        # message is likely a FontbakeryError if this is not None
+        log["traceback"] = message.traceback
+    if isinstance(message, Message):
+        # Ducktyping could be a valid option here.
+        # in that case, a FontbakeryError could also provide a `code` attribute
+        # which would allow to skip that error explicitly. However
+        # ERROR statuses should never be skiped explicitly, the cause
+        # of the error must be repaired!
+        log.update(message.getData())
+    else:
+        log["message"] = f"{message}"
+    return log
+
+
+def check_log_from_data(log):
+    """The inverse of check_log_to_data, returns a tuple (status, message)."""
+    status = Status(log["status"])
+    if "code" in log:
+        message = Message(log["code"], log["message"])
+    elif "traceback" in log:
+        # not to happy with this generic exception, let's se how it plays out
+        message = Exception(log["message"])
+        setattr(message, "traceback", log["traceback"])
+    else:
+        message = log["message"]
+    return status, message
+
+
+def check_protocol_from_data(check_data):
+    """Yields the (status, message) events of one check execution from
+    a dict like: {"statuses": [log, ...], "result": status name}
+    where log is the result of check_log_to_data."""
+    yield STARTCHECK, None
+    for log in check_data["statuses"]:
+        yield check_log_from_data(log)
+    yield ENDCHECK, Status(check_data["result"])
+
+
+def can_limit_time():
+    """Time budgets are enforced with SIGALRM, which is only available
+    on Unix and only in the main thread."""
+    return (
+        hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+def limit_time(check_protocol, timeout, on_timeout=None):
+    """Yields from check_protocol, the (status, message) events of a check
+    execution. If the time spent in it (e.g. not in the reporters) exceeds
+    `timeout` seconds, the check is aborted, `on_timeout()` is called and
+    the check is reported as ERROR with the message code "timeout".
+    """
+    if not can_limit_time():
+        yield from check_protocol
+        return
+
+    armed = False
+
+    def alarm(signum, frame):
+        if armed:
+            raise CheckTimeout()
+
+    check_protocol = iter(check_protocol)
+    remaining = timeout
+    started = False
+    while True:
+        start = time.monotonic()
+        previous_handler = signal.signal(signal.SIGALRM, alarm)
+        armed = True
+        # a zero timer would disable the alarm
+        signal.setitimer(signal.ITIMER_REAL, max(remaining, 0.001))
+        try:
+            status, message = next(check_protocol)
+        except StopIteration:
+            return
+        except CheckTimeout:
+            break
+        finally:
+            armed = False
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+            remaining -= time.monotonic() - start
+        started = started or status == STARTCHECK
+        yield status, message
+
+    if on_timeout is not None:
+        on_timeout()
+    if not started:
+        yield STARTCHECK, None
+    yield ERROR, Message(
+        "timeout",
+        f"The check was aborted, it exceeded its time budget of {timeout:g} seconds.",
+    )
+    yield ENDCHECK, ERROR
+
+
+def get_peak_memory():
+    """Returns the peak resident set size in bytes of this process and of
+    its (terminated) child processes, whichever is bigger, or None if that
+    can't be determined on this platform."""
+    try:
+        import resource
+    except ImportError:  # e.g. on Windows
+        return None
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return scale * max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
 def drive_session_protocol(session_gen, next_check_gen):
     # can't send anything but None on first iteration
     value = None
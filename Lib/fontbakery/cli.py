@@ -6,7 +6,7 @@ import sys
 from importlib import import_module
 
 import fontbakery.commands
-from fontbakery.commands.check_profile import main as check_profile_main
+from fontbakery.daemon import get_socket_path, submit
 
 CLI_PROFILES = [
     "adobefonts",
@@ -23,6 +23,9 @@ CLI_PROFILES = [
 
 
 def run_profile_check(profilename):
+    # Imported here, so that the thin client of the daemon stays light.
+    from fontbakery.commands.check_profile import main as check_profile_main
+
     module = import_module(f"fontbakery.profiles.{profilename}")
     sys.exit(check_profile_main(module.profile))
 
@@ -35,6 +38,12 @@ def signal_handler(sig, frame):
 def main():
     signal.signal(signal.SIGINT, signal_handler)
 
+    socket_path = get_socket_path()
+    if socket_path and sys.argv[1:2] != ["daemon"]:
+        code = submit(sys.argv[1:], socket_path)
+        if code is not None:
+            sys.exit(code)
+
     subcommands = [
         pkg[1] for pkg in pkgutil.walk_packages(fontbakery.commands.__path__)
     ] + ["check_" + prof for prof in CLI_PROFILES]
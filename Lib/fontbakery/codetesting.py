@@ -24,6 +24,24 @@ PATH_TEST_DATA = "data/test/"
 PATH_TEST_DATA_GLYPHS_FILES = f"{PATH_TEST_DATA}glyphs_files/"
 
 
+def _clear_font_indexes(values):
+    """Code-tests edit fonts in place between runs of a check. The name,
+    layout and component indexes of the TTFonts in `values` are built
+    again from what the fonts contain now."""
+    from fontTools.ttLib import TTFont
+    from fontbakery.glyphgraph import clear_component_graph
+    from fontbakery.layoutindex import clear_layout_index
+    from fontbakery.nameindex import clear_name_index
+
+    for value in values:
+        fonts = value if isinstance(value, (list, tuple)) else [value]
+        for font in fonts:
+            if isinstance(font, TTFont):
+                clear_name_index(font)
+                clear_layout_index(font)
+                clear_component_graph(font)
+
+
 class CheckTester:
     """
     This class offers a bit of automation to aid in the implementation of
@@ -136,6 +154,8 @@ class CheckTester:
             else:
                 values = {}
 
+        _clear_font_indexes(list(values.values())
+                            + list(condition_overrides.values()))
         self.runner = CheckRunner(self.profile,
                                   values,
                                   Configuration(explicit_checks=[self.check_id], full_lists=True))
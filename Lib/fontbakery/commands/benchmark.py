@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# usage:
+# $ fontbakery benchmark -o baseline.json
+# $ fontbakery benchmark -b baseline.json
+# $ fontbakery benchmark --scale glyphs=1000,4000,16000 --font composite-depth=2
+# $ fontbakery benchmark --startup -p universal -p googlefonts
+import argparse
+import sys
+
+from fontbakery.benchmark import (DEFAULT_MIN_MEMORY,
+                                  DEFAULT_MIN_TIME,
+                                  DEFAULT_PROFILES,
+                                  DEFAULT_THRESHOLD,
+                                  STARTUP_BUDGET,
+                                  SUPERLINEAR,
+                                  compare,
+                                  growth,
+                                  load_results,
+                                  measure_startup,
+                                  run_benchmark,
+                                  run_scaling_benchmark,
+                                  save_results)
+
+description = "Run the checks of the profiles over the test fonts and measure" \
+              " the wall time and the memory peak of each check and condition." \
+              " The results can be saved as a baseline, and a later run" \
+              " compared to it fails if a check or a condition regressed." \
+              " With --scale, the checks are run over synthetic fonts of" \
+              " growing size instead, to show how their runtime scales." \
+              " With --startup, the time `--list-checks` takes is measured" \
+              " instead and compared to a budget."
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument('paths', nargs='*', default=['data/test'],
+                    help="Font files or directories with font families"
+                         " (default: data/test)")
+parser.add_argument('-p', '--profile', action='append', dest='profiles',
+                    choices=DEFAULT_PROFILES,
+                    help="Profile to benchmark, can be used multiple times"
+                         f" (default: {', '.join(DEFAULT_PROFILES)})")
+parser.add_argument('-c', '--checkid', action='append',
+                    help="Explicit check-ids (or parts of their name) to be executed.")
+parser.add_argument('-x', '--exclude-checkid', action='append',
+                    help="Exclude check-ids (or parts of their name) from execution.")
+parser.add_argument('-r', '--repeat', type=int, default=1,
+                    help="Run the checks this many times and keep the best"
+                         " measurements (default: 1)")
+parser.add_argument('--no-memory', action='store_true',
+                    help="Don't measure the memory peaks, tracemalloc slows"
+                         " the checks down.")
+parser.add_argument('--online', action='store_true',
+                    help="Allow the checks to access the network. By default"
+                         " they are run offline, network access makes the"
+                         " timings unreliable.")
+parser.add_argument('-o', '--output', metavar='FILE',
+                    help="Save the results as JSON to FILE.")
+parser.add_argument('-b', '--baseline', metavar='FILE',
+                    help="Compare the results to the baseline saved in FILE"
+                         " and exit with an error if something regressed.")
+parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                    help="Relative growth of a measurement that is a"
+                         f" regression (default: {DEFAULT_THRESHOLD})")
+parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                    help="Time growth in seconds that is ignored as noise,"
+                         " with --scale the checks and conditions that take"
+                         f" less aren't listed (default: {DEFAULT_MIN_TIME})")
+parser.add_argument('--min-memory', type=int, default=DEFAULT_MIN_MEMORY,
+                    help="Memory growth in bytes that is ignored as noise"
+                         f" (default: {DEFAULT_MIN_MEMORY})")
+parser.add_argument('--scale', metavar='PARAMETER=VALUES',
+                    help="Run the checks over synthetic fonts, one for each"
+                         " of the comma separated values of a parameter of"
+                         " `fontbakery generate-font`, e.g. glyphs=1000,4000,16000")
+parser.add_argument('--font', metavar='PARAMETER=VALUE', action='append',
+                    default=[],
+                    help="Fixed parameter of the synthetic fonts of --scale,"
+                         " can be used multiple times, e.g. composite-depth=2")
+parser.add_argument('--font-dir', metavar='DIR',
+                    help="Keep the synthetic fonts of --scale in DIR and reuse"
+                         " them in later runs (default: a temporary directory)")
+parser.add_argument('--startup', action='store_true',
+                    help="Measure the startup, i.e. `fontbakery check-PROFILE"
+                         " --list-checks`, and exit with an error if a profile"
+                         " exceeds the budget of --startup-budget.")
+parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET,
+                    help="Seconds the startup of a profile may take, not"
+                         " counting the startup of the interpreter"
+                         f" (default: {STARTUP_BUDGET})")
+parser.add_argument('-n', '--top', type=int, default=10,
+                    help="Number of the slowest checks and conditions to list"
+                         " per profile (default: 10)")
+
+
+def _format_value(metric, value):
+    if metric == 'memory':
+        return f"{value / 1024 / 1024:.1f} MiB"
+    return f"{value:.3f} s"
+
+
+def _print_summary(results, top):
+    for name, profile_results in results["profiles"].items():
+        print(f"{name}: {profile_results['fonts']} fonts in"
+              f" {profile_results['families']} families")
+        for kind in ("checks", "conditions"):
+            records = profile_results[kind]
+            total = sum(record["wall"] for record in records.values())
+            print(f"  {len(records)} {kind}, {total:.2f} s")
+            slowest = sorted(records.items(),
+                             key=lambda item: item[1]["wall"],
+                             reverse=True)[:top]
+            for record_name, record in slowest:
+                memory = ""
+                if "memory" in record:
+                    memory = f", {_format_value('memory', record['memory'])}"
+                print(f"    {record['wall']:8.3f} s{memory}  {record_name}")
+
+
+def _parse_parameter(setting, values=False):
+    name, _, value = setting.partition('=')
+    try:
+        if values:
+            return name.replace('-', '_'), [int(v) for v in value.split(',')]
+        return name.replace('-', '_'), int(value)
+    except ValueError:
+        parser.error(f'Bad synthetic font parameter "{setting}".')
+
+
+def _print_scaling(results, top, min_time):
+    values = results["values"]
+    print(f"Scaling with {results['parameter']}:"
+          f" {', '.join(str(value) for value in values)}")
+    for name, profile_results in results["profiles"].items():
+        print(f"{name}:")
+        for kind in ("checks", "conditions"):
+            rows = []
+            for record_name, records in profile_results[kind].items():
+                times = [record["wall"] if record else 0.0 for record in records]
+                if max(times) < min_time:
+                    continue
+                rows.append((growth(values, times), times, record_name))
+            rows.sort(key=lambda row: -1 if row[0] is None else row[0], reverse=True)
+            print(f"  {kind}, by growth exponent (time ~ {results['parameter']}^k):")
+            for exponent, times, record_name in rows[:top]:
+                flag = "!" if exponent is not None and exponent >= SUPERLINEAR else " "
+                exponent = "    ?" if exponent is None else f"{exponent:5.2f}"
+                series = " ".join(f"{time:8.3f}" for time in times)
+                print(f"   {flag}{exponent}  {series}  {record_name}")
+
+
+def _run_startup(profiles, budget, repeat):
+    over_budget = []
+    for name in profiles:
+        seconds = measure_startup(name, repeat=max(3, repeat))["seconds"]
+        print(f"{seconds:8.3f} s  check-{name.replace('_', '-')} --list-checks")
+        if seconds > budget:
+            over_budget.append(name)
+    if over_budget:
+        print(f"{len(over_budget)} profiles exceeded the startup budget"
+              f" of {budget:g} seconds: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+def main():
+    args = parser.parse_args()
+    if args.scale and args.baseline:
+        parser.error("--baseline can't be used with --scale.")
+    if args.startup:
+        _run_startup(args.profiles or DEFAULT_PROFILES, args.startup_budget, args.repeat)
+        return
+    from fontbakery.configuration import Configuration
+    from fontbakery import network
+
+    if not args.online:
+        network.configure(offline=True)
+    baseline = load_results(args.baseline) if args.baseline else None
+    if baseline and baseline["meta"].get("trace_memory") == args.no_memory:
+        print("Warning: the memory was measured in only one of the baseline"
+              " and this run, the timings aren't comparable.",
+              file=sys.stderr)
+
+    config = Configuration(explicit_checks=args.checkid,
+                           exclude_checks=args.exclude_checkid,
+                           full_lists=True)
+    if args.scale:
+        parameter, values = _parse_parameter(args.scale, values=True)
+        try:
+            results = run_scaling_benchmark(args.profiles or DEFAULT_PROFILES,
+                                            parameter,
+                                            values,
+                                            dict(map(_parse_parameter, args.font)),
+                                            config=config,
+                                            trace_memory=not args.no_memory,
+                                            repeat=args.repeat,
+                                            directory=args.font_dir)
+        except ValueError as e:
+            parser.error(str(e))
+        _print_scaling(results, args.top, args.min_time)
+        if args.output:
+            save_results(results, args.output)
+            print(f'Saved "{args.output}"')
+        return
+
+    results = run_benchmark(args.profiles or DEFAULT_PROFILES,
+                            args.paths,
+                            config=config,
+                            trace_memory=not args.no_memory,
+                            repeat=args.repeat)
+    _print_summary(results, args.top)
+    if args.output:
+        save_results(results, args.output)
+        print(f'Saved "{args.output}"')
+    if baseline is None:
+        return
+
+    regressions = compare(results, baseline,
+                          threshold=args.threshold,
+                          min_time=args.min_time,
+                          min_memory=args.min_memory)
+    if not regressions:
+        print("No regressions compared to the baseline.")
+        return
+    print(f"{len(regressions)} regressions compared to the baseline:")
+    for regression in regressions:
+        metric = regression["metric"]
+        print(f"  {regression['profile']} {regression['kind'][:-1]}"
+              f" {regression['name']}: {metric}"
+              f" {_format_value(metric, regression['baseline'])}"
+              f" -> {_format_value(metric, regression['value'])}")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
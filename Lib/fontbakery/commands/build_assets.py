@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# usage:
+# $ fontbakery build-assets
+import argparse
+
+from fontbakery.assets import ASSETS_DIR, build_assets
+
+description = "Compile the data assets of fontbakery (glyph contour counts," \
+              " registered vendor IDs, Google Fonts axis registry) into" \
+              " the binary tables that are loaded by the checks. Run it" \
+              " after updating one of their sources."
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument('-o', '--output-dir', default=ASSETS_DIR,
+                    help=f"Directory to write the tables to (default: {ASSETS_DIR})")
+
+
+def main():
+    args = parser.parse_args()
+    for path in build_assets(args.output_dir):
+        print(f'Saved "{path}"')
+
+
+if __name__ == '__main__':
+    main()
@@ -19,18 +19,17 @@ from fontbakery.checkrunner import (
             , PASS
             , FAIL
             , SECTIONSUMMARY
+            , get_peak_memory
             )
+from fontbakery.cache import (PersistentCache,
+                              DEFAULT_CACHE_SIZE,
+                              get_default_cache_dir)
 from fontbakery.configuration import Configuration
+from fontbakery.instrumentation import TimingHistory
 from fontbakery.profile import (Profile, get_module_profile)
 
-from fontbakery.errors import ValueValidationError
-from fontbakery.multiproc import multiprocessing_runner
-from fontbakery.reporters.terminal import TerminalReporter
-from fontbakery.reporters.serialize import SerializeReporter
-from fontbakery.reporters.badge import BadgeReporter
-from fontbakery.reporters.ghmarkdown import GHMarkdownReporter
-from fontbakery.reporters.html import HTMLReporter
-from fontbakery.utils import get_theme
+from fontbakery.errors import SetupError, ValueValidationError
+from fontbakery.utils import get_theme, filesize_formatting
 
 
 log_levels =  OrderedDict((s.name, s) \
@@ -49,6 +48,7 @@ DEFAULT_LOG_LEVEL = INFO
 
 class AddReporterAction(argparse.Action):
      def __init__(self, option_strings, dest, nargs=None, **kwargs):
+        # "module:ClassName", the module is only imported if the option is used.
         self.cls = kwargs["cls"]
         del kwargs["cls"]
         super().__init__(option_strings, dest, **kwargs)
@@ -56,7 +56,9 @@ class AddReporterAction(argparse.Action):
      def __call__(self, parser, namespace, values, option_string=None):
         if not hasattr(namespace, "reporters"):
             namespace.reporters = []
-        namespace.reporters.append((self.cls, values))
+        module_name, class_name = self.cls.split(":")
+        cls = getattr(import_module(module_name), class_name)
+        namespace.reporters.append((cls, values))
 
 
 def ArgumentParser(profile, profile_arg=True):
@@ -155,19 +157,25 @@ def ArgumentParser(profile, profile_arg=True):
     argument_parser.add_argument('--light-theme', default=False, action='store_true',
                                  help='Use a color theme with light colors.')
 
-    argument_parser.add_argument('--json', default=False, action=AddReporterAction, cls=SerializeReporter,
+    argument_parser.add_argument('--json', default=False, action=AddReporterAction, cls='fontbakery.reporters.serialize:SerializeReporter',
                                  metavar= 'JSON_FILE',
                                  help='Write a json formatted report to JSON_FILE.')
 
-    argument_parser.add_argument('--badges', default=False, action=AddReporterAction, cls=BadgeReporter,
+    argument_parser.add_argument('--jsonl', default=False, action=AddReporterAction, cls='fontbakery.reporters.jsonl:JSONLinesReporter',
+                                 metavar= 'JSONL_FILE',
+                                 help='Write a JSON Lines report to JSONL_FILE while the checks run,\n'
+                                      'one line per check result. `fontbakery jsonl-to-json`\n'
+                                      'converts it into the format of --json.')
+
+    argument_parser.add_argument('--badges', default=False, action=AddReporterAction, cls='fontbakery.reporters.badge:BadgeReporter',
                                  metavar= 'DIRECTORY',
                                  help='Write a set of shields.io badge files to DIRECTORY.')
 
-    argument_parser.add_argument('--ghmarkdown', default=False, action=AddReporterAction, cls=GHMarkdownReporter,
+    argument_parser.add_argument('--ghmarkdown', default=False, action=AddReporterAction, cls='fontbakery.reporters.ghmarkdown:GHMarkdownReporter',
                                  metavar= 'MD_FILE',
                                  help='Write a GitHub-Markdown formatted report to MD_FILE.')
 
-    argument_parser.add_argument('--html', default=False,action=AddReporterAction, cls=HTMLReporter,
+    argument_parser.add_argument('--html', default=False,action=AddReporterAction, cls='fontbakery.reporters.html:HTMLReporter',
                                  metavar= 'HTML_FILE',
                                  help='Write a HTML report to HTML_FILE.')
 
@@ -209,6 +217,54 @@ def ArgumentParser(profile, profile_arg=True):
             raise argparse.ArgumentTypeError(f'Invalid value "{value}" must be'
                                              f' zero or a positive integer value.')
         return int_value
+
+    argument_parser.add_argument('--cache-dir', default=None,
+                                 metavar='DIRECTORY',
+                                 help=f'Persist the results of conditions in DIRECTORY and reuse them\n'
+                                      f'in later runs, as long as the input files did not change.\n'
+                                      f'The usual location is: {get_default_cache_dir()}')
+    argument_parser.add_argument('--cache-size', default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+                                 type=positive_int, metavar='MEGABYTES',
+                                 help=f'Maximum size of the --cache-dir directory, shared by the\n'
+                                      f'condition and the --incremental result caches. The least\n'
+                                      f'recently used entries are removed first. (default %(default)s)')
+    argument_parser.add_argument('--incremental', default=False, action='store_true',
+                                 help=f'Also memoize check results in the --cache-dir directory\n'
+                                      f'(or the usual location, if not set) and only run the\n'
+                                      f'checks whose inputs changed since an earlier run.\n'
+                                      f'All other results are replayed from the cache.')
+    argument_parser.add_argument('--http-cache', default=None, nargs='?', const='1',
+                                 metavar='DIRECTORY',
+                                 help=f'Store the responses of network requests in DIRECTORY and\n'
+                                      f'reuse them in later runs, as long as the server considers\n'
+                                      f'them fresh or unchanged.\n'
+                                      f'The usual location is: {get_default_cache_dir()}')
+    argument_parser.add_argument('--offline', default=False, action='store_true',
+                                 help='Serve all network requests from the --http-cache directory\n'
+                                      '(or the usual location, if not set). Requests that are not\n'
+                                      'cached fail as if there was no network connection.')
+    argument_parser.add_argument('--keep-conditions', default=False, action='store_true',
+                                 help=f'Keep all condition values in memory until the end of the run.\n'
+                                      f'By default, they are released as soon as no remaining check\n'
+                                      f'needs them anymore, which keeps the memory usage low.')
+    argument_parser.add_argument('--memory-stats', default=False, action='store_true',
+                                 help='Print the peak memory usage after the run.')
+    argument_parser.add_argument('--timeout', default=None, type=float, metavar='SECONDS',
+                                 help='Abort check executions that take longer than SECONDS\n'
+                                      'and report them as ERROR. Can also be configured per check\n'
+                                      'id with the "timeout" key in the configuration file.')
+    argument_parser.add_argument('--timings', default=0, type=positive_int, metavar='N',
+                                 help='Print the N slowest check executions and conditions after\n'
+                                      'the run. The timings of all check executions are also\n'
+                                      'included in the JSON report.')
+    argument_parser.add_argument('--timing-history', default=None, metavar='FILE',
+                                 help='Estimates of the check durations for -J/--jobs, so that the\n'
+                                      'slowest check executions are started first. FILE is updated\n'
+                                      'with the timings of this run. A JSON report (see --json) of\n'
+                                      'an earlier run can be used as well, but is not updated.')
+    argument_parser.add_argument('--trace-memory', default=False, action='store_true',
+                                 help='Measure the peak memory allocated by each check execution\n'
+                                      'and condition, using tracemalloc. Slows down the run.')
     argument_parser.add_argument('-J','--jobs', default=0, type=positive_int,
                                  metavar='JOBS', dest='multiprocessing',
                                  help=f'Use multi-processing to run the checks. The argument is the number\n'
@@ -221,6 +277,10 @@ def ArgumentParser(profile, profile_arg=True):
                                  help='Use the auto detected cpu count (= %(const)s)'
                                       ' as number of worker processes\n'
                                       'in multi-processing. This is equivalent to : `--jobs %(const)s`')
+    argument_parser.add_argument('--coordinator', default=None, metavar='HOST:PORT',
+                                 help=f'Run the checks on the machines that connect to HOST:PORT\n'
+                                      f'with `fontbakery worker HOST:PORT`. The shared secret of the\n'
+                                      f'coordinator and its workers is read from FONTBAKERY_AUTHKEY.')
     return argument_parser, values_keys
 
 
@@ -298,9 +358,26 @@ def main(profile=None, values=None):
         custom_order=args.order,
         explicit_checks=args.checkid,
         exclude_checks=args.exclude_checkid,
-        full_lists=args.full_lists
+        full_lists=args.full_lists,
+        timeout=args.timeout
     ))
-    runner_kwds = dict(values=values_, config=configuration)
+    if args.http_cache or args.offline:
+        from fontbakery.network import configure
+        configure(http_cache=args.http_cache, offline=args.offline)
+
+    runner_kwds = dict(values=values_,
+                       config=configuration,
+                       release_conditions=not args.keep_conditions,
+                       trace_memory=args.trace_memory)
+    if args.cache_dir or args.incremental:
+        cache_size = args.cache_size * 1024 * 1024
+        if args.incremental:
+            # The conditions and results namespaces share the budget.
+            cache_size //= 2
+        cache = PersistentCache(args.cache_dir or get_default_cache_dir(), cache_size)
+        runner_kwds['condition_cache'] = cache
+        if args.incremental:
+            runner_kwds['result_cache'] = cache.with_namespace('results')
     try:
         runner = CheckRunner(profile, **runner_kwds)
     except ValueValidationError as e:
@@ -308,7 +385,19 @@ def main(profile=None, values=None):
         argument_parser.print_usage()
         sys.exit(1)
 
-    is_async = args.multiprocessing != 0
+    if args.coordinator and args.multiprocessing:
+        argument_parser.error('--coordinator can not be combined with -J/--jobs.')
+    if args.coordinator:
+        from fontbakery.distributed import get_authkey, parse_address
+        try:
+            parse_address(args.coordinator)
+            get_authkey()
+        except (ValueError, SetupError) as e:
+            argument_parser.error(str(e))
+
+    is_async = args.multiprocessing != 0 or args.coordinator is not None
+
+    from fontbakery.reporters.terminal import TerminalReporter
 
     tr = TerminalReporter(runner=runner, is_async=is_async
                          , print_progress=not args.no_progress
@@ -332,20 +421,82 @@ def main(profile=None, values=None):
                              output_file=output_file
                          ))
 
-    if args.multiprocessing == 0:
+    timing_history = None
+    update_timing_history = False
+    if args.timing_history:
+        timing_history = TimingHistory()
+        if os.path.exists(args.timing_history):
+            update_timing_history = timing_history.load(args.timing_history)
+        else:
+            update_timing_history = True
+
+    if args.coordinator:
+        from fontbakery.distributed import distributed_runner
+        status_generator = distributed_runner(args.coordinator, runner, runner_kwds,
+                                              timing_history=timing_history,
+                                              log=lambda message: print(message, file=sys.stderr))
+    elif args.multiprocessing == 0:
         status_generator = runner.run()
     else:
-        status_generator = multiprocessing_runner(args.multiprocessing, runner, runner_kwds)
+        from fontbakery.multiproc import multiprocessing_runner
+        status_generator = multiprocessing_runner(args.multiprocessing, runner, runner_kwds,
+                                                  timing_history=timing_history)
 
     distribute_generator(status_generator, [reporter.receive for reporter in reporters])
 
     for reporter in reporters:
         reporter.write()
 
+    if args.memory_stats:
+        print_memory_stats(runner, args.multiprocessing or args.coordinator)
+
+    if update_timing_history:
+        timing_history.update(runner)
+        timing_history.save(args.timing_history)
+
+    if args.timings:
+        print_timings(runner, args.timings)
+
     # Fail and error let the command fail
     return 1 if tr.worst_check_status in (ERROR, FAIL) else 0
 
 
+def print_memory_stats(runner, multiprocessing):
+    peak = get_peak_memory()
+    if peak is None:
+        print('Peak memory usage: (not available on this platform)')
+    else:
+        print(f'Peak memory usage: {filesize_formatting(peak)}'
+              + (' (of the biggest process)' if multiprocessing else ''))
+    if not multiprocessing:
+        print(f'Maximum number of condition values held in memory:'
+              f' {runner.max_cached_conditions}')
+
+
+def print_timings(runner, count):
+    def describe(iterargs):
+        return ', '.join(f'{name}: {os.path.basename(str(runner.get_iterarg(name, index)))}'
+                         for name, index in iterargs)
+
+    def measurements(record):
+        text = f'{record["wall"]:8.3f}s  (CPU {record["cpu"]:.3f}s'
+        if 'memory' in record:
+            text += f', memory {filesize_formatting(record["memory"])}'
+        return text + ')'
+
+    slowest_checks, slowest_conditions = runner.instrumentation.get_slowest(count)
+    print(f'\nSlowest check executions (including the conditions they triggered first):')
+    for (_, check_id, iterargs), record in slowest_checks:
+        print('  '.join(filter(None, ['', measurements(record), check_id,
+                                      describe(iterargs)])))
+    print(f'\nSlowest conditions:')
+    for (name, iterargs), record in slowest_conditions:
+        _, check_id, _ = record['check'] or (None, '(no check)', None)
+        print('  '.join(filter(None, ['', measurements(record), name,
+                                      describe(iterargs),
+                                      f'(first needed by {check_id})'])))
+
+
 def list_checks(profile, theme, verbose=False):
     if verbose:
         for section in profile._sections.values():
@@ -0,0 +1,8 @@
+#!/usr/bin/env python
+# usage:
+# $ fontbakery daemon &
+# $ FONTBAKERY_DAEMON=1 fontbakery check-googlefonts font.ttf
+from fontbakery.daemon import main
+
+if __name__ == "__main__":
+    main()
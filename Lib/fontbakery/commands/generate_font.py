@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# usage:
+# $ fontbakery generate-font --glyphs 65535 --composite-depth 3 -o CJK.ttf
+import argparse
+
+from fontbakery.synthetic import PARAMETERS, build_font, font_filename
+
+description = "Generate a synthetic font of parameterized size (glyphs," \
+              " composite depth, kerning classes, GSUB lookups, axes and" \
+              " masters) to benchmark the checks on large fonts. See also" \
+              " `fontbakery benchmark --scale`."
+parser = argparse.ArgumentParser(description=description)
+for name, parameter in PARAMETERS.items():
+    parser.add_argument(f"--{name.replace('_', '-')}", type=int,
+                        default=parameter.default,
+                        help=f"(default: {parameter.default},"
+                             f" maximum: {parameter.maximum})")
+parser.add_argument('-o', '--output',
+                    help="File to save the font to (default: a name made"
+                         " of the parameters, in the current directory)")
+
+
+def main():
+    args = parser.parse_args()
+    parameters = {name: getattr(args, name) for name in PARAMETERS}
+    try:
+        font = build_font(**parameters)
+    except ValueError as e:
+        parser.error(str(e))
+    output = args.output or font_filename(parameters)
+    font.save(output)
+    print(f'Saved "{output}"')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# usage:
+# $ fontbakery check-googlefonts --jsonl report.jsonl font.ttf
+# $ fontbakery jsonl-to-json report.jsonl report.json
+import argparse
+import json
+
+from fontbakery.reporters.jsonl import build_document, iter_records
+
+description = "Convert a JSON Lines report (see --jsonl) into the JSON" \
+              " report format of --json. Reports of interrupted runs" \
+              " can be converted as well."
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument('input', metavar='JSONL_FILE', help="JSON Lines report")
+parser.add_argument('output', metavar='JSON_FILE', help="JSON report to write")
+
+
+def main():
+    args = parser.parse_args()
+    with open(args.input) as fh:
+        doc = build_document(iter_records(fh))
+    with open(args.output, "w") as fh:
+        json.dump(doc, fh, sort_keys=True, indent=4)
+    print(f'A report in JSON format has been saved to "{args.output}"')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+#!/usr/bin/env python
+# usage:
+# $ FONTBAKERY_AUTHKEY=secret fontbakery worker coordinator:9090
+# $ FONTBAKERY_AUTHKEY=secret fontbakery check-googlefonts --coordinator 0.0.0.0:9090 font.ttf
+from fontbakery.distributed import main
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,3 @@
-import toml
-import yaml
-
-
 class Configuration(dict):
     def __init__(self, **kwargs):
         super().__init__(kwargs)
@@ -14,6 +10,8 @@ class Configuration(dict):
 
     @classmethod
     def from_config_file(cls, filename):
+        import toml
+        import yaml
         try:
             config = toml.load(filename)
         except toml.TomlDecodeError:
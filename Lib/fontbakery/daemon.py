@@ -0,0 +1,342 @@
+"""
+Keep Font Bakery warm between invocations.
+
+The daemon imports the command line interface and the profiles once and
+keeps a pool of pre-forked processes ready. Each of them serves exactly
+one run and is replaced by a fresh fork afterwards, so no state leaks
+from one run into the next:
+
+    $ fontbakery daemon &
+    $ export FONTBAKERY_DAEMON=1
+    $ fontbakery check-googlefonts font.ttf
+
+With FONTBAKERY_DAEMON set (to 1 or to the path of the socket) the
+`fontbakery` command becomes a thin client: it sends its arguments,
+working directory and environment to the daemon and passes its own
+stdin/stdout/stderr along, so the run behaves as if it was local (e.g.
+colors and the progress bar). If the daemon is not reachable, the run
+is executed locally. When the client goes away before the run is done,
+e.g. on Ctrl-C, the run is interrupted.
+
+Only the user who started the daemon may use it: the socket is in a
+directory that only they can access, and clients authenticate with the key
+stored next to the socket, readable only by them.
+
+This module is imported by `fontbakery.cli` before anything else, keep
+the imports at the module level light.
+"""
+import argparse
+import os
+import signal
+import stat
+import sys
+import time
+import traceback
+
+DAEMON_ENV = "FONTBAKERY_DAEMON"
+DEFAULT_WORKERS = 2
+# seconds between two looks of the daemon for workers that are done
+POLL_INTERVAL = 0.1
+
+
+def get_default_socket_path():
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    # A directory of its own, the caches of fontbakery/ are not private.
+    return os.path.join(base, "fontbakery", "daemon", "daemon.sock")
+
+
+def get_authkey_path(socket_path):
+    return socket_path + ".key"
+
+
+def _read_authkey(socket_path):
+    """The key to authenticate with the daemon at socket_path, None if
+    there is none the current user may read."""
+    try:
+        with open(get_authkey_path(socket_path), "rb") as fh:
+            return fh.read() or None
+    except OSError:
+        return None
+
+
+def get_socket_path(value=None):
+    """The socket path configured by `value` or by the FONTBAKERY_DAEMON
+    environment variable, None if the daemon should not be used."""
+    if value is None:
+        value = os.environ.get(DAEMON_ENV)
+    if value in (None, "", "0"):
+        return None
+    if value == "1":
+        return get_default_socket_path()
+    return value
+
+
+def is_supported():
+    return hasattr(os, "fork") and hasattr(signal, "SIGCHLD")
+
+
+###############
+# THIN CLIENT #
+###############
+
+
+def submit(argv, socket_path):
+    """Run `fontbakery *argv` in the daemon listening at socket_path.
+
+    Returns the exit code of the run or None if the daemon is not
+    reachable.
+    """
+    # pylint: disable=import-outside-toplevel
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client
+    from multiprocessing.reduction import send_handle
+
+    if not is_supported() or not os.path.exists(socket_path):
+        return None
+    authkey = _read_authkey(socket_path)
+    if authkey is None:
+        return None
+    try:
+        connection = Client(socket_path, family="AF_UNIX", authkey=authkey)
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    with connection:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        connection.send(
+            {"argv": list(argv), "cwd": os.getcwd(), "env": dict(os.environ)}
+        )
+        for fd in (0, 1, 2):
+            send_handle(connection, fd, None)
+        # On Ctrl-C, KeyboardInterrupt leaves this block and closes the
+        # connection, which interrupts the run in the daemon.
+        try:
+            return connection.recv()
+        except EOFError:
+            print(
+                "The fontbakery daemon terminated unexpectedly.", file=sys.stderr
+            )
+            return 1
+
+
+##########
+# DAEMON #
+##########
+
+
+def _preload(profiles):
+    # pylint: disable=import-outside-toplevel
+    from importlib import import_module
+    from fontbakery.cli import CLI_PROFILES
+
+    import_module("fontbakery.commands.check_profile")
+    for name in profiles or CLI_PROFILES:
+        try:
+            import_module(f"fontbakery.profiles.{name}")
+        except Exception as e:  # pylint: disable=broad-except
+            # e.g. a missing optional dependency, the run will report it.
+            print(f"Could not preload profile '{name}': {e}", file=sys.stderr)
+
+
+def _watch_client(connection, done):
+    """Interrupts the run, i.e. the process group of the worker, if the
+    client goes away before it is done."""
+    try:
+        connection.recv()  # The client sends nothing more.
+    except (EOFError, OSError):
+        pass
+    if not done.is_set():
+        os.killpg(os.getpgrp(), signal.SIGINT)
+
+
+def _serve_request(connection, request):
+    # pylint: disable=import-outside-toplevel
+    import threading
+    from multiprocessing.reduction import recv_handle
+    from fontbakery import cli
+
+    fds = [recv_handle(connection) for _ in range(3)]
+    done = threading.Event()
+    threading.Thread(target=_watch_client, args=(connection, done),
+                     daemon=True).start()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    # This process must not submit to the daemon itself.
+    os.environ.pop(DAEMON_ENV, None)
+    sys.argv = ["fontbakery"] + request["argv"]
+    try:
+        cli.main()
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:  # pylint: disable=broad-except
+        traceback.print_exc()
+        code = 1
+    finally:
+        done.set()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return code
+
+
+def _worker(listener):
+    """Runs in a pre-forked child, serves one request."""
+    from multiprocessing import AuthenticationError  # pylint: disable=import-outside-toplevel
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # A process group of its own, shared with the processes of a
+    # multiprocessing run, to interrupt all of them at once.
+    os.setpgrp()
+    code = 1
+    try:
+        connection = listener.accept()
+        with connection:
+            request = connection.recv()
+            print(f"Serving (pid {os.getpid()}): fontbakery "
+                  f"{' '.join(request['argv'])}", flush=True)
+            code = _serve_request(connection, request)
+            connection.send(code)
+    except (EOFError, OSError, AuthenticationError):
+        # The client went away, or did not have the key.
+        pass
+    except BaseException:  # pylint: disable=broad-except
+        traceback.print_exc()
+    finally:
+        os._exit(code)  # pylint: disable=protected-access
+
+
+def _is_listening(socket_path):
+    from multiprocessing.connection import Client  # pylint: disable=import-outside-toplevel
+    try:
+        Client(socket_path, family="AF_UNIX").close()
+        return True
+    except OSError:
+        return False
+
+
+def _check_private_directory(directory):
+    """Exits unless only the current user can access `directory`."""
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        sys.exit(f"Refusing to serve: the directory of the socket, {directory},"
+                 f" must be owned by the current user and have mode 0700"
+                 f" (owner {info.st_uid}, mode {stat.S_IMODE(info.st_mode):o}).")
+
+
+def _write_authkey(socket_path):
+    authkey = os.urandom(32)
+    path = get_authkey_path(socket_path)
+    if os.path.lexists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(authkey)
+    return authkey
+
+
+def serve(socket_path, workers=DEFAULT_WORKERS, profiles=None):
+    from multiprocessing.connection import Listener  # pylint: disable=import-outside-toplevel
+    if not is_supported():
+        sys.exit("The fontbakery daemon is not supported on this platform.")
+
+    socket_path = os.path.abspath(socket_path)
+    directory = os.path.dirname(socket_path)
+    # Only the current user may connect.
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_private_directory(directory)
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            sys.exit(f"A fontbakery daemon is already listening at {socket_path}.")
+        os.unlink(socket_path)
+
+    _preload(profiles)
+    umask = os.umask(0o077)
+    try:
+        authkey = _write_authkey(socket_path)
+        listener = Listener(socket_path, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+    print(f"Listening at {socket_path} with {workers} pre-forked workers.")
+    sys.stdout.flush()
+
+    # terminate the workers, too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    children = set()
+    try:
+        while True:
+            while len(children) < workers:
+                pid = os.fork()
+                if pid == 0:
+                    _worker(listener)
+                children.add(pid)
+            # Not a blocking os.wait(): a SIGTERM that arrives right
+            # before it would not interrupt it.
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                children.discard(pid)
+            else:
+                time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            # The worker and its process group, see _worker (a fresh
+            # fork may not have a group of its own yet).
+            for kill in (os.kill, os.killpg):
+                try:
+                    kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass
+        listener.close()
+        try:
+            os.unlink(get_authkey_path(socket_path))
+        except OSError:
+            pass
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Keep profiles imported and a pool of pre-forked workers"
+        " ready, to speed up repeated fontbakery invocations. Set"
+        f" {DAEMON_ENV}=1 (or to the socket path) to use it."
+    )
+    parser.add_argument(
+        "--socket",
+        default=get_default_socket_path(),
+        help="Path of the Unix socket to listen at. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of pre-forked workers, i.e. of runs that can start"
+        " without delay at the same time. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profiles",
+        action="append",
+        help="Profile to preload, e.g. 'googlefonts'. Can be used several"
+        " times. (default: all profiles of the command line interface)",
+    )
+    args = parser.parse_args(args)
+    serve(args.socket, max(1, args.workers), args.profiles)
+
+
+if __name__ == "__main__":
+    main()
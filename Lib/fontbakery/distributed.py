@@ -0,0 +1,686 @@
+"""
+Font Bakery distributed runs the check executions of one run on worker
+processes of several machines, connected over TCP:
+
+    worker-1$ FONTBAKERY_AUTHKEY=secret fontbakery worker coordinator:9090
+    worker-2$ FONTBAKERY_AUTHKEY=secret fontbakery worker coordinator:9090
+    coordinator$ FONTBAKERY_AUTHKEY=secret fontbakery check-googlefonts \\
+                     --coordinator 0.0.0.0:9090 fonts/*/*.ttf
+
+The coordinator drives the session protocol, like the multiprocessing
+runner, so all reporters work as usual. Workers register, receive the
+input files, then batches of check executions (indexes into the
+execution order, see multiproc) and stream their results back.
+
+Input files are the values of the run that are paths of existing files,
+plus the files next to them that the profile declares in its
+`auxiliary_files` (e.g. metadata that the checks read as well). Nothing
+else is sent: checks that look further, e.g. into parent directories or
+the git repository of a font, don't find those files on the workers.
+Workers keep the input files in a content addressed store, files they
+received in an earlier run are not sent again, and recreate them with
+the same absolute paths below a temporary directory.
+
+A worker that disconnects or stops sending heartbeats is lost, its
+unfinished check executions are assigned to the other workers. The check
+execution that was running on MAX_ATTEMPTS lost workers is reported as
+ERROR instead of being tried again.
+
+Connections are authenticated with the shared secret in FONTBAKERY_AUTHKEY
+(see multiprocessing.connection). Messages are pickled, only connect
+coordinators and workers in a network you trust.
+
+Separation of Concerns Disclaimer:
+While created specifically for checking fonts and font-families this
+module has no domain knowledge about fonts. It can be used for any kind
+of (document) checking. Please keep it so. It will be valuable for other
+domains as well.
+Domain specific knowledge should be encoded only in the Profile (Checks,
+Conditions) and MAYBE in *customized* reporters e.g. subclasses.
+"""
+import argparse
+from collections import deque
+from functools import partial
+import glob
+import math
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Listener, wait
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from fontbakery import __version__ as fontbakery_version
+from fontbakery.cache import (
+    DEFAULT_CACHE_SIZE,
+    PersistentCache,
+    get_default_cache_dir,
+    hash_file,
+)
+from fontbakery.checkrunner import (
+    ERROR,
+    CheckRunner,
+    drive_session_protocol,
+    get_profile_from_module_locator,
+    session_protocol_generator,
+)
+from fontbakery.errors import SetupError
+from fontbakery.message import Message
+from fontbakery.multiproc import (
+    IDLE,
+    WATCHDOG_GRACE,
+    WATCHDOG_INTERVAL,
+    WorkerToQueueReporter,
+    _canonical_order,
+    _status2index,
+    check_protocol_from_worker_data,
+    distribute_jobs,
+    encode_check_log,
+    get_order_digest,
+)
+
+AUTHKEY_ENV = "FONTBAKERY_AUTHKEY"
+# seconds between two status messages of a worker
+HEARTBEAT_INTERVAL = 5
+# A worker that sent nothing for this many seconds is lost.
+WORKER_TIMEOUT = 60
+MAX_ATTEMPTS = 2
+# Check executions are assigned to workers in units of about this many,
+# each worker has at least one unit in reserve.
+UNIT_SIZE = 64
+# Input files are sent in messages of about this many bytes.
+FILES_MESSAGE_SIZE = 32 * 1024 * 1024
+# seconds between two attempts of a worker to connect to a coordinator
+RECONNECT_INTERVAL = 5
+# Values that only make sense on the machine of the coordinator.
+LOCAL_RUNNER_KWDS = ("condition_cache", "result_cache")
+
+
+def parse_address(address):
+    """'HOST:PORT' -> (HOST, PORT)"""
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}', expected HOST:PORT.")
+    return host, int(port)
+
+
+def get_authkey():
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        raise SetupError(
+            f"The coordinator and its workers need a shared secret in the"
+            f" {AUTHKEY_ENV} environment variable."
+        )
+    return authkey.encode()
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_strings(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+
+
+def get_input_files(values, auxiliary_files=()):
+    """Returns {absolute path: sha256 digest} of the files a run with
+    `values` reads: values that are paths of existing files and, in the
+    directory of each of them, the files matching the glob patterns of
+    `auxiliary_files`."""
+    paths = set()
+    directories = set()
+    for value in _iter_strings(values):
+        if os.path.isfile(value):
+            path = os.path.abspath(value)
+            paths.add(path)
+            directories.add(os.path.dirname(path))
+    for directory in directories:
+        for pattern in auxiliary_files:
+            pattern = os.path.join(glob.escape(directory), pattern)
+            paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return {path: hash_file(path) for path in sorted(paths)}
+
+
+def _local_path(root, path):
+    return os.path.join(root, os.path.splitdrive(path)[1].lstrip(os.sep))
+
+
+def _rewrite_values(value, paths):
+    if isinstance(value, str):
+        return paths.get(value, value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_rewrite_values(item, paths) for item in value)
+    if isinstance(value, dict):
+        return {key: _rewrite_values(item, paths) for key, item in value.items()}
+    return value
+
+
+##########
+# WORKER #
+##########
+
+
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def _receive_files(connection, manifest, root, store):
+    """Recreates the files of manifest {path: digest} below root, taking
+    them from the store or, if missing there, from the coordinator."""
+    missing = {}
+    for path, digest in manifest.items():
+        hit, data = store.get(digest)
+        if hit:
+            _write_file(_local_path(root, path), data)
+        else:
+            missing.setdefault(digest, []).append(path)
+    connection.send(("need", list(missing)))
+    while missing:
+        _, files = connection.recv()
+        for digest, data in files.items():
+            store.set(digest, data)
+            for path in missing.pop(digest, ()):
+                _write_file(_local_path(root, path), data)
+
+
+def _make_encode_log(root, paths):
+    """encode_check_log, but messages refer to the paths of the
+    coordinator instead of the paths below root."""
+    replacements = sorted(
+        ((local, original) for original, local in paths.items()),
+        key=lambda item: -len(item[0]),
+    )
+
+    def restore(item):
+        if not isinstance(item, str) or root not in item:
+            return item
+        for local, original in replacements:
+            item = item.replace(local, original)
+        return item.replace(root, "")
+
+    def encode_log(status, message):
+        return tuple(restore(item) for item in encode_check_log(status, message))
+
+    return encode_log
+
+
+class _ResultsSender:
+    """The connection of the WorkerToQueueReporter of a remote worker. A
+    thread sends the status (running check execution and for how long)
+    in between, as a heartbeat."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        # [index of the running check execution or IDLE, time.monotonic() of its start]
+        self.status = [IDLE, 0]
+
+    def send(self, results):
+        with self._lock:
+            self._connection.send(("results", results))
+
+    def _heartbeat(self):
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            index, started = self.status
+            elapsed = time.monotonic() - started if index != IDLE else 0
+            try:
+                with self._lock:
+                    self._connection.send(("status", index, elapsed))
+            except OSError:
+                return
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+def _remote_jobs_generator(connection, runner, reporter, status):
+    pending = deque()
+    while True:
+        if not pending:
+            status[0] = IDLE
+            reporter.flush()
+            # Units are independent, their conditions are not needed anymore.
+            runner.clear_conditions()
+            message = connection.recv()
+            if message[0] == "done":
+                return
+            pending.extend(message[1])
+            # A unit can hold the jobs of several fonts, release the
+            # conditions of each of them when the unit is done with it.
+            runner.expect_checks([runner.order[index] for index in pending])
+            continue
+        index = pending.popleft()
+        status[1] = time.monotonic()
+        status[0] = index
+        yield runner.order[index]
+
+
+def _serve_session(connection, store, log):
+    connection.send(("hello", socket.gethostname(), os.getpid(), fontbakery_version))
+    message = connection.recv()
+    if message[0] != "setup":
+        log(f"Rejected by the coordinator: {message[1]}")
+        return
+    _, module_locator, runner_kwds, order_digest, manifest, originals = message
+    with tempfile.TemporaryDirectory(prefix="fontbakery-worker-") as root:
+        _receive_files(connection, manifest, root, store)
+        paths = {value: _local_path(root, path) for value, path in originals.items()}
+        runner_kwds = dict(
+            runner_kwds, values=_rewrite_values(runner_kwds["values"], paths)
+        )
+        try:
+            profile = get_profile_from_module_locator(module_locator)
+            runner = CheckRunner(profile, **runner_kwds)
+            if get_order_digest(runner.order) != order_digest:
+                raise SetupError(
+                    "The check execution order of the worker differs"
+                    " from the order of the coordinator."
+                )
+        except Exception as e:  # pylint: disable=broad-except
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+            raise
+        connection.send(("ready",))
+        log(f"Running {len(runner.order)} check executions.")
+
+        sender = _ResultsSender(connection)
+        reporter = WorkerToQueueReporter(
+            sender,
+            runner.order,
+            runner=runner,
+            encode_log=_make_encode_log(root, paths),
+        )
+        sender.start()
+        try:
+            runner.run_externally_controlled(
+                reporter.receive,
+                _remote_jobs_generator(connection, runner, reporter, sender.status),
+            )
+        finally:
+            sender.stop()
+
+
+def work(address, authkey, store, once=False, log=print):
+    """Connect to the coordinator at address and execute its checks. Unless
+    once is set, keep waiting for the next coordinator afterwards."""
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+        except (OSError, EOFError, AuthenticationError) as e:
+            if once:
+                raise
+            log(f"Waiting for a coordinator at {address[0]}:{address[1]} ({e}).")
+            time.sleep(RECONNECT_INTERVAL)
+            continue
+        with connection:
+            try:
+                _serve_session(connection, store, log)
+            except (OSError, EOFError):
+                log("Lost the connection to the coordinator.")
+        if once:
+            return
+
+
+###############
+# COORDINATOR #
+###############
+
+
+class _RemoteWorker:
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        # insertion ordered set of the assigned indexes without result
+        self.in_flight = {}
+        self.running = IDLE
+        self.running_since = 0
+        self.last_seen = time.monotonic()
+
+
+class Coordinator:
+    """Accepts workers at address and yields the results of the check
+    executions of `units` (lists of indexes into the order) in the format
+    of the WorkerToQueueReporter.
+
+    `setup` is a tuple (profile module locator, runner keywords, order
+    digest, {path: digest} of the input files, {value: path} of the
+    values that are input files).
+    """
+
+    def __init__(self, address, authkey, setup, units, get_timeout=None, log=None):
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        self._setup = setup
+        self._files = {digest: path for path, digest in setup[3].items()}
+        self._units = deque(units)
+        self.len_jobs = sum(len(unit) for unit in units)
+        self._get_timeout = get_timeout
+        self._log = log or (lambda message: None)
+        # index: number of lost workers that were running it
+        self._attempts = {}
+        self._completed = set()
+        # connection: _RemoteWorker
+        self._workers = {}
+        # registered by the accepting threads, not yet in self._workers
+        self._registered = []
+        self._lock = threading.Lock()
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._closed = False
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if self._closed:
+                    return
+                continue
+            if self._closed:
+                connection.close()
+                return
+            threading.Thread(
+                target=self._register, args=(connection,), daemon=True
+            ).start()
+
+    def _send_files(self, connection, digests):
+        files, size = {}, 0
+        for digest in digests:
+            with open(self._files[digest], "rb") as fh:
+                files[digest] = fh.read()
+            size += len(files[digest])
+            if size >= FILES_MESSAGE_SIZE:
+                connection.send(("files", files))
+                files, size = {}, 0
+        if files:
+            connection.send(("files", files))
+
+    def _register(self, connection):
+        try:
+            _, host, pid, version = connection.recv()
+            name = f"{host}:{pid}"
+            if version != fontbakery_version:
+                connection.send(
+                    ("reject", f"Font Bakery {fontbakery_version} is required.")
+                )
+                raise SetupError(f"Worker {name} runs Font Bakery {version}.")
+            connection.send(("setup", *self._setup))
+            _, digests = connection.recv()
+            self._send_files(connection, digests)
+            message = connection.recv()
+            if message[0] != "ready":
+                raise SetupError(f"Worker {name} failed: {message[1]}")
+        except (OSError, EOFError, ValueError, TypeError, SetupError) as e:
+            self._log(f"A worker could not be registered: {e}")
+            connection.close()
+            return
+        with self._lock:
+            self._registered.append(_RemoteWorker(connection, name))
+        self._wakeup_writer.send(b"\0")
+
+    def _add_registered(self):
+        self._wakeup_reader.recv(1024)
+        with self._lock:
+            registered, self._registered = self._registered, []
+        for worker in registered:
+            self._workers[worker.connection] = worker
+            self._log(f"Worker {worker.name} registered.")
+            self._dispatch(worker)
+
+    def _dispatch(self, worker):
+        while self._units and len(worker.in_flight) < UNIT_SIZE:
+            unit = self._units.popleft()
+            worker.in_flight.update(dict.fromkeys(unit))
+            try:
+                worker.connection.send(("jobs", unit))
+            except OSError:
+                # It's lost, the next receive fails.
+                return
+
+    def _lose(self, worker, code, message):
+        """Remove the worker, returns an ERROR result for the check it was
+        running, if that is not tried again."""
+        del self._workers[worker.connection]
+        worker.connection.close()
+        results = []
+        pending = list(worker.in_flight)
+        index = worker.running
+        if index != IDLE and index in worker.in_flight:
+            attempts = self._attempts[index] = self._attempts.get(index, 0) + 1
+            if code == "timeout" or attempts >= MAX_ATTEMPTS:
+                pending.remove(index)
+                logs = (encode_check_log(ERROR, Message(code, message)),)
+                results.append((index, _status2index[ERROR.name], logs, ({}, ())))
+        self._log(
+            f"Lost worker {worker.name} ({code}), {len(pending)} check"
+            f" executions are assigned to other workers."
+        )
+        if pending:
+            self._units.appendleft(pending)
+        for other in list(self._workers.values()):
+            self._dispatch(other)
+        return results
+
+    def _receive(self, worker):
+        message = worker.connection.recv()
+        worker.last_seen = time.monotonic()
+        if message[0] == "status":
+            _, worker.running, elapsed = message
+            worker.running_since = worker.last_seen - elapsed
+            return ()
+        results = message[1]
+        for result in results:
+            worker.in_flight.pop(result[0], None)
+        self._dispatch(worker)
+        return results
+
+    def _get_lost_workers(self):
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            if now - worker.last_seen > WORKER_TIMEOUT:
+                yield worker, "worker-lost", (
+                    f"The worker running this check ({worker.name})"
+                    f" did not respond for {WORKER_TIMEOUT} seconds."
+                )
+                continue
+            if worker.running == IDLE or self._get_timeout is None:
+                continue
+            timeout = self._get_timeout(worker.running)
+            if timeout and now - worker.running_since > timeout + WATCHDOG_GRACE:
+                yield worker, "timeout", (
+                    f"The check was aborted, it exceeded its time budget"
+                    f" of {timeout:g} seconds and the worker running it"
+                    f" ({worker.name}) did not respond."
+                )
+
+    def results(self):
+        self._accept_thread.start()
+        self._log(f"Waiting for workers at {self.address[0]}:{self.address[1]}.")
+        count_results = 0
+        while count_results < self.len_jobs:
+            connections = list(self._workers) + [self._wakeup_reader]
+            result_lists = []
+            for connection in wait(connections, timeout=WATCHDOG_INTERVAL):
+                if connection is self._wakeup_reader:
+                    self._add_registered()
+                    continue
+                worker = self._workers[connection]
+                try:
+                    result_lists.append(self._receive(worker))
+                except (OSError, EOFError):
+                    result_lists.append(
+                        self._lose(
+                            worker,
+                            "worker-lost",
+                            f"The connection to the worker running this check"
+                            f" ({worker.name}) was lost.",
+                        )
+                    )
+            for worker, code, message in list(self._get_lost_workers()):
+                result_lists.append(self._lose(worker, code, message))
+            for result_list in result_lists:
+                for result in result_list:
+                    if result[0] in self._completed:
+                        continue
+                    self._completed.add(result[0])
+                    yield result
+                    count_results += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers.values():
+            try:
+                worker.connection.send(("done",))
+            except OSError:
+                pass
+            worker.connection.close()
+        self._workers.clear()
+        if self._accept_thread.is_alive():
+            # Unblock the accepting thread.
+            try:
+                socket.create_connection(self.address, timeout=1).close()
+            except OSError:
+                pass
+            self._accept_thread.join(timeout=5)
+        self._listener.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+
+def distributed_runner(address, runner, runner_kwds, timing_history=None, log=None):
+    """Like multiproc.multiprocessing_runner, but the check executions run
+    on the workers that connect to address (HOST:PORT)."""
+    order = runner.order
+    get_cost = None
+    if timing_history is not None:
+
+        def get_cost(index):
+            return timing_history.get_identity_cost(runner, order[index])
+
+    units = distribute_jobs(order, max(1, math.ceil(len(order) / UNIT_SIZE)), get_cost)
+    runner_kwds = {
+        key: value
+        for key, value in runner_kwds.items()
+        if key not in LOCAL_RUNNER_KWDS
+    }
+    values = runner_kwds["values"]
+    originals = {
+        value: os.path.abspath(value)
+        for value in _iter_strings(values)
+        if os.path.isfile(value)
+    }
+    setup = (
+        runner.profile.module_locator,
+        runner_kwds,
+        get_order_digest(order),
+        get_input_files(values, runner.profile.auxiliary_files),
+        originals,
+    )
+
+    def get_timeout(index):
+        _, check, _ = order[index]
+        return runner.get_check_timeout(check)
+
+    session_gen = session_protocol_generator(
+        partial(
+            check_protocol_from_worker_data,
+            order,
+            instrumentation=runner.instrumentation,
+        ),
+        order,
+    )
+    coordinator = Coordinator(
+        parse_address(address), get_authkey(), setup, units, get_timeout, log
+    )
+    try:
+        yield from drive_session_protocol(
+            session_gen, _canonical_order(coordinator.results())
+        )
+    finally:
+        coordinator.close()
+
+
+def _work_process(address, authkey, store, once):
+    pid = os.getpid()
+
+    def log(message):
+        print(f"[{pid}] {message}", file=sys.stderr, flush=True)
+
+    try:
+        work(address, authkey, store, once=once, log=log)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Execute the checks of a fontbakery run that was started"
+        " with --coordinator HOST:PORT on another machine. The shared secret"
+        f" of the coordinator and its workers is read from {AUTHKEY_ENV}."
+    )
+    parser.add_argument("address", metavar="HOST:PORT", help="Address of the coordinator.")
+    parser.add_argument(
+        "-J",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--store",
+        default=get_default_cache_dir(),
+        metavar="DIRECTORY",
+        help="Keep the received input files in DIRECTORY, so that they are"
+        " not sent again by the next coordinator. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--store-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+        metavar="MEGABYTES",
+        help="Maximum size of the store. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--once",
+        default=False,
+        action="store_true",
+        help="Exit after one run, instead of waiting for the next coordinator.",
+    )
+    args = parser.parse_args(args)
+    try:
+        address = parse_address(args.address)
+        authkey = get_authkey()
+    except (ValueError, SetupError) as e:
+        sys.exit(str(e))
+    store = PersistentCache(args.store, args.store_size * 1024 * 1024, namespace="files")
+    processes = [
+        Process(target=_work_process, args=(address, authkey, store, args.once))
+        for _ in range(max(1, args.jobs))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -88,3 +88,12 @@ class NamespaceError(FontBakeryRunnerError):
 
 class ValueValidationError(FontBakeryRunnerError):
     pass
+
+
+class CheckTimeout(BaseException):
+    """Raised when a check exceeds its time budget.
+
+    This is not an Exception, so that it is not caught by the error
+    handling for checks and conditions: the check is aborted and an
+    interrupted condition is not cached.
+    """
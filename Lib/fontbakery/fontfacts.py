@@ -0,0 +1,144 @@
+"""
+A compact summary of the basic data of a font.
+
+Many checks derive the same things from a TTFont: the best cmap and its
+reverse, the glyph order, the advance widths, the GDEF glyph classes, the
+table tags. `FontFacts` collects them in one pass, in arrays indexed by glyph
+ID, so that it is cheap to keep in memory and to pickle. It is available to
+checks as the `font_facts` condition, which is evaluated once by the parent
+process of a multiprocessing run and sent to the worker processes.
+
+usage:
+>> facts = FontFacts.from_ttfont(ttFont)
+>> facts.best_cmap[0x41], facts.advance("A"), "GDEF" in facts.tables
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+# GDEF glyph classes
+BASE_GLYPH = 1
+LIGATURE_GLYPH = 2
+MARK_GLYPH = 3
+COMPONENT_GLYPH = 4
+
+
+class FontFacts:
+    """
+    glyph_order:   tuple of the glyph names, the index is the glyph ID.
+    tables:        frozenset of the table tags.
+    units_per_em:  of the head table.
+    codepoints:    array of the codepoints of the best cmap, sorted.
+    cmap_glyphs:   array of the glyph IDs of the codepoints.
+    advances:      array of the advance widths (hmtx) by glyph ID.
+    lsbs:          array of the left side bearings (hmtx) by glyph ID.
+    glyph_classes: bytes of the GDEF glyph class of each glyph ID, 0 for
+                   glyphs without a class (or a font without GDEF).
+
+    The mappings by glyph name are built on first use and aren't pickled.
+    """
+    __slots__ = ("glyph_order", "tables", "units_per_em",
+                 "codepoints", "cmap_glyphs", "advances", "lsbs", "glyph_classes",
+                 "_glyph_ids", "_best_cmap", "_reverse_cmap")
+
+    def __init__(self, glyph_order, tables, units_per_em,
+                 codepoints, cmap_glyphs, advances, lsbs, glyph_classes):
+        self.glyph_order = glyph_order
+        self.tables = tables
+        self.units_per_em = units_per_em
+        self.codepoints = codepoints
+        self.cmap_glyphs = cmap_glyphs
+        self.advances = advances
+        self.lsbs = lsbs
+        self.glyph_classes = glyph_classes
+        self._glyph_ids = None
+        self._best_cmap = None
+        self._reverse_cmap = None
+
+    @classmethod
+    def from_ttfont(cls, ttFont):
+        glyph_order = tuple(ttFont.getGlyphOrder())
+        glyph_ids = {name: gid for gid, name in enumerate(glyph_order)}
+        tables = frozenset(tag for tag in ttFont.keys() if tag != "GlyphOrder")
+
+        cmap = sorted((ttFont.getBestCmap() or {}).items()) if "cmap" in tables else []
+        codepoints = array("L", [codepoint for codepoint, _ in cmap])
+        cmap_glyphs = array("H", [glyph_ids.get(name, 0) for _, name in cmap])
+
+        advances, lsbs = array("H"), array("h")
+        if "hmtx" in tables:
+            metrics = ttFont["hmtx"].metrics
+            for name in glyph_order:
+                advance, lsb = metrics.get(name, (0, 0))
+                advances.append(advance)
+                lsbs.append(lsb)
+
+        glyph_classes = bytearray(len(glyph_order))
+        if "GDEF" in tables and ttFont["GDEF"].table.GlyphClassDef:
+            for name, glyph_class in ttFont["GDEF"].table.GlyphClassDef.classDefs.items():
+                if name in glyph_ids and 0 <= glyph_class < 256:
+                    glyph_classes[glyph_ids[name]] = glyph_class
+
+        units_per_em = ttFont["head"].unitsPerEm if "head" in tables else None
+        facts = cls(glyph_order, tables, units_per_em,
+                    codepoints, cmap_glyphs, advances, lsbs, bytes(glyph_classes))
+        facts._glyph_ids = glyph_ids
+        return facts
+
+    def __getstate__(self):
+        return (self.glyph_order, self.tables, self.units_per_em,
+                self.codepoints, self.cmap_glyphs, self.advances, self.lsbs,
+                self.glyph_classes)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __repr__(self):
+        return (f"<FontFacts: {len(self.glyph_order)} glyphs,"
+                f" {len(self.codepoints)} codepoints>")
+
+    @property
+    def num_glyphs(self):
+        return len(self.glyph_order)
+
+    @property
+    def glyph_ids(self):
+        """{glyph name: glyph ID}"""
+        if self._glyph_ids is None:
+            self._glyph_ids = {name: gid for gid, name in enumerate(self.glyph_order)}
+        return self._glyph_ids
+
+    @property
+    def best_cmap(self):
+        """{codepoint: glyph name}, like TTFont.getBestCmap()"""
+        if self._best_cmap is None:
+            glyph_order = self.glyph_order
+            self._best_cmap = {codepoint: glyph_order[gid]
+                               for codepoint, gid in zip(self.codepoints, self.cmap_glyphs)}
+        return self._best_cmap
+
+    @property
+    def reverse_cmap(self):
+        """{glyph name: set of codepoints}, for the glyphs in the cmap"""
+        if self._reverse_cmap is None:
+            reverse = {}
+            for codepoint, gid in zip(self.codepoints, self.cmap_glyphs):
+                reverse.setdefault(self.glyph_order[gid], set()).add(codepoint)
+            self._reverse_cmap = reverse
+        return self._reverse_cmap
+
+    def codepoints_in_range(self, first, last):
+        """The codepoints of the cmap from `first` to `last` (inclusive)."""
+        return self.codepoints[bisect_left(self.codepoints, first):
+                               bisect_right(self.codepoints, last)]
+
+    def advance(self, glyph_name):
+        return self.advances[self.glyph_ids[glyph_name]]
+
+    def glyph_class(self, glyph_name):
+        return self.glyph_classes[self.glyph_ids[glyph_name]]
+
+    def glyphs_of_class(self, glyph_class):
+        """The names of the glyphs of a GDEF glyph class, e.g. MARK_GLYPH."""
+        return {self.glyph_order[gid]
+                for gid, value in enumerate(self.glyph_classes)
+                if value == glyph_class}
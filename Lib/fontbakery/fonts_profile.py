@@ -46,6 +46,16 @@ class FontsProfile(Profile):
                         extensions=["METADATA.pb"],
                         description="Project's METADATA protobuf file"),
     ]
+    auxiliary_files = [
+        "*.otf",
+        "*.ttf",
+        "static/*.ttf",
+        "METADATA.pb",
+        "DESCRIPTION.en_us.html",
+        "OFL.txt",
+        "LICENSE.txt",
+        "upstream.yaml",
+    ]
 
     def setup_argparse(self, argument_parser):
         """
@@ -97,6 +107,16 @@ class FontsProfile(Profile):
 
         return tuple(x.name for x in self.accepted_files)
 
+    def before_check(self, check, args):
+        """Glyphs of the fonts of `check` may have been edited since their
+        component graphs were built, see `fontbakery.glyphgraph`."""
+        from fontbakery.glyphgraph import glyphs_may_have_changed
+
+        for value in args.values():
+            for item in value if isinstance(value, list) else (value,):
+                if hasattr(item, "__dict__"):
+                    glyphs_may_have_changed(item)
+
     def get_family_checks(self):
         family_checks = self.get_checks_by_dependencies('fonts')
         family_checks.extend(self.get_checks_by_dependencies('ttFonts'))
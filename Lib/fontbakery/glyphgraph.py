@@ -0,0 +1,308 @@
+"""
+The graph of the composite glyphs of a TrueType font.
+
+Composite glyphs are made of other glyphs, which can be composites too, and
+CJK fonts reuse the same few thousand components in tens of thousands of
+glyphs. Walking down the components of every glyph to count its contours or
+to find whether it has ink resolves the shared components again and again.
+`ComponentGraph` reads the components of each glyph once and memoizes the
+properties that add up along the graph: total contour count, ink, nesting
+depth, bounds and transformed components. Each property is computed bottom-up,
+without recursion, and components that (in broken fonts) contain the glyph
+they are part of are skipped instead of looping forever.
+
+Glyphs are read lazily: asking about a single glyph only reads the glyphs it
+is made of, and `composites` reads the whole glyf table once.
+
+The graph of a font lives on its TTFont, from the first `get_component_graph`
+until the font goes away or its glyf table is replaced. Checks and conditions
+may edit glyphs, so font profiles call `glyphs_may_have_changed` for the fonts
+of each check before it runs. Then, before answering again, the graph makes
+sure the glyphs it read are still the glyphs of the font, with the same
+components, contours and points, and starts over if one of them was replaced
+or edited. Other code that edits glyphs calls `clear_component_graph`.
+
+usage:
+>> graph = get_component_graph(ttFont)
+>> graph.contour_count("Aacute"), graph.has_ink("space"), graph.depth("Aacute")
+"""
+from fontTools.misc.arrayTools import calcIntBounds, unionRect
+
+IDENTITY = (1, 0, 0, 1)
+
+# Components used by ttfautohint to carry its version string, not part of
+# the outlines.
+TTFAUTOHINT_COMPONENT = ".ttfautohint"
+
+# The attribute of the TTFont that holds its ComponentGraph.
+_ATTRIBUTE = "_fontbakery_component_graph"
+
+
+
+def component_transform(component):
+    """The 2x2 transformation (xx, xy, yx, yy) of a GlyphComponent."""
+    if hasattr(component, "transform"):
+        (xx, xy), (yx, yy) = component.transform
+        return (xx, xy, yx, yy)
+    return IDENTITY
+
+
+def _glyph_state(glyph):
+    """What the graph read from a glyph, to notice glyphs edited in place."""
+    if hasattr(glyph, "data"):
+        # compacted again, e.g. when the font was compiled
+        return glyph.data
+    if glyph.isComposite():
+        return tuple((component.glyphName, getattr(component, "x", None),
+                      getattr(component, "y", None), component_transform(component))
+                     for component in glyph.components)
+    coordinates = getattr(glyph, "coordinates", None)
+    if coordinates is None:
+        return glyph.numberOfContours, None
+    # A hash of the points, to notice points that were moved
+    return glyph.numberOfContours, hash(coordinates.array.tobytes())
+
+
+class ComponentGraph:
+    """
+    The components of the glyphs of the glyf table of a font.
+
+    Properties of glyphs are memoized, each one is computed once for a
+    glyph however many composites use it, until a glyph it depends on changes.
+    """
+
+    def __init__(self, ttFont):
+        self.glyf = ttFont["glyf"]
+        # name: (glyph, _glyph_state(glyph)) of the glyphs read so far
+        self._read = {}
+        self._glyph_order = None
+        self._components = {}
+        self._composites = None
+        self._used_components = None
+        self._contour_counts = {}
+        self._ink = {}
+        self._depths = {}
+        self._bounds = {}
+        self._transformed = {}
+        # the glyphs checked since `glyphs_may_have_changed`, with all
+        # they are made of
+        self._checked = set()
+        self._table_checked = False
+
+    def _reset(self):
+        self._glyph_order = self._composites = self._used_components = None
+        self._table_checked = False
+        for memo in (self._read, self._checked, self._components, self._contour_counts,
+                     self._ink, self._depths, self._bounds, self._transformed):
+            memo.clear()
+
+    def _glyph_components(self, name):
+        if name not in self._components:
+            glyph = self.glyf[name]
+            self._read[name] = (glyph, _glyph_state(glyph))
+            self._components[name] = (tuple(glyph.components)
+                                      if glyph.isComposite() else None)
+        return self._components[name]
+
+    def _glyph_component_names(self, name):
+        components = self._glyph_components(name)
+        if components is None:
+            return None
+        return [component.glyphName for component in components]
+
+    def _glyph_is_current(self, name):
+        glyph, state = self._read[name]
+        return (self.glyf.glyphs.get(name) is glyph
+                and _glyph_state(glyph) == state)
+
+    def glyphs_may_have_changed(self):
+        """Makes the graph check the glyphs it read before answering again."""
+        self._checked.clear()
+        self._table_checked = False
+
+    def _check(self, name):
+        """Starts over if the glyph, or a glyph it is made of, changed
+        since it was read."""
+        if name in self._checked:
+            return
+        stack, seen = [name], set()
+        while stack:
+            current = stack.pop()
+            if current in seen or current in self._checked or current not in self._read:
+                continue
+            seen.add(current)
+            if not self._glyph_is_current(current):
+                self._reset()
+                return
+            stack.extend(self._glyph_component_names(current) or ())
+        self._checked.update(seen)
+
+    def _check_table(self):
+        """Starts over if any glyph changed, or glyphs were added or removed."""
+        if self._table_checked or self._glyph_order is None:
+            return
+        if (self.glyf.glyphOrder != self._glyph_order
+                or not all(self._glyph_is_current(name) for name in self._read)):
+            self._reset()
+        else:
+            self._checked.update(self._read)
+            self._table_checked = True
+
+    def components(self, name):
+        """The GlyphComponents of a glyph, None for simple glyphs."""
+        self._check(name)
+        return self._glyph_components(name)
+
+    def component_names(self, name):
+        """The names of the components of a glyph, in order,
+        None for simple glyphs."""
+        self._check(name)
+        return self._glyph_component_names(name)
+
+    def is_composite(self, name):
+        return self.components(name) is not None
+
+    @property
+    def composites(self):
+        """The names of the composite glyphs, in glyph order."""
+        self._check_table()
+        if self._composites is None:
+            self._glyph_order = list(self.glyf.glyphOrder)
+            self._table_checked = True
+            self._composites = [name for name in self.glyf.keys()
+                                if self._glyph_components(name) is not None]
+        return self._composites
+
+    @property
+    def used_components(self):
+        """The set of the glyphs that are components of some glyph."""
+        composites = self.composites
+        if self._used_components is None:
+            self._used_components = {component.glyphName
+                                     for name in composites
+                                     for component in self._glyph_components(name)}
+        return self._used_components
+
+    def _aggregate(self, name, memo, simple, composite):
+        """memo[name], computed bottom-up for the glyph and all the glyphs it
+        is made of: `simple(name)` for simple glyphs, and
+        `composite(name, [(component name, value)])` for composites."""
+        self._check(name)
+        if name in memo:
+            return memo[name]
+        stack = [name]
+        expanded = set()  # the composites of the current path down the graph
+        while stack:
+            current = stack[-1]
+            if current in memo:
+                stack.pop()
+                continue
+            names = self._glyph_component_names(current)
+            if names is None:
+                memo[current] = simple(current)
+                self._checked.add(current)
+                stack.pop()
+            elif current not in expanded:
+                expanded.add(current)
+                stack.extend(component for component in names
+                             if component not in memo and component not in expanded)
+            else:
+                # Components still missing from memo refer back to a glyph of
+                # the current path: a cycle, which has no value to add.
+                memo[current] = composite(current, [(component, memo[component])
+                                                    for component in names
+                                                    if component in memo])
+                self._checked.add(current)
+                expanded.discard(current)
+                stack.pop()
+        return memo[name]
+
+    def contour_count(self, name):
+        """The number of contours of a glyph, including those of its
+        components at any depth, counted once per use."""
+        return self._aggregate(
+            name, self._contour_counts,
+            lambda glyph: self.glyf[glyph].numberOfContours,
+            lambda glyph, counts: sum(count for component, count in counts
+                                      if component != TTFAUTOHINT_COMPONENT))
+
+    def _simple_has_ink(self, name):
+        glyph = self.glyf[name]
+        if glyph.numberOfContours == 0:
+            return False
+        coords, _, _ = glyph.getCoordinates(self.glyf)
+        # you need at least 3 points to draw
+        return len(coords) > 2
+
+    def has_ink(self, name):
+        """True if the glyph, or any of its components, draws something."""
+        return self._aggregate(
+            name, self._ink, self._simple_has_ink,
+            lambda glyph, inks: any(ink for _, ink in inks))
+
+    def depth(self, name):
+        """0 for simple glyphs, 1 for composites of simple glyphs,
+        2 for composites with composite components, etc."""
+        return self._aggregate(
+            name, self._depths, lambda glyph: 0,
+            lambda glyph, depths: 1 + max((depth for _, depth in depths), default=0))
+
+    def _coordinate_bounds(self, name):
+        coords, _, _ = self.glyf[name].getCoordinates(self.glyf)
+        return calcIntBounds(coords) if len(coords) else None
+
+    def _composite_bounds(self, name, bounds):
+        # Components that are only moved: their bounds, moved. Scaled or
+        # rotated components, and components positioned by matching points,
+        # are resolved from the coordinates of the whole glyph.
+        if not all(hasattr(component, "x")
+                   and component_transform(component) == IDENTITY
+                   for component in self._glyph_components(name)):
+            return self._coordinate_bounds(name)
+        result = None
+        for component, (_, box) in zip(self._glyph_components(name), bounds):
+            if box is None:
+                continue
+            x_min, y_min, x_max, y_max = box
+            box = (x_min + component.x, y_min + component.y,
+                   x_max + component.x, y_max + component.y)
+            result = box if result is None else unionRect(result, box)
+        return result
+
+    def bounds(self, name):
+        """The (xMin, yMin, xMax, yMax) of the outlines of a glyph,
+        None for glyphs without points."""
+        return self._aggregate(name, self._bounds,
+                               self._coordinate_bounds, self._composite_bounds)
+
+    def transformed(self, name):
+        """True if a component of the glyph, at any depth, is scaled,
+        flipped or rotated."""
+        return self._aggregate(
+            name, self._transformed, lambda glyph: False,
+            lambda glyph, transformed: (
+                any(flag for _, flag in transformed)
+                or any(component_transform(component) != IDENTITY
+                       for component in self._glyph_components(glyph))))
+
+
+def get_component_graph(ttFont):
+    """Returns the ComponentGraph of the glyf table of `ttFont`."""
+    graph = vars(ttFont).get(_ATTRIBUTE)
+    if graph is None or graph.glyf is not ttFont["glyf"]:
+        graph = ComponentGraph(ttFont)
+        setattr(ttFont, _ATTRIBUTE, graph)
+    return graph
+
+
+def glyphs_may_have_changed(ttFont):
+    """Makes the graph of `ttFont`, if it has one, check the glyphs it read
+    before answering again, see FontsProfile.before_check."""
+    graph = vars(ttFont).get(_ATTRIBUTE)
+    if graph is not None:
+        graph.glyphs_may_have_changed()
+
+
+def clear_component_graph(ttFont):
+    """Drops the graph of `ttFont`, it is built again on next use."""
+    vars(ttFont).pop(_ATTRIBUTE, None)
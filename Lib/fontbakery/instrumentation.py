@@ -0,0 +1,243 @@
+"""
+Font Bakery instrumentation measures where the time (and optionally the
+memory) of a run goes: for each check execution and for each condition
+evaluation it records the wall time, the CPU time and, if requested, the
+peak of the memory allocated while it ran (using tracemalloc).
+
+Times of check executions include the conditions they triggered. Each
+condition is attributed to the check execution that needed it first.
+
+Separation of Concerns Disclaimer:
+While created specifically for checking fonts and font-families this
+module has no domain knowledge about fonts. It can be used for any kind
+of (document) checking. Please keep it so. It will be valuable for other
+domains as well.
+Domain specific knowledge should be encoded only in the Profile (Checks,
+Conditions) and MAYBE in *customized* reporters e.g. subclasses.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import os
+import time
+import tracemalloc
+
+
+class Instrumentation:
+    """
+    usage:
+    >> instrumentation = Instrumentation(trace_memory=True)
+    >> for event in instrumentation.measure_check(key, check_protocol):
+    >>     ...
+    >> with instrumentation.measure_condition(key):
+    >>     ...
+    >> instrumentation.checks[key]
+    {'wall': 0.1, 'cpu': 0.09, 'memory': 1024}
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        # {check key: record}
+        self.checks = {}
+        # {condition key: record}, record["check"] is the key of the check
+        # execution that triggered the evaluation.
+        self.conditions = {}
+        # {check key: [condition key, ...]}
+        self.conditions_by_check = defaultdict(list)
+        self._current_check = None
+        # memory measurements in progress: [traced memory at start, peak]
+        self._frames = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def get_check_key(identity):
+        section, check, iterargs = identity
+        return str(section), check.id, iterargs
+
+    def _update_frames(self, peak):
+        for frame in self._frames:
+            frame[1] = max(frame[1], peak - frame[0])
+
+    def _start(self):
+        frame = None
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Measurements in progress must not lose their peak.
+            self._update_frames(peak)
+            # Python 3.9+, otherwise the peak of the whole run is used.
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            frame = [current, 0]
+            self._frames.append(frame)
+        return time.perf_counter(), time.process_time(), frame
+
+    def _stop(self, token, record):
+        wall, cpu, frame = token
+        record["wall"] = record.get("wall", 0.0) + time.perf_counter() - wall
+        record["cpu"] = record.get("cpu", 0.0) + time.process_time() - cpu
+        if frame is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            self._update_frames(peak)
+            self._frames.remove(frame)
+            record["memory"] = max(record.get("memory", 0), frame[1])
+
+    def measure_check(self, key, check_protocol):
+        """Yields from check_protocol, measuring only the time spent in
+        it, not the time the consumer (e.g. the reporters) needs."""
+        record = self.checks.setdefault(key, {})
+        check_protocol = iter(check_protocol)
+        while True:
+            previous_check, self._current_check = self._current_check, key
+            token = self._start()
+            try:
+                event = next(check_protocol)
+            except StopIteration:
+                return
+            finally:
+                self._stop(token, record)
+                self._current_check = previous_check
+            yield event
+
+    @contextmanager
+    def measure_condition(self, key):
+        record = {}
+        token = self._start()
+        try:
+            yield
+        finally:
+            self._stop(token, record)
+            self.add_condition(key, record, self._current_check)
+
+    def add_check(self, key, record):
+        self.checks[key] = dict(record)
+
+    def add_condition(self, key, record, check_key):
+        if key in self.conditions:
+            # only the first evaluation is attributed
+            return
+        self.conditions[key] = dict(record, check=check_key)
+        self.conditions_by_check[check_key].append(key)
+
+    def get_check_conditions(self, check_key):
+        """Returns a tuple of (condition key, record) of the conditions
+        that were first triggered by check_key."""
+        return tuple(
+            (key, self.conditions[key]) for key in self.conditions_by_check.get(check_key, ())
+        )
+
+    def get_slowest(self, count):
+        """Returns two lists of (key, record), sorted by wall time: the
+        `count` slowest check executions and the `count` slowest conditions."""
+
+        def slowest(records):
+            return sorted(records.items(), key=lambda item: -item[1]["wall"])[:count]
+
+        return slowest(self.checks), slowest(self.conditions)
+
+
+TIMING_HISTORY_FORMAT = "fontbakery-timing-history"
+
+
+class TimingHistory:
+    """
+    Estimates of the wall time of check executions, learned from earlier
+    runs. Used to schedule the slowest check executions first.
+
+    usage:
+    >> history = TimingHistory()
+    >> history.load('timings.json')  # a history file or a JSON report
+    >> history.get_cost(check_id, 'Font-Regular.ttf')
+    >> history.update(runner)  # after the run
+    >> history.save('timings.json')
+
+    Estimates are kept per check id and per check id and file name (the
+    base name of the value of the first iterarg), the latter are used
+    when available.
+    """
+
+    # weight of a new measurement when it's merged into the history
+    SMOOTHING = 0.5
+
+    def __init__(self):
+        # {check id: {"wall": seconds, "files": {file name: seconds}}}
+        self.checks = {}
+        self._default_cost = None
+
+    @staticmethod
+    def _get_file_name(value):
+        return os.path.basename(value) if isinstance(value, str) else None
+
+    def _add(self, check_id, file_name, wall):
+        self._default_cost = None
+        entry = self.checks.setdefault(check_id, {"wall": wall, "files": {}})
+        entry["wall"] += self.SMOOTHING * (wall - entry["wall"])
+        if file_name:
+            files = entry["files"]
+            previous = files.get(file_name, wall)
+            files[file_name] = previous + self.SMOOTHING * (wall - previous)
+
+    def load(self, filename):
+        """Reads either a file written by `save` or a JSON report of the
+        SerializeReporter that contains timings. Returns True for the former."""
+        with open(filename, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("format") == TIMING_HISTORY_FORMAT:
+            for check_id, entry in data["checks"].items():
+                self.checks[check_id] = {
+                    "wall": entry["wall"],
+                    "files": dict(entry.get("files", {})),
+                }
+            self._default_cost = None
+            return True
+        for section in data.get("sections", ()):
+            for item in section.get("checks", ()):
+                # clustered reports (collect_results_by) have one more level
+                for check in item if isinstance(item, list) else (item,):
+                    timing = check.get("timing")
+                    if not timing:
+                        continue
+                    # the key contains str(check): "<FontBakeryCheck:ID>"
+                    check_id = check["key"][1]
+                    check_id = check_id.partition(":")[2].rstrip(">") or check_id
+                    self._add(
+                        check_id,
+                        self._get_file_name(check.get("filename")),
+                        timing["wall"],
+                    )
+        return False
+
+    def save(self, filename):
+        with open(filename, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"format": TIMING_HISTORY_FORMAT, "checks": self.checks},
+                fh,
+                sort_keys=True,
+                indent=1,
+            )
+
+    def update(self, runner):
+        """Merge the measurements of the run of `runner`."""
+        for (_, check_id, iterargs), record in runner.instrumentation.checks.items():
+            file_name = None
+            if iterargs:
+                file_name = self._get_file_name(runner.get_iterarg(*iterargs[0]))
+            self._add(check_id, file_name, record["wall"])
+
+    def get_cost(self, check_id, file_name=None):
+        """Estimated wall time in seconds. Unknown checks get the median
+        of all known checks."""
+        entry = self.checks.get(check_id)
+        if entry is None:
+            if self._default_cost is None:
+                walls = sorted(entry["wall"] for entry in self.checks.values())
+                self._default_cost = walls[len(walls) // 2] if walls else 1.0
+            return self._default_cost
+        return entry["files"].get(file_name, entry["wall"])
+
+    def get_identity_cost(self, runner, identity):
+        _, check, iterargs = identity
+        file_name = None
+        if iterargs:
+            file_name = self._get_file_name(runner.get_iterarg(*iterargs[0]))
+        return self.get_cost(check.id, file_name)
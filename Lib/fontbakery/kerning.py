@@ -0,0 +1,251 @@
+"""
+A compact model of the pair kerning (GPOS pair adjustment lookups) of a font.
+
+Expanding class based kerning (PairPos format 2) into explicit pairs creates
+a tuple for every combination of the glyphs of two classes, class 0 being
+"every glyph not in a class": millions of pairs on large fonts. Instead,
+`KerningMatrix` keeps each class subtable as it is stored in the font, as
+NumPy arrays: the first and second class of each glyph ID, and a
+class1 x class2 matrix for each field of the value records. Questions like
+"is there a pair with an XAdvDevice that varies along the GRAD axis" are
+answered on the matrices, and pairs are only made, lazily, when they are
+asked for.
+
+Value fields (XPlacement, YPlacement, XAdvance, YAdvance) are stored as they
+are, 0 where a record lacks them. Device fields (XPlaDevice, ..., YAdvDevice)
+are stored as `variation_index(device)`: (StartSize << 16) | EndSize, which is
+(outer, inner) of the VarStore for the VariationIndex tables of variable
+fonts, and NO_DEVICE where a record lacks them.
+
+usage:
+>> kerning = get_kerning(ttFont)
+>> kerning.kerns("T", "o")
+>> kerning.any(1, "XAdvance", lambda values: values < -100)
+>> next(kerning.pairs_where(1, "XAdvDevice", lambda values: values != NO_DEVICE))
+"""
+import numpy as np
+
+VALUE_FIELDS = ("XPlacement", "YPlacement", "XAdvance", "YAdvance")
+DEVICE_FIELDS = ("XPlaDevice", "YPlaDevice", "XAdvDevice", "YAdvDevice")
+NO_DEVICE = -1
+
+
+def variation_index(device):
+    """The (outer, inner) VarStore index of a VariationIndex table,
+    packed in one integer."""
+    return (device.StartSize << 16) | device.EndSize
+
+
+def _field_value(record, field):
+    value = getattr(record, field, None) if record is not None else None
+    if field in DEVICE_FIELDS:
+        return NO_DEVICE if value is None else variation_index(value)
+    return value or 0
+
+
+def _field_dtype(field):
+    return np.int64 if field in DEVICE_FIELDS else np.int32
+
+
+class PairKerning:
+    """
+    A PairPos format 1 subtable: one entry per pair.
+
+    first, second: arrays of the glyph IDs of the pairs.
+    records:       list of the (Value1, Value2) records of the pairs.
+    """
+
+    def __init__(self, subtable, glyph_ids):
+        first, second, self.records = [], [], []
+        for glyph, pair_set in zip(subtable.Coverage.glyphs, subtable.PairSet):
+            for pair in pair_set.PairValueRecord:
+                first.append(glyph_ids[glyph])
+                second.append(glyph_ids[pair.SecondGlyph])
+                self.records.append((getattr(pair, "Value1", None),
+                                     getattr(pair, "Value2", None)))
+        self.first = np.array(first, dtype=np.int32)
+        self.second = np.array(second, dtype=np.int32)
+        self._values = {}
+
+    def values(self, record, field):
+        """Array of a field of Value1 (record=1) or Value2 (record=2) by pair."""
+        key = (record, field)
+        if key not in self._values:
+            self._values[key] = np.array([_field_value(records[record - 1], field)
+                                          for records in self.records],
+                                         dtype=_field_dtype(field))
+        return self._values[key]
+
+    def mask(self, record, field, condition):
+        return np.asarray(condition(self.values(record, field)), dtype=bool)
+
+    def kerns(self, first, second):
+        """True if the subtable has a record for the pair of glyph IDs."""
+        return bool(np.any((self.first == first) & (self.second == second)))
+
+    def pairs(self, glyph_order, mask=None):
+        indices = range(len(self.records)) if mask is None else np.flatnonzero(mask)
+        for index in indices:
+            value1, value2 = self.records[index]
+            yield (glyph_order[self.first[index]], glyph_order[self.second[index]],
+                   value1, value2)
+
+
+class ClassKerning:
+    """
+    A PairPos format 2 subtable, a matrix of classes.
+
+    first_class:  array of the Class1 of each glyph ID, -1 for the glyphs
+                  that aren't in the Coverage.
+    second_class: array of the Class2 of each glyph ID.
+    records:      the Class1Record of the subtable.
+    """
+
+    def __init__(self, subtable, glyph_ids):
+        num_glyphs = len(glyph_ids)
+        class_defs1 = subtable.ClassDef1.classDefs if subtable.ClassDef1 else {}
+        class_defs2 = subtable.ClassDef2.classDefs if subtable.ClassDef2 else {}
+        self.first_class = np.full(num_glyphs, -1, dtype=np.int32)
+        for glyph in subtable.Coverage.glyphs:
+            self.first_class[glyph_ids[glyph]] = class_defs1.get(glyph, 0)
+        self.second_class = np.zeros(num_glyphs, dtype=np.int32)
+        for glyph, glyph_class in class_defs2.items():
+            if glyph in glyph_ids:
+                self.second_class[glyph_ids[glyph]] = glyph_class
+        self.records = subtable.Class1Record
+        self.shape = (subtable.Class1Count, subtable.Class2Count)
+        self._values = {}
+        self._first_glyphs = None
+        self._second_glyphs = None
+
+    def values(self, record, field):
+        """class1 x class2 matrix of a field of Value1 (record=1) or
+        Value2 (record=2)."""
+        key = (record, field)
+        if key not in self._values:
+            name = f"Value{record}"
+            self._values[key] = np.array(
+                [[_field_value(getattr(class2_record, name, None), field)
+                  for class2_record in class1_record.Class2Record]
+                 for class1_record in self.records],
+                dtype=_field_dtype(field)).reshape(self.shape)
+        return self._values[key]
+
+    def _glyphs_by_class(self, classes, count):
+        """The glyph IDs of each class, in glyph ID order."""
+        order = np.argsort(classes, kind="stable")
+        bounds = np.searchsorted(classes[order], np.arange(count + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+    @property
+    def first_glyphs(self):
+        """The glyph IDs of each Class1."""
+        if self._first_glyphs is None:
+            self._first_glyphs = self._glyphs_by_class(self.first_class, self.shape[0])
+        return self._first_glyphs
+
+    @property
+    def second_glyphs(self):
+        """The glyph IDs of each Class2."""
+        if self._second_glyphs is None:
+            self._second_glyphs = self._glyphs_by_class(self.second_class, self.shape[1])
+        return self._second_glyphs
+
+    def mask(self, record, field, condition):
+        """class1 x class2 matrix of the cells that meet the condition and
+        stand for at least one pair of glyphs."""
+        mask = np.asarray(condition(self.values(record, field)), dtype=bool)
+        first_used = np.bincount(self.first_class[self.first_class >= 0],
+                                 minlength=self.shape[0])[:self.shape[0]] > 0
+        second_used = np.bincount(self.second_class,
+                                  minlength=self.shape[1])[:self.shape[1]] > 0
+        return mask & first_used[:, None] & second_used[None, :]
+
+    def kerns(self, first, second):
+        """True if the cell of the pair of glyph IDs adjusts them: every
+        covered glyph has a cell with every glyph, mostly empty ones."""
+        class1 = self.first_class[first]
+        if class1 < 0:
+            return False
+        class2_record = self.records[class1].Class2Record[self.second_class[second]]
+        values = [getattr(class2_record, "Value1", None),
+                  getattr(class2_record, "Value2", None)]
+        return (any(_field_value(value, field) != 0
+                    for value in values for field in VALUE_FIELDS)
+                or any(_field_value(value, field) != NO_DEVICE
+                       for value in values for field in DEVICE_FIELDS))
+
+    def pairs(self, glyph_order, mask=None):
+        cells = np.ndindex(*self.shape) if mask is None else map(tuple, np.argwhere(mask))
+        for class1, class2 in cells:
+            class2_record = self.records[class1].Class2Record[class2]
+            value1 = getattr(class2_record, "Value1", None)
+            value2 = getattr(class2_record, "Value2", None)
+            for first in self.first_glyphs[class1]:
+                for second in self.second_glyphs[class2]:
+                    yield glyph_order[first], glyph_order[second], value1, value2
+
+
+class KerningMatrix:
+    """The pair adjustment subtables of a font, in lookup list order.
+
+    Pairs are yielded as (left glyph, right glyph, Value1, Value2), where
+    the values are the ValueRecords of the font (or None)."""
+
+    def __init__(self, subtables, glyph_order):
+        self.glyph_order = glyph_order
+        glyph_ids = self._glyph_ids = {glyph: gid
+                                       for gid, glyph in enumerate(glyph_order)}
+        self.subtables = [PairKerning(subtable, glyph_ids) if subtable.Format == 1
+                          else ClassKerning(subtable, glyph_ids)
+                          for subtable in subtables
+                          if subtable.Format in (1, 2)]
+
+    def count_pairs(self):
+        """The number of pairs, counted without making them."""
+        count = 0
+        for subtable in self.subtables:
+            if isinstance(subtable, PairKerning):
+                count += len(subtable.records)
+            else:
+                first = np.array(list(map(len, subtable.first_glyphs)))
+                second = np.array(list(map(len, subtable.second_glyphs)))
+                count += int(first.sum() * second.sum())
+        return count
+
+    def pairs(self):
+        """Lazily yields all pairs."""
+        for subtable in self.subtables:
+            yield from subtable.pairs(self.glyph_order)
+
+    def kerns(self, left, right):
+        """True if some subtable adjusts the pair of glyph names."""
+        first = self._glyph_ids.get(left)
+        second = self._glyph_ids.get(right)
+        if first is None or second is None:
+            return False
+        return any(subtable.kerns(first, second) for subtable in self.subtables)
+
+    def pairs_where(self, record, field, condition):
+        """Lazily yields the pairs for which `condition`, a vectorized
+        predicate over an array of values of a field of Value1 (record=1)
+        or Value2 (record=2), is true."""
+        for subtable in self.subtables:
+            mask = subtable.mask(record, field, condition)
+            if mask.any():
+                yield from subtable.pairs(self.glyph_order, mask)
+
+    def any(self, record, field, condition):
+        """True if there's a pair for which `condition` is true."""
+        return any(subtable.mask(record, field, condition).any()
+                   for subtable in self.subtables)
+
+
+def get_kerning(ttFont):
+    """Returns the KerningMatrix of `ttFont`, cached with its LayoutIndex."""
+    from fontbakery.layoutindex import get_layout_index
+    layout = get_layout_index(ttFont)
+    if layout.kerning is None:
+        layout.kerning = KerningMatrix(layout.subtables("GPOS", 2),
+                                       ttFont.getGlyphOrder())
+    return layout.kerning
@@ -0,0 +1,205 @@
+"""
+An index of the OpenType layout tables (GSUB and GPOS) of a font.
+
+Many checks and conditions need something from the lookup lists: the feature
+and script tags, the lookups of a feature, the glyphs a substitution can
+produce, the ligatures, the kerning subtables, the mark to base attachments.
+`LayoutIndex` collects all of it in a single traversal of both tables.
+Extension lookups are resolved to the lookup type and subtables they wrap,
+without modifying the font.
+
+`get_layout_index` builds the index of a font on first use and stores it on
+the TTFont. A GSUB or GPOS table that was added, replaced or removed since
+then makes it build a new one. Lookups edited in place need an explicit
+`clear_layout_index`.
+
+usage:
+>> index = get_layout_index(ttFont)
+>> "liga" in index.feature_tags, index.has_kerning, index.feature_ligatures("liga")
+"""
+from operator import is_
+
+EXTENSION_LOOKUP_TYPES = {"GSUB": 7, "GPOS": 9}
+
+# The attribute of the TTFont that holds its LayoutIndex.
+_ATTRIBUTE = "_fontbakery_layout_index"
+
+
+def _layout_tables(ttFont):
+    return tuple(ttFont[tag] if tag in ttFont else None
+                 for tag in EXTENSION_LOOKUP_TYPES)
+
+
+def _substitution_outputs(lookup_type, subtables):
+    """The glyphs that a GSUB lookup of this type can produce."""
+    outputs = set()
+    for subtable in subtables:
+        if lookup_type == 1:  # Single
+            outputs.update(subtable.mapping.values())
+        elif lookup_type == 2:  # Multiple
+            for sequence in subtable.mapping.values():
+                outputs.update(sequence)
+        elif lookup_type == 3:  # Alternate
+            for alternates in subtable.alternates.values():
+                outputs.update(alternates)
+        elif lookup_type == 4:  # Ligature
+            for ligatures in subtable.ligatures.values():
+                outputs.update(ligature.LigGlyph for ligature in ligatures)
+        elif lookup_type == 8:  # Reverse chaining context single
+            outputs.update(subtable.Substitute)
+        # Contextual lookups (5 and 6) produce no glyphs themselves, they
+        # dispatch to other lookups of the lookup list.
+    return frozenset(outputs)
+
+
+class LayoutIndex:
+    """
+    tables:           {table tag: the GSUB or GPOS table}, for the tables of the font.
+    lookups:          {table tag: list of (lookup type, subtables)}, by lookup index,
+                      with extension lookups resolved.
+    feature_lookups:  {table tag: {feature tag: list of lookup indices}}, without
+                      the indices past the end of the LookupList.
+    feature_tags:     set of the feature tags of both tables.
+    script_tags:      set of the script tags of both tables.
+    language_tags:    set of the language system tags of both tables.
+    lookup_outputs:   list of the frozensets of glyphs each GSUB lookup can produce.
+    lookup_ligatures: list of the [(first glyph, components, ligature glyph)] of
+                      each GSUB lookup, empty for other lookup types.
+    mark_bases:       {base glyph: set of the mark glyphs that attach to it},
+                      from the mark to base (GPOS 4) lookups.
+    attached_marks:   set of the mark glyphs that attach to some base.
+    kerning:          the fontbakery.kerning.KerningMatrix of the pair adjustment
+                      lookups, made on first use by `fontbakery.kerning.get_kerning`.
+    """
+
+    def __init__(self, ttFont):
+        self._font_tables = _layout_tables(ttFont)
+        self.tables = {}
+        self.lookups = {}
+        self.feature_lookups = {}
+        self.feature_tags = set()
+        self.script_tags = set()
+        self.language_tags = set()
+        self.lookup_outputs = []
+        self.lookup_ligatures = []
+        self.mark_bases = {}
+        self.attached_marks = set()
+        self.kerning = None
+        self._ligature_components = None
+
+        for tag, table in zip(EXTENSION_LOOKUP_TYPES, self._font_tables):
+            if table is None:
+                continue
+            self.tables[tag] = table
+            self._index_table(tag, table.table)
+
+    def _index_table(self, tag, table):
+        feature_lookups = self.feature_lookups[tag] = {}
+        lookup_count = len(table.LookupList.Lookup) if table.LookupList else 0
+        if table.FeatureList:
+            for record in table.FeatureList.FeatureRecord:
+                self.feature_tags.add(record.FeatureTag)
+                indices = feature_lookups.setdefault(record.FeatureTag, [])
+                for index in record.Feature.LookupListIndex:
+                    # Malformed fonts may point past the end of the LookupList
+                    if index < lookup_count and index not in indices:
+                        indices.append(index)
+        if table.ScriptList:
+            for record in table.ScriptList.ScriptRecord:
+                self.script_tags.add(record.ScriptTag)
+                for language in record.Script.LangSysRecord:
+                    self.language_tags.add(language.LangSysTag)
+
+        lookups = self.lookups[tag] = []
+        if not table.LookupList:
+            return
+        extension_type = EXTENSION_LOOKUP_TYPES[tag]
+        for lookup in table.LookupList.Lookup:
+            lookup_type, subtables = lookup.LookupType, lookup.SubTable
+            if lookup_type == extension_type:
+                subtables = [extension.ExtSubTable for extension in subtables]
+                lookup_type = subtables[0].LookupType if subtables else None
+            lookups.append((lookup_type, subtables))
+            if tag == "GSUB":
+                self._index_substitution(lookup_type, subtables)
+            elif lookup_type == 4:
+                self._index_mark_base(subtables)
+
+    def _index_substitution(self, lookup_type, subtables):
+        self.lookup_outputs.append(_substitution_outputs(lookup_type, subtables))
+        ligatures = []
+        if lookup_type == 4:
+            for subtable in subtables:
+                for first, ligature_set in subtable.ligatures.items():
+                    for ligature in ligature_set:
+                        ligatures.append((first,
+                                          tuple(ligature.Component),
+                                          ligature.LigGlyph))
+        self.lookup_ligatures.append(ligatures)
+
+    def _index_mark_base(self, subtables):
+        # Assume all-to-all
+        for subtable in subtables:
+            marks = subtable.MarkCoverage.glyphs
+            for base in subtable.BaseCoverage.glyphs:
+                self.mark_bases.setdefault(base, set()).update(marks)
+            self.attached_marks.update(marks)
+
+    def is_current(self, ttFont):
+        """False if the GSUB or GPOS table of the font was replaced or removed."""
+        return all(map(is_, self._font_tables, _layout_tables(ttFont)))
+
+    def lookup_types(self, tag):
+        """The set of the lookup types of a table, extension lookups resolved."""
+        return {lookup_type for lookup_type, _ in self.lookups.get(tag, ())}
+
+    def subtables(self, tag, lookup_type):
+        """All subtables of the lookups of a type in a table."""
+        return [subtable
+                for subtable_type, subtables in self.lookups.get(tag, ())
+                if subtable_type == lookup_type
+                for subtable in subtables]
+
+    @property
+    def has_kerning(self):
+        """True if GPOS has a pair adjustment lookup."""
+        return 2 in self.lookup_types("GPOS")
+
+    @property
+    def substitution_outputs(self):
+        """The set of the glyphs that any GSUB lookup can produce."""
+        return set().union(*self.lookup_outputs)
+
+    @property
+    def ligature_components(self):
+        """{ligature glyph: list of the glyph sequences it replaces}"""
+        if self._ligature_components is None:
+            components = {}
+            for ligatures in self.lookup_ligatures:
+                for first, rest, ligature in ligatures:
+                    sequence = (first,) + rest
+                    if sequence not in components.setdefault(ligature, []):
+                        components[ligature].append(sequence)
+            self._ligature_components = components
+        return self._ligature_components
+
+    def feature_ligatures(self, feature):
+        """The (first glyph, components, ligature glyph) of the ligature
+        lookups of a GSUB feature, in lookup list order."""
+        return [ligature
+                for index in self.feature_lookups.get("GSUB", {}).get(feature, ())
+                for ligature in self.lookup_ligatures[index]]
+
+
+def get_layout_index(ttFont):
+    """Returns the LayoutIndex of `ttFont`."""
+    index = vars(ttFont).get(_ATTRIBUTE)
+    if index is None or not index.is_current(ttFont):
+        index = LayoutIndex(ttFont)
+        setattr(ttFont, _ATTRIBUTE, index)
+    return index
+
+
+def clear_layout_index(ttFont):
+    """Drops the index of `ttFont`, e.g. after editing its lookups."""
+    vars(ttFont).pop(_ATTRIBUTE, None)
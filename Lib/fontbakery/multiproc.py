@@ -9,11 +9,17 @@ Domain specific knowledge should be encoded only in the Profile (Checks,
 Conditions) and MAYBE in *customized* reporters e.g. subclasses.
 """
 
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from contextlib import contextmanager
 from functools import partial
-from multiprocessing import Process, Queue
+import hashlib
+import math
+from multiprocessing import Pipe, Process, Queue
+from multiprocessing.connection import wait
+from multiprocessing.sharedctypes import RawArray
+import pickle
 import queue
+import time
 
 from fontbakery.reporters import FontbakeryReporter
 from fontbakery.checkrunner import (  # NOQA
@@ -31,7 +37,10 @@ from fontbakery.checkrunner import (  # NOQA
             , session_protocol_generator
             , drive_session_protocol
             , get_profile_from_module_locator
+            , check_log_to_data
+            , check_log_from_data
             )
+from fontbakery.errors import SetupError
 from fontbakery.message import Message
 
 
@@ -42,21 +51,78 @@ from fontbakery.message import Message
 name2status = {status.name:status for status in \
                (DEBUG, PASS, SKIP, INFO, WARN, FAIL, ERROR)}
 
+# The position in this tuple is used to encode statuses in the
+# results that are sent from the workers to the parent.
+STATUSES = (DEBUG, PASS, SKIP, INFO, WARN, FAIL, ERROR)
+_status2index = {status.name:index for index, status in enumerate(STATUSES)}
+
+# Results are sent to the parent when they exceed this size (roughly, in
+# characters) or when the oldest of them waited longer than FLUSH_INTERVAL
+# seconds. Also always when the worker runs out of jobs.
+FLUSH_SIZE = 64 * 1024
+FLUSH_INTERVAL = 0.5
+
+def encode_check_log(status, message):
+    """Compact version of check_log_to_data, a tuple:
+        (status index, message)
+        (status index, message, code) if message is a Message
+        (status index, message, None, traceback) if message has a traceback
+    """
+    log = check_log_to_data(status, message)
+    data = (_status2index[log['status']], log['message'])
+    if 'code' in log:
+        return data + (log['code'], )
+    if 'traceback' in log:
+        return data + (None, log['traceback'])
+    return data
+
+def decode_check_log(data):
+    """The inverse of encode_check_log, returns a tuple (status, message)."""
+    log = {'status': STATUSES[data[0]].name, 'message': data[1]}
+    if len(data) == 3:
+        log['code'] = data[2]
+    elif len(data) == 4:
+        log['traceback'] = data[3]
+    return check_log_from_data(log)
+
+def get_order_digest(order):
+    """Workers rebuild the execution order themselves, so that check
+    executions can be referenced by their index. This digest is used to
+    make sure that both orders are actually the same."""
+    sha = hashlib.sha1()
+    for section, check, iterargs in order:
+        sha.update(repr((str(section), check.id, iterargs)).encode())
+    return sha.hexdigest()
+
 # Similar to DashbordWorkerReporter of Font Bakery Dashboard.
 class WorkerToQueueReporter(FontbakeryReporter):
-    def __init__(self, queue, profile, ticks_to_flush = None, **kwd):
+    """Sends the results of the checks to a connection as tuples:
+         ((order index, result status index, logs, timing), ...)
+       where logs is a tuple of encode_check_log results and timing is
+       a tuple (check record, ((condition key, condition record), ...))
+       of the instrumentation of the runner.
+       encode_log can replace encode_check_log, e.g. to rewrite paths.
+    """
+    def __init__(self, connection, order
+               , flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL
+               , encode_log=encode_check_log, **kwd):
         super().__init__(**kwd)
-        self._queue = queue
-        self._profile = profile
-        self.ticks_to_flush = ticks_to_flush or 1
+        self._connection = connection
+        self._encode_log = encode_log
+        self._identity2index = {(check.id, iterargs): index
+                                for index, (_, check, iterargs) in enumerate(order)}
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
 
         self._current = None
-        self._collectedChecks = None
+        self._collected = []
+        self._collected_size = 0
+        self._collected_since = None
 
     def _register(self, event):
         super()._register(event)
         status, message, identity = event
-        _section, check, _iterargs = identity
+        _section, check, iterargs = identity
         if status == END:
             self.flush()
             return
@@ -64,168 +130,453 @@ class WorkerToQueueReporter(FontbakeryReporter):
         if not check:
             return
 
-        key = self._profile.serialize_identity(identity)
-
         if status == STARTCHECK:
-            self._current = {
-                'statuses': []
-            }
+            self._current = []
 
         if status == ENDCHECK:
-            # Do more? Anything more would make access easier but also be a
-            # derivative of the actual data, i.e. not SSOT. Calculating (and
-            # thus interpreting) results for the checks is probably not too
-            # expensive to do it on the fly.
-            self._current['result'] = message.name
-            self._save_result(key, self._current)
+            index = self._identity2index[(check.id, iterargs)]
+            self._save_result((index, _status2index[message.name]
+                                    , tuple(self._current)
+                                    , self._get_timing(identity)))
             self._current = None
 
         if status >= DEBUG:
-            # message can be a lot here, currently we know about:
-            #    string, an Exception, a Message. Probably we should leave it
-            #    like this. Message should be the ultimate answer if it's not
-            #    an Exception or a string.
-            # turn everything in a fontbakery/Message like object
-            # `code` may be used for overwriting special failing statuses
-            # otherwise, code must be none
-            #
-            # Optional keys are:
-            #  "code": used to explicitly overwrite specific (FAIL) statuses
-            #  "traceback": only provided if message is an Excepion and likely
-            #               if status is "ERROR"
-            log = {'status': status.name}
-
-            if hasattr(message, 'traceback'):
-                # message is likely a FontbakeryError if this is not None
-                log['traceback'] = message.traceback
-            if isinstance(message, Message):
-                # Ducktyping could be a valid option here.
-                # in that case, a FontbakeryError could also provide a `code` attribute
-                # which would allow to skip that error explicitly. However
-                # ERROR statuses should never be skiped explicitly, the cause
-                # of the error must be repaired!
-                log.update(message.getData())
-            else:
-                log['message'] = f'{message}'
-            self._current['statuses'].append(log)
-
-    def _save_result(self, key, check_result):
-        """ send check_result to the queue"""
-        if self._collectedChecks is None:
-            # order is not really relevant in multiprocessing, however, we keep
-            # it as long as possible, could be good for debugging.
-            self._collectedChecks = OrderedDict()
-        self._collectedChecks[key] = check_result
-        if len(self._collectedChecks) >= self.ticks_to_flush:
+            log = self._encode_log(status, message)
+            self._current.append(log)
+            self._collected_size += sum(len(str(item)) for item in log[1:])
+
+    def _get_timing(self, identity):
+        instrumentation = self.runner.instrumentation
+        key = instrumentation.get_check_key(identity)
+        return (instrumentation.checks.get(key, {})
+              , instrumentation.get_check_conditions(key))
+
+    def _save_result(self, check_result):
+        """ send check_result to the connection"""
+        if not self._collected:
+            self._collected_since = time.monotonic()
+        self._collected.append(check_result)
+        # a small constant per result for the index and the status
+        self._collected_size += 16
+        if self._collected_size >= self.flush_size \
+                or time.monotonic() - self._collected_since >= self.flush_interval:
             self.flush()
 
     def flush(self):
-        if self._collectedChecks:
-            self._queue.put(tuple(self._collectedChecks.items()))
-        self._collectedChecks = None
+        if self._collected:
+            self._connection.send(tuple(self._collected))
+        self._collected = []
+        self._collected_size = 0
+        self._collected_since = None
 
 #This is the inverse of the serialization in WorkerToQueueReporter
-def check_protocol_from_worker_data(profile, key_check_data):
-    key, check_data = key_check_data
-    identity = profile.deserialize_identity(key)
-    yield STARTCHECK, None, identity  ## = event
-
-    for log in check_data['statuses']:
-        status = name2status[log['status']]
-        if 'code' in log:
-            message = Message(log['code'], log['message'])
-        elif 'traceback' in log:
-            # not to happy with this generic exception, let's se how it plays out
-            message = Exception(log['message'])
-            setattr(message, 'traceback', log['traceback'])
-        else:
-            message = log['message']
-        yield status, message, identity ### = event
+def check_protocol_from_worker_data(order, check_result, instrumentation=None):
+    index, result, logs, (check_record, conditions) = check_result
+    identity = order[index]
+    if instrumentation is not None:
+        check_key = instrumentation.get_check_key(identity)
+        instrumentation.add_check(check_key, check_record)
+        for key, record in conditions:
+            instrumentation.add_condition(key, record, check_key)
+    yield STARTCHECK, None, identity
+    for log in logs:
+        yield (*decode_check_log(log), identity)
+    yield ENDCHECK, STATUSES[result], identity ## = event
 
-    status = name2status[check_data['result']]
-    yield ENDCHECK, status, identity ## = event
-
-def _worker_jobs_generator(jobs_queue, profile, reporter):
+def _worker_jobs_generator(jobs_queue, order, reporter, worker_status):
     while True:
         try:
-            job = jobs_queue.get(False)
+            batch = jobs_queue.get(False)
         except queue.Empty:
+            worker_status[0] = IDLE
             # This removes a race condition.
             # The queue looks empty, apparently that must not be the actual case,
             # but since the parent process is counting results to decide when
-            # it's done, we flush here, besides the value of ticks_to_flush.
-            # before.
+            # it's done (and when to send more jobs), we flush here, besides
+            # the flush_size and flush_interval of the reporter.
             reporter.flush()
             # No held back results anymore, so parent process has complete control
             # and we won't block it in blocking waiting mode.
-            job = jobs_queue.get(True)
-        yield profile.deserialize_identity(job)
+            batch = jobs_queue.get(True)
+        for index in batch:
+            # For the watchdog of the parent process.
+            worker_status[1] = time.monotonic()
+            worker_status[0] = index
+            yield order[index]
 
-def multiprocessing_worker(jobs_queue, results_queue, profile_module_locator
-                         , runner_kwds):
+def multiprocessing_worker(jobs_queue, results_connection, worker_status
+                         , profile_module_locator, runner_kwds, order_digest
+                         , condition_values=None, jobs=None):
     profile = get_profile_from_module_locator(profile_module_locator)
-    runner = CheckRunner(profile, **runner_kwds)
-    reporter = WorkerToQueueReporter( results_queue
-                                    , profile=profile
+    runner = CheckRunner(profile, **dict(runner_kwds,
+                                         condition_values=condition_values))
+    order = runner.order
+    if get_order_digest(order) != order_digest:
+        raise SetupError('The check execution order of the worker differs'
+                         ' from the order of the parent process.')
+    reporter = WorkerToQueueReporter( results_connection
+                                    , order
                                     , runner=runner
-                                    , ticks_to_flush=5
                                     )
 
-    next_check_gen = _worker_jobs_generator(jobs_queue, profile, reporter)
+    if jobs is not None:
+        # All the jobs this worker (or the process it replaces) gets,
+        # so that the conditions of each font are released when the
+        # worker is done with it.
+        runner.expect_checks([order[index] for index in jobs])
+    next_check_gen = _worker_jobs_generator(jobs_queue, order, reporter
+                                          , worker_status)
     runner.run_externally_controlled(reporter.receive, next_check_gen)
 
 #####################
 # DISPATCHER/PARENT #
 #####################
 
-def _results_generator(results_queue, len_results):
-    count_results = 0
-    while True:
-        result_list = results_queue.get()
-        for result in result_list:
-            yield result
-            count_results += 1
-        if count_results >= len_results:
+# Jobs are sent to the workers in batches of indexes into the order. The
+# batch size adapts to the speed of the worker, aiming for batches that
+# take about BATCH_DURATION seconds to process.
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 512
+INITIAL_BATCH_SIZE = 8
+BATCH_DURATION = 0.25
+
+# The parent checks this often (seconds) whether a worker died or hangs.
+WATCHDOG_INTERVAL = 1
+# A worker aborts a check that exceeds its time budget itself. If it doesn't
+# (e.g. because the check is stuck in a C extension) within this many
+# seconds more, the worker is killed and replaced.
+WATCHDOG_GRACE = 5
+
+class JobDispatcher:
+    """Keeps the not yet dispatched jobs of each worker and sends them in
+    batches, so that each worker has about two batches to work on."""
+    def __init__(self, jobs_per_worker):
+        self._jobs_queues = [None] * len(jobs_per_worker)
+        self._pending = [deque(jobs) for jobs in jobs_per_worker]
+        # insertion ordered sets of the dispatched jobs without result
+        self._in_flight = [{} for _ in jobs_per_worker]
+        self._done = [0] * len(jobs_per_worker)
+        self._start = [None] * len(jobs_per_worker)
+        self._batch_size = [INITIAL_BATCH_SIZE] * len(jobs_per_worker)
+
+    def _update_batch_size(self, worker_id):
+        elapsed = time.monotonic() - self._start[worker_id]
+        if not elapsed or not self._done[worker_id]:
             return
+        rate = self._done[worker_id] / elapsed
+        self._batch_size[worker_id] = max(MIN_BATCH_SIZE,
+                          min(MAX_BATCH_SIZE, int(rate * BATCH_DURATION)))
 
-@contextmanager
-def _multiprocessing_checkrunner(jobs, process_count, *args):
-    jobs_queue = Queue()
-    results_queue = Queue()
-    for job in jobs:
-        jobs_queue.put(job)
-    len_jobs = len(jobs)
+    def dispatch(self, worker_id):
+        pending = self._pending[worker_id]
+        in_flight = self._in_flight[worker_id]
+        batch_size = self._batch_size[worker_id]
+        while pending and len(in_flight) < 2 * batch_size:
+            batch = [pending.popleft()
+                     for _ in range(min(batch_size, len(pending)))]
+            in_flight.update(dict.fromkeys(batch))
+            self._jobs_queues[worker_id].put(batch)
 
-    try:
-        processes = []
-        for _ in range(process_count):
-            p = Process(target=multiprocessing_worker,
-                        # NOTE: stuff is pickled here, but that
-                        # seems to be no problem despite of
-                        # e.g. pickling a profile (see #2982),
-                        # which was fixed by using profile.module_locator
-                        # instead. The other arguments seem easier
-                        # to pickle.
-                        args=(jobs_queue, results_queue, *args))
-            processes.append(p)
-            p.start()
-        yield _results_generator(results_queue, len_jobs) # next_check_gen
-    finally:
-        for p in processes:
+    def set_queue(self, worker_id, jobs_queue):
+        """(Re-)start dispatching to worker_id via jobs_queue. Jobs that
+        were dispatched to a previous queue, but have no result, are
+        dispatched again."""
+        in_flight = self._in_flight[worker_id]
+        self._pending[worker_id].extendleft(reversed(list(in_flight)))
+        in_flight.clear()
+        self._jobs_queues[worker_id] = jobs_queue
+        self._done[worker_id] = 0
+        self._start[worker_id] = time.monotonic()
+        self._batch_size[worker_id] = INITIAL_BATCH_SIZE
+        self.dispatch(worker_id)
+
+    def is_in_flight(self, worker_id, index):
+        return index in self._in_flight[worker_id]
+
+    def done(self, worker_id, indexes):
+        in_flight = self._in_flight[worker_id]
+        for index in indexes:
+            del in_flight[index]
+        self._done[worker_id] += len(indexes)
+        self._update_batch_size(worker_id)
+        self.dispatch(worker_id)
+
+# worker_status[0] when the worker is not running a check
+IDLE = -1
+
+# A worker that dies this many times in a row before running any check
+# (e.g. because the profile can't be imported) fails the run.
+MAX_STARTUP_FAILURES = 3
+
+class WorkerPool:
+    """Starts a worker process per list of jobs and yields their results.
+
+    A worker that dies, or that exceeds the time budget of a check (see
+    CheckRunner.get_check_timeout) by more than WATCHDOG_GRACE seconds, is
+    replaced by a new process. The check it was running is reported as
+    ERROR, the other jobs of the worker are executed by the new process.
+    If the processes of a worker die MAX_STARTUP_FAILURES times in a row
+    before running any check, SetupError is raised.
+
+    `condition_values_per_worker` are the condition values (see
+    CheckRunner.get_shared_condition_values) passed to the processes of
+    each worker.
+    """
+    def __init__(self, jobs_per_worker, worker_args, get_timeout=None
+               , condition_values_per_worker=None):
+        self._worker_args = worker_args
+        self._jobs_per_worker = jobs_per_worker
+        self._condition_values = (condition_values_per_worker
+                                  or [None] * len(jobs_per_worker))
+        self._get_timeout = get_timeout
+        self._dispatcher = JobDispatcher(jobs_per_worker)
+        # worker_id: (process, results connection, status)
+        self._workers = [None] * len(jobs_per_worker)
+        # worker_id: True once the current process sent results
+        self._has_results = [False] * len(jobs_per_worker)
+        # worker_id: number of processes in a row that died before running a check
+        self._startup_failures = [0] * len(jobs_per_worker)
+        self.len_jobs = sum(len(jobs) for jobs in jobs_per_worker)
+
+    def _spawn(self, worker_id):
+        jobs_queue = Queue()
+        reader, writer = Pipe(duplex=False)
+        # [index of the running job or IDLE, time.monotonic() of its start]
+        worker_status = RawArray('d', [IDLE, 0])
+        p = Process(target=multiprocessing_worker,
+                    # NOTE: stuff is pickled here, but that
+                    # seems to be no problem despite of
+                    # e.g. pickling a profile (see #2982),
+                    # which was fixed by using profile.module_locator
+                    # instead. The other arguments seem easier
+                    # to pickle.
+                    args=(jobs_queue, writer, worker_status, *self._worker_args,
+                          self._condition_values[worker_id],
+                          self._jobs_per_worker[worker_id]))
+        p.start()
+        # Only the worker can write, so reader gets an EOFError when it dies.
+        writer.close()
+        self._workers[worker_id] = (p, reader, worker_status)
+        self._has_results[worker_id] = False
+        self._dispatcher.set_queue(worker_id, jobs_queue)
+
+    def start(self):
+        for worker_id in range(len(self._workers)):
+            self._spawn(worker_id)
+
+    def terminate(self):
+        for worker in self._workers:
+            if worker is None:
+                continue
+            p, reader, _ = worker
             p.terminate()
             p.join()
+            reader.close()
+
+    def _receive(self, worker_id):
+        _, reader, _ = self._workers[worker_id]
+        result_list = reader.recv()
+        self._has_results[worker_id] = True
+        self._dispatcher.done(worker_id, [result[0] for result in result_list])
+        return result_list
+
+    def _replace(self, worker_id, code, message):
+        """Replace the worker, returns its last results and an ERROR
+        result for the check it was running."""
+        p, reader, worker_status = self._workers[worker_id]
+        index = int(worker_status[0])
+        p.terminate()
+        p.join()
+        results = []
+        # Results that were sent before the worker ended.
+        while True:
+            try:
+                if not reader.poll():
+                    break
+                results += self._receive(worker_id)
+            except (EOFError, OSError, pickle.UnpicklingError):
+                # The end, or a truncated message.
+                break
+        reader.close()
+        if index == IDLE and not self._has_results[worker_id]:
+            self._startup_failures[worker_id] += 1
+            if self._startup_failures[worker_id] >= MAX_STARTUP_FAILURES:
+                raise SetupError(f'The worker process died {MAX_STARTUP_FAILURES}'
+                                 f' times in a row before running any check'
+                                 f' (exit code {p.exitcode}).')
+        else:
+            self._startup_failures[worker_id] = 0
+        if index != IDLE and self._dispatcher.is_in_flight(worker_id, index):
+            logs = (encode_check_log(ERROR, Message(code, message)), )
+            results.append((index, _status2index[ERROR.name], logs, ({}, ())))
+            self._dispatcher.done(worker_id, [index])
+        self._spawn(worker_id)
+        return results
+
+    def _get_hung_workers(self):
+        if self._get_timeout is None:
+            return
+        now = time.monotonic()
+        for worker_id, (_, _, worker_status) in enumerate(self._workers):
+            index = worker_status[0]
+            started = worker_status[1]
+            if index == IDLE or index != worker_status[0]:
+                # idle, or just started the next check
+                continue
+            timeout = self._get_timeout(int(index))
+            if timeout and now - started > timeout + WATCHDOG_GRACE:
+                yield worker_id, timeout
+
+    def results(self):
+        count_results = 0
+        while count_results < self.len_jobs:
+            readers = {reader: worker_id
+                       for worker_id, (_, reader, _) in enumerate(self._workers)}
+            result_lists = []
+            for reader in wait(list(readers), timeout=WATCHDOG_INTERVAL):
+                worker_id = readers[reader]
+                try:
+                    result_lists.append(self._receive(worker_id))
+                except (EOFError, OSError):
+                    p, _, _ = self._workers[worker_id]
+                    p.join()
+                    result_lists.append(self._replace(worker_id, 'worker-died',
+                          f'The worker process running this check died'
+                          f' (exit code {p.exitcode}).'))
+            for worker_id, timeout in list(self._get_hung_workers()):
+                result_lists.append(self._replace(worker_id, 'timeout',
+                      f'The check was aborted, it exceeded its time budget'
+                      f' of {timeout:g} seconds and the worker process running'
+                      f' it did not respond.'))
+            for result_list in result_lists:
+                for result in result_list:
+                    yield result
+                    count_results += 1
+
+def get_affinity_key(identity):
+    """Check executions with the same affinity key share most of their
+    condition values, e.g. all checks of one font. That's the first item
+    of their iterargs, so checks that iterate over several iterargs are
+    still grouped by the first one.
+    Check executions without iterargs (e.g. family checks) share the
+    affinity key `()`.
+    """
+    _section, _check, iterargs = identity
+    return tuple(iterargs[:1])
+
+# Groups are split into chunks of at least this many jobs.
+MIN_CHUNK_SIZE = 4
+
+def _split_group(indexes, costs, count):
+    """Split indexes into `count` contiguous chunks of about the same cost."""
+    total = sum(costs[index] for index in indexes)
+    chunks = [[]]
+    cumulative = 0
+    for index in indexes:
+        if cumulative >= total * len(chunks) / count and len(chunks) < count:
+            chunks.append([])
+        chunks[-1].append(index)
+        cumulative += costs[index]
+    return chunks
 
-def multiprocessing_runner(process_count, runner, runner_kwds):
+def distribute_jobs(order, process_count, get_cost=None):
+    """Returns a list of at most `process_count` lists of indexes into
+    `order`.
+
+    All check executions with the same affinity key are assigned to the
+    same worker, so that each worker evaluates the conditions of "its"
+    iterargs (e.g. parses "its" fonts) and no other worker does the same
+    work again. Executions without iterargs, which typically depend on
+    derived iterables of all iterargs (e.g. `ttFonts`), are also kept
+    together, so only one worker needs to evaluate everything.
+    Only a group that costs more than a worker's share of the whole run
+    (e.g. when checking a single font) is split.
+
+    `get_cost(index)` is the estimated cost of order[index], by default
+    all check executions cost the same. The groups are assigned, most
+    expensive first, to the worker with the least costs so far (i.e.
+    longest-processing-time-first scheduling). Within a worker the
+    original order is kept.
+    """
+    costs = [get_cost(index) if get_cost else 1 for index in range(len(order))]
+    groups = OrderedDict()
+    for index, identity in enumerate(order):
+        groups.setdefault(get_affinity_key(identity), []).append(index)
+
+    share = sum(costs) / process_count
+    chunks = []
+    for indexes in groups.values():
+        cost = sum(costs[index] for index in indexes)
+        count = min(math.ceil(cost / share) if share else 1,
+                    len(indexes) // MIN_CHUNK_SIZE)
+        if count > 1:
+            chunks += _split_group(indexes, costs, count)
+        else:
+            chunks.append(indexes)
+
+    worker_count = min(process_count, len(chunks))
+    workers = [[0, []] for _ in range(worker_count)]
+    chunks.sort(key=lambda indexes: sum(costs[index] for index in indexes),
+                reverse=True)
+    for indexes in chunks:
+        worker = min(workers, key=lambda worker: worker[0])
+        worker[0] += sum(costs[index] for index in indexes)
+        worker[1] += indexes
+    return [sorted(indexes) for _, indexes in workers]
+
+def _canonical_order(results):
+    """Yields the results (tuples starting with their index in the order)
+    in the order of their indexes, as soon as possible. Reporters receive
+    the results in the same order as from a single process run, no matter
+    how the check executions were scheduled."""
+    held_back = {}
+    next_index = 0
+    for result in results:
+        held_back[result[0]] = result
+        while next_index in held_back:
+            yield held_back.pop(next_index)
+            next_index += 1
+
+@contextmanager
+def _multiprocessing_checkrunner(jobs_per_worker, *args, get_timeout=None
+                               , condition_values_per_worker=None):
+    pool = WorkerPool(jobs_per_worker, args, get_timeout
+                    , condition_values_per_worker)
+    try:
+        pool.start()
+        yield pool.results() # next_check_gen
+    finally:
+        pool.terminate()
+
+def multiprocessing_runner(process_count, runner, runner_kwds
+                         , timing_history=None):
     # process_count is a positive int, never 0 at this point
     assert process_count > 0
     profile = runner.profile
-    joblist = list(profile.serialize_order(runner.order))
+    order = runner.order
+    get_cost = None
+    if timing_history is not None:
+        def get_cost(index):
+            return timing_history.get_identity_cost(runner, order[index])
+    jobs_per_worker = distribute_jobs(order, process_count, get_cost)
 
     session_gen = session_protocol_generator(
-                      partial(check_protocol_from_worker_data, profile),
-                      runner.order)
-    with _multiprocessing_checkrunner(joblist,
-                                      process_count,
+                      partial(check_protocol_from_worker_data, order,
+                              instrumentation=runner.instrumentation),
+                      order)
+    def get_timeout(index):
+        _, check, _ = order[index]
+        return runner.get_check_timeout(check)
+
+    # The parent evaluates the shared conditions (e.g. font_facts) that the
+    # jobs of more than one worker need, instead of each of these workers
+    # evaluating them again. Each worker only gets the values its jobs need.
+    condition_values = runner.get_shared_condition_values(jobs_per_worker)
+    with _multiprocessing_checkrunner(jobs_per_worker,
                                       profile.module_locator,
-                                      runner_kwds) as next_check_gen:
-        yield from drive_session_protocol(session_gen, next_check_gen)
+                                      runner_kwds,
+                                      get_order_digest(order),
+                                      get_timeout=get_timeout,
+                                      condition_values_per_worker=condition_values
+                                      ) as results:
+        yield from drive_session_protocol(session_gen, _canonical_order(results))
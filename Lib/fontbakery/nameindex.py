@@ -0,0 +1,81 @@
+"""
+An index of the records of a name table.
+
+`utils.get_name_entries` and `utils.get_name_entry_strings` are called
+hundreds of times per font by the name related checks. Instead of scanning
+all records and decoding the matches on every call, they use the `NameIndex`
+of the font's name table: the records grouped by nameID and by the full key
+(nameID, platformID, encodingID, langID), each string decoded only once.
+
+The index is kept on the TTFont object and goes away with it. It notices
+records that were added, removed or replaced, and a new name table. Records
+edited in place are not noticed, checks don't do that; code that does (e.g.
+a code-test between two runs of a check) calls `clear_name_index`.
+"""
+from operator import attrgetter
+
+_record_key = attrgetter("nameID", "platformID", "platEncID", "langID")
+
+# The attribute of the TTFont that holds its NameIndex.
+_ATTRIBUTE = "_fontbakery_name_index"
+
+
+class NameIndex:
+    def __init__(self, table):
+        self.table = table
+        self._build(table.names)
+
+    def _build(self, names):
+        self._names = names
+        self._length = len(names)
+        self._records = list(names)
+        self._keys = list(map(_record_key, self._records))
+        self._strings = {}
+        self._by_name_id = {}
+        self._by_key = {}
+        for position, key in enumerate(self._keys):
+            self._by_name_id.setdefault(key[0], []).append(position)
+            self._by_key.setdefault(key, []).append(position)
+
+    def _positions(self, nameID, platformID, encodingID, langID):
+        names = self.table.names
+        if names is not self._names or len(names) != self._length:
+            self._build(names)
+        if platformID is not None and encodingID is not None and langID is not None:
+            return self._by_key.get((nameID, platformID, encodingID, langID), ())
+        keys = self._keys
+        return [position for position in self._by_name_id.get(nameID, ())
+                if (platformID is None or keys[position][1] == platformID)
+                and (encodingID is None or keys[position][2] == encodingID)
+                and (langID is None or keys[position][3] == langID)]
+
+    def entries(self, nameID, platformID=None, encodingID=None, langID=None):
+        """The name records that match, in the order of the table."""
+        positions = self._positions(nameID, platformID, encodingID, langID)
+        return [self._records[position] for position in positions]
+
+    def strings(self, nameID, platformID=None, encodingID=None, langID=None):
+        """The decoded strings of the name records that match."""
+        result = []
+        for position in self._positions(nameID, platformID, encodingID, langID):
+            string = self._strings.get(position)
+            if string is None:
+                record = self._records[position]
+                string = self._strings[position] = record.string.decode(record.getEncoding())
+            result.append(string)
+        return result
+
+
+def get_name_index(font):
+    """Returns the NameIndex of the name table of `font`."""
+    table = font["name"]
+    index = vars(font).get(_ATTRIBUTE)
+    if index is None or index.table is not table:
+        index = NameIndex(table)
+        setattr(font, _ATTRIBUTE, index)
+    return index
+
+
+def clear_name_index(font):
+    """Drops the index of `font`, it is built again on next use."""
+    vars(font).pop(_ATTRIBUTE, None)
@@ -0,0 +1,285 @@
+"""
+Font Bakery network is the shared HTTP client of checks and conditions.
+
+It provides:
+  - a pooled `requests.Session`, so that connections are reused,
+  - concurrent requests, bounded by MAX_CONCURRENT_REQUESTS,
+  - deduplication: identical GET and HEAD requests (same URL and
+    arguments) made while one of them is in flight are sent only once,
+    e.g. a link that appears in the metadata of all fonts of a family.
+    Once a request is done, the next identical one is sent again (or
+    served by the HTTP cache),
+  - optionally, an on-disk HTTP cache shared across runs: responses are
+    reused while they are fresh (Cache-Control max-age or Expires) and
+    revalidated with their ETag or Last-Modified date afterwards. In
+    offline mode all requests are served from the cache, anything that
+    is not cached fails with an OfflineError.
+
+usage:
+>> from fontbakery.network import get, request_all
+>> response = get('https://pypi.org/pypi/fontbakery/json')
+>> for url, response in request_all('HEAD', urls, allow_redirects=True).items():
+>>     if isinstance(response, Exception):
+>>         ...
+
+The HTTP cache and the offline mode are configured with environment
+variables, so that the worker processes of a run inherit them:
+  FONTBAKERY_HTTP_CACHE=DIRECTORY (or 1 for the usual location)
+  FONTBAKERY_OFFLINE=1
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from functools import partial
+import os
+import threading
+import time
+
+import requests
+
+from fontbakery.cache import PersistentCache, get_default_cache_dir
+
+# Only as many requests as the connection pool can hold.
+MAX_CONCURRENT_REQUESTS = 16
+# seconds, unless the caller sets a timeout
+DEFAULT_TIMEOUT = 10
+
+HTTP_CACHE_ENV = "FONTBAKERY_HTTP_CACHE"
+OFFLINE_ENV = "FONTBAKERY_OFFLINE"
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+# {request key: Future}, of the GET and HEAD requests in flight
+_requests = {}
+# {directory: PersistentCache}
+_http_caches = {}
+
+
+class OfflineError(requests.exceptions.ConnectionError):
+    """A request in offline mode that can't be served from the HTTP cache."""
+
+
+def _reset():
+    """Threads and connections are not inherited by forked processes
+    (e.g. multiprocessing workers), neither are requests in progress."""
+    global _session, _executor, _lock  # pylint: disable=global-statement
+    _lock = threading.Lock()
+    _session = None
+    _executor = None
+    _requests.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset)
+
+
+def get_session():
+    """The requests.Session shared by all requests of this process."""
+    global _session  # pylint: disable=global-statement
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=MAX_CONCURRENT_REQUESTS,
+                pool_maxsize=MAX_CONCURRENT_REQUESTS,
+            )
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _get_executor():
+    global _executor  # pylint: disable=global-statement
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENT_REQUESTS,
+                thread_name_prefix="fontbakery-network",
+            )
+        return _executor
+
+
+def configure(http_cache=None, offline=False):
+    """Enable the HTTP cache in the directory http_cache ("1" for the
+    usual location) and/or the offline mode, for this process and the
+    processes it starts."""
+    if http_cache:
+        os.environ[HTTP_CACHE_ENV] = http_cache
+    if offline:
+        os.environ[OFFLINE_ENV] = "1"
+
+
+def is_offline():
+    return os.environ.get(OFFLINE_ENV, "") not in ("", "0")
+
+
+def get_http_cache():
+    """The PersistentCache of HTTP responses or None, if not enabled. The
+    offline mode uses the usual location, unless a directory is set."""
+    directory = os.environ.get(HTTP_CACHE_ENV, "")
+    if directory in ("", "0"):
+        if not is_offline():
+            return None
+        directory = "1"
+    if directory == "1":
+        directory = get_default_cache_dir()
+    with _lock:
+        cache = _http_caches.get(directory)
+        if cache is None:
+            cache = _http_caches[directory] = PersistentCache(directory, namespace="http")
+        return cache
+
+
+def _get_max_age(headers):
+    """Seconds the response is fresh, None if it must not be stored."""
+    directives = {}
+    for directive in headers.get("Cache-Control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    try:
+        if "max-age" in directives:
+            return max(0, int(directives["max-age"]))
+        if "Expires" in headers:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+            return max(0, expires - time.time())
+    except (TypeError, ValueError):
+        pass
+    return 0
+
+
+def _fetch(method, url, kwargs, name=None, derive=None):
+    """Performs the request, through the HTTP cache if enabled. Returns the
+    Response or, if derive is set, derive(response). The cache stores the
+    value that is returned."""
+    cache = get_http_cache()
+    if (
+        cache is None
+        or method not in CACHEABLE_METHODS
+        or "data" in kwargs
+        or "json" in kwargs
+    ):
+        if is_offline():
+            raise OfflineError(f"Can't {method} {url} in offline mode.")
+        response = get_session().request(method, url, **kwargs)
+        return derive(response) if derive else response
+
+    key_kwargs = {k: v for k, v in kwargs.items() if k != "timeout"}
+    key = cache.make_key("http", name, *_get_request_key(method, url, key_kwargs))
+    hit, entry = cache.get(key)
+    if hit and (is_offline() or time.time() - entry["fetched"] < entry["max_age"]):
+        return entry["value"]
+    if is_offline():
+        raise OfflineError(f"{method} {url} is not in the HTTP cache (offline mode).")
+
+    headers = dict(kwargs.get("headers") or {})
+    if hit and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if hit and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    response = get_session().request(method, url, **dict(kwargs, headers=headers))
+    max_age = _get_max_age(response.headers)
+    if hit and response.status_code == requests.codes.not_modified:
+        if max_age is not None:
+            entry.update(fetched=time.time(), max_age=max_age)
+            cache.set(key, entry)
+        return entry["value"]
+
+    value = derive(response) if derive else response
+    if response.status_code == requests.codes.ok and max_age is not None:
+        cache.set(
+            key,
+            {
+                "value": value,
+                "fetched": time.time(),
+                "max_age": max_age,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            },
+        )
+    return value
+
+
+def _get_request_key(method, url, kwargs):
+    return method.upper(), url, repr(sorted(kwargs.items()))
+
+
+def _forget(key, future):
+    with _lock:
+        if _requests.get(key) is future:
+            del _requests[key]
+
+
+def _submit(key, method, *args):
+    executor = _get_executor()
+    if method not in CACHEABLE_METHODS:
+        return executor.submit(_fetch, method, *args)
+    with _lock:
+        future = _requests.get(key)
+        if future is not None:
+            return future
+        future = _requests[key] = executor.submit(_fetch, method, *args)
+    # Outside of the lock, the callback runs right away if it is done.
+    future.add_done_callback(partial(_forget, key))
+    return future
+
+
+def submit(method, url, **kwargs):
+    """Start the request (see `requests.Session.request` for the
+    arguments) in the background, unless an identical GET or HEAD
+    request is in flight, returns a concurrent.futures.Future of the
+    Response."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    method = method.upper()
+    return _submit(_get_request_key(method, url, kwargs), method, url, kwargs)
+
+
+def request(method, url, **kwargs):
+    """Like `requests.request`, but pooled and deduplicated. Raises the
+    exceptions of `requests`."""
+    return submit(method, url, **kwargs).result()
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def head(url, **kwargs):
+    return request("HEAD", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def get_derived(url, name, derive, **kwargs):
+    """GET url and return derive(response). The HTTP cache stores the
+    (picklable) result of derive under name instead of the response, e.g.
+    the files extracted from a downloaded zip archive."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    key = ("derived", name) + _get_request_key("GET", url, kwargs)
+    return _submit(key, "GET", url, kwargs, name, derive).result()
+
+
+def request_all(method, urls, **kwargs):
+    """Request all urls concurrently. Returns an OrderedDict, in the order
+    of urls, of url: Response, or the exception the request raised."""
+    futures = OrderedDict((url, submit(method, url, **kwargs)) for url in urls)
+    results = OrderedDict()
+    for url, future in futures.items():
+        try:
+            results[url] = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            results[url] = e
+    return results
+
+
+def clear():
+    """Forget the requests in flight, the next identical request will be
+    sent again."""
+    _requests.clear()
@@ -68,6 +68,10 @@ class Profile:
     file.
     """
     configuration_defaults = {}
+    # Glob patterns, relative to the directory of each input file, of the
+    # other files the checks read, e.g. sent along to the workers of a
+    # distributed run.
+    auxiliary_files = ()
 
     def __init__(
         self,
@@ -983,6 +987,15 @@ class Profile:
         """
         self._check_skip_filter = check_skip_filter
 
+    def before_check(self, check, args):
+        """Called just before `check` runs, with the `args` it gets.
+
+        The conditions among `args` are evaluated at this point. Profiles
+        can override this to tell caches of their domain that the values
+        may have been changed since, by previous checks or by the
+        conditions. The default does nothing.
+        """
+
     @staticmethod
     def serialize_identity(identity):
         """Return a json string that can also  be used as a key.
@@ -1175,6 +1188,7 @@ def check_log_override(check, new_id, overrides, reason=None):
         documentation=(f"{reason}\n" f"\n" f"{check.documentation}")
         if reason and check.documentation
         else (reason or check.documentation or None),
+        persistent=check.persistent,
     )
 
     # reconstruct a proper doc string from the changes we made.
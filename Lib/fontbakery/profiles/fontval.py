@@ -92,8 +92,8 @@ def com_google_fonts_check_fontvalidator(font):
         "The device table's DeltaFormat value is invalid"
     ]
 
-    from fontTools.ttLib import TTFont
-    if is_variable_font(TTFont(font)):
+    from fontbakery.utils import open_ttfont
+    if is_variable_font(open_ttfont(font)):
         disabled_fval_checks.extend(VARFONT_disabled_fval_checks)
 
     report_dir = tempfile.TemporaryDirectory(prefix="fontval-")
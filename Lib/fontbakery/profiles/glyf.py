@@ -97,15 +97,13 @@ def com_google_fonts_check_points_out_of_bounds(ttFont, config):
 )
 def com_google_fonts_check_glyf_non_transformed_duplicate_components(ttFont, config):
     """Check glyphs do not have duplicate components which have the same x,y coordinates."""
+    from fontbakery.glyphgraph import get_component_graph
     from fontbakery.utils import pretty_print_list
+    graph = get_component_graph(ttFont)
     failed = []
-    for glyph_name in ttFont['glyf'].keys():
-        glyph = ttFont['glyf'][glyph_name]
-        if not glyph.isComposite():
-            continue
-
+    for glyph_name in graph.composites:
         seen = []
-        for comp in glyph.components:
+        for comp in graph.components(glyph_name):
             comp_info = {
                 "glyph": glyph_name,
                 "component": comp.glyphName,
@@ -15,8 +15,6 @@ from fontbakery.constants import (NameID,
                                   MacintoshLanguageID,
                                   LATEST_TTFAUTOHINT_VERSION)
 from .googlefonts_conditions import * # pylint: disable=wildcard-import,unused-wildcard-import
-from glyphsets import codepoints
-ENCODINGS_DIR = codepoints.nam_dir
 
 
 profile_imports = ('fontbakery.profiles.universal',)
@@ -233,11 +231,10 @@ GOOGLEFONTS_PROFILE_CHECKS = \
 )
 def com_google_fonts_check_canonical_filename(font):
     """Checking file is named canonically."""
-    from fontTools.ttLib import TTFont
     from .shared_conditions import (is_variable_font,
                                     variable_font_filename)
     from .googlefonts_conditions import canonical_stylename
-    from fontbakery.utils import suffix
+    from fontbakery.utils import open_ttfont, suffix
     from fontbakery.constants import STATIC_STYLE_NAMES
 
     failed = False
@@ -249,7 +246,7 @@ def com_google_fonts_check_canonical_filename(font):
                       f' It must not contain underscore characters!')
         return
 
-    ttFont = TTFont(font)
+    ttFont = open_ttfont(font)
     if is_variable_font(ttFont):
         if suffix(font) in STATIC_STYLE_NAMES:
             failed = True
@@ -308,9 +305,10 @@ def com_google_fonts_check_canonical_filename(font):
 def com_google_fonts_check_description_broken_links(description_html):
     """Does DESCRIPTION file contain broken links?"""
     import requests
-    from lxml import etree
+    from fontbakery.network import OfflineError, request_all
     doc = description_html
     broken_links = []
+    unchecked_links = []
     unique_links = []
     for a_href in doc.iterfind('.//a[@href]'):
         link = a_href.get("href")
@@ -328,8 +326,20 @@ def com_google_fonts_check_description_broken_links(description_html):
             continue
 
         unique_links.append(link)
-        try:
-            response = requests.head(link, allow_redirects=True, timeout=10)
+
+    # All links are requested concurrently.
+    responses = request_all("HEAD", unique_links, allow_redirects=True, timeout=10)
+    for link, response in responses.items():
+        if isinstance(response, OfflineError):
+            unchecked_links.append(link)
+        elif isinstance(response, requests.exceptions.Timeout):
+            yield WARN,\
+                  Message("timeout",
+                          f"Timedout while attempting to access: '{link}'."
+                          f" Please verify if that's a broken link.")
+        elif isinstance(response, requests.exceptions.RequestException):
+            broken_links.append(link)
+        else:
             code = response.status_code
             # Status 429: "Too Many Requests" is acceptable
             # because it means the website is probably ok and
@@ -337,13 +347,14 @@ def com_google_fonts_check_description_broken_links(description_html):
             if code not in [requests.codes.ok,
                             requests.codes.too_many_requests]:
                 broken_links.append(f"{link} (status code: {code})")
-        except requests.exceptions.Timeout:
-            yield WARN,\
-                  Message("timeout",
-                          f"Timedout while attempting to access: '{link}'."
-                          f" Please verify if that's a broken link.")
-        except requests.exceptions.RequestException:
-            broken_links.append(link)
+
+    if unchecked_links:
+        unchecked_links_list = '\n\t'.join(unchecked_links)
+        yield INFO,\
+              Message("offline",
+                      f"The following links in the DESCRIPTION file were not"
+                      f" checked in offline mode:\n\t"
+                      f"{unchecked_links_list}")
 
     if len(broken_links) > 0:
         broken_links_list = '\n\t'.join(broken_links)
@@ -352,7 +363,7 @@ def com_google_fonts_check_description_broken_links(description_html):
                       f"The following links are broken"
                       f" in the DESCRIPTION file:\n\t"
                       f"{broken_links_list}")
-    else:
+    elif not unchecked_links:
         yield PASS, "All links in the DESCRIPTION file look good!"
 
 
@@ -564,7 +575,8 @@ def com_google_fonts_check_description_eof_linebreak(description):
     rationale = """
         The purpose of this check is to ensure that the METADATA.pb file is not malformed.
     """,
-    proposal = 'https://github.com/googlefonts/fontbakery/issues/2248'
+    proposal = 'https://github.com/googlefonts/fontbakery/issues/2248',
+    persistent = False
 )
 def com_google_fonts_check_metadata_parses(family_directory):
     """Check METADATA.pb parse correctly."""
@@ -660,7 +672,9 @@ def com_google_fonts_check_metadata_designer_values(family_metadata):
 def com_google_fonts_check_metadata_broken_links(family_metadata):
     """Does METADATA.pb copyright field contain broken links?"""
     import requests
+    from fontbakery.network import OfflineError, request_all
     broken_links = []
+    unchecked_links = []
     unique_links = []
     for font_metadata in family_metadata.fonts:
         copyright = font_metadata.copyright
@@ -687,22 +701,36 @@ def com_google_fonts_check_metadata_broken_links(family_metadata):
                 continue
 
             unique_links.append(link)
-            try:
-                response = requests.head(link, allow_redirects=True, timeout=10)
-                code = response.status_code
-                # Status 429: "Too Many Requests" is acceptable
-                # because it means the website is probably ok and
-                # we're just perhaps being too agressive in probing the server!
-                if code not in [requests.codes.ok,
-                                requests.codes.too_many_requests]:
-                    broken_links.append(("{} (status code: {})").format(link, code))
-            except requests.exceptions.Timeout:
-                yield WARN,\
-                      Message("timeout",
-                              f"Timed out while attempting to access: '{link}'."
-                              f" Please verify if that's a broken link.")
-            except requests.exceptions.RequestException:
-                broken_links.append(link)
+
+    # All links are requested concurrently.
+    links = [link for link in unique_links if "mailto:" not in link]
+    responses = request_all("HEAD", links, allow_redirects=True, timeout=10)
+    for link, response in responses.items():
+        if isinstance(response, OfflineError):
+            unchecked_links.append(link)
+        elif isinstance(response, requests.exceptions.Timeout):
+            yield WARN,\
+                  Message("timeout",
+                          f"Timed out while attempting to access: '{link}'."
+                          f" Please verify if that's a broken link.")
+        elif isinstance(response, requests.exceptions.RequestException):
+            broken_links.append(link)
+        else:
+            code = response.status_code
+            # Status 429: "Too Many Requests" is acceptable
+            # because it means the website is probably ok and
+            # we're just perhaps being too agressive in probing the server!
+            if code not in [requests.codes.ok,
+                            requests.codes.too_many_requests]:
+                broken_links.append(("{} (status code: {})").format(link, code))
+
+    if unchecked_links:
+        unchecked_links_list = '\n\t'.join(unchecked_links)
+        yield INFO,\
+              Message("offline",
+                      f"The following links in the METADATA.pb file were not"
+                      f" checked in offline mode:\n\t"
+                      f"{unchecked_links_list}")
 
     if len(broken_links) > 0:
         broken_links_list = '\n\t'.join(broken_links)
@@ -711,7 +739,7 @@ def com_google_fonts_check_metadata_broken_links(family_metadata):
                       f"The following links are broken"
                       f" in the METADATA.pb file:\n\t"
                       f"{broken_links_list}")
-    else:
+    elif not unchecked_links:
         yield PASS, "All links in the METADATA.pb file look good!"
 
 
@@ -1092,8 +1120,9 @@ def com_google_fonts_check_glyph_coverage(ttFont, font_codepoints, config):
 )
 def com_google_fonts_check_metadata_unsupported_subsets(family_metadata, ttFont, font_codepoints):
     """Check for METADATA subsets with zero support."""
+    from glyphsets import codepoints
     from glyphsets.subsets import SUBSETS
-    codepoints.set_encoding_path(ENCODINGS_DIR)
+    codepoints.set_encoding_path(codepoints.nam_dir)
 
     passed = True
     for subset in family_metadata.subsets:
@@ -3728,18 +3757,19 @@ def com_google_fonts_check_name_copyright_length(ttFont):
         that is http://namecheck.fontdata.com
     """,
     conditions = ["familyname"],
-    proposal = 'https://github.com/googlefonts/fontbakery/issues/494'
+    proposal = 'https://github.com/googlefonts/fontbakery/issues/494',
+    persistent = False
 )
 def com_google_fonts_check_fontdata_namecheck(ttFont, familyname):
     """Familyname must be unique according to namecheck.fontdata.com"""
-    import requests
+    from fontbakery import network
     FB_ISSUE_TRACKER = "https://github.com/googlefonts/fontbakery/issues"
     NAMECHECK_URL = "http://namecheck.fontdata.com"
     try:
         # Since October 2019, it seems that we need to fake our user-agent
         # in order to get correct query results
         FAKE = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1)'
-        response = requests.post(NAMECHECK_URL,
+        response = network.post(NAMECHECK_URL,
                                  params={'q': familyname},
                                  headers={'User-Agent': FAKE},
                                  timeout=10)
@@ -3866,14 +3896,13 @@ def com_google_fonts_check_negative_advance_width(ttFont):
 )
 def com_google_fonts_check_glyf_nested_components(ttFont, config):
     """Check glyphs do not have components which are themselves components."""
+    from fontbakery.glyphgraph import get_component_graph
     from fontbakery.utils import pretty_print_list
+    graph = get_component_graph(ttFont)
     failed = []
-    for glyph_name in ttFont['glyf'].keys():
-        glyph = ttFont['glyf'][glyph_name]
-        if not glyph.isComposite():
-            continue
-        for comp in glyph.components:
-            if ttFont['glyf'][comp.glyphName].isComposite():
+    for glyph_name in graph.composites:
+        for comp_name in graph.component_names(glyph_name):
+            if graph.is_composite(comp_name):
                 failed.append(glyph_name)
     if failed:
         formatted_list = "\t* " + pretty_print_list(config,
@@ -4354,18 +4383,9 @@ def com_google_fonts_check_ligature_carets(ttFont, ligature_glyphs):
 )
 def com_google_fonts_check_kerning_for_non_ligated_sequences(ttFont, config, ligatures, has_kerning_info):
     """Is there kerning info for non-ligated sequences?"""
+    from fontbakery.kerning import get_kerning
     from fontbakery.utils import bullet_list
 
-    def look_for_nonligated_kern_info(table):
-        for pairpos in table.SubTable:
-            for i, glyph in enumerate(pairpos.Coverage.glyphs):
-                if not hasattr(pairpos, 'PairSet'):
-                    continue
-                for pairvalue in pairpos.PairSet[i].PairValueRecord:
-                    kern_pair = (glyph, pairvalue.SecondGlyph)
-                    if kern_pair in ligature_pairs:
-                        ligature_pairs.remove(kern_pair)
-
     def ligatures_sequences(pairs):
         return [f"{first} + {second}" for first, second in pairs]
 
@@ -4377,21 +4397,17 @@ def com_google_fonts_check_kerning_for_non_ligated_sequences(ttFont, config, lig
                       " For more info, read:"
                       " https://github.com/googlefonts/fontbakery/issues/1596")
     else:
-        ligature_pairs = []
+        # The pairs, in order and without duplicates
+        ligature_pairs = {}
         for first, comp in ligatures.items():
             for components in comp:
-                while components:
-                    pair = (first, components[0])
-                    if pair not in ligature_pairs:
-                        ligature_pairs.append(pair)
-                    first = components[0]
-                    components.pop(0)
-
-        for record in ttFont["GSUB"].table.FeatureList.FeatureRecord:
-            if record.FeatureTag == 'kern':
-                for index in record.Feature.LookupListIndex:
-                    lookup = ttFont["GSUB"].table.LookupList.Lookup[index]
-                    look_for_nonligated_kern_info(lookup)
+                for component in components:
+                    ligature_pairs[(first, component)] = None
+                    first = component
+
+        kerning = get_kerning(ttFont)
+        ligature_pairs = [pair for pair in ligature_pairs
+                          if not kerning.kerns(*pair)]
 
         if ligature_pairs:
             yield WARN,\
@@ -4702,10 +4718,10 @@ def com_google_fonts_check_repo_dirname_match_nameid_1(fonts,
                                                        gfonts_repo_structure):
     """Directory name in GFonts repo structure must
        match NameID 1 of the regular."""
-    from fontTools.ttLib import TTFont
     from fontbakery.utils import (get_name_entry_strings,
                                   get_absolute_path,
-                                  get_regular)
+                                  get_regular,
+                                  open_ttfont)
     regular = get_regular(fonts)
     if not regular:
         yield FAIL,\
@@ -4716,7 +4732,7 @@ def com_google_fonts_check_repo_dirname_match_nameid_1(fonts,
                       " https://github.com/googlefonts/gf-docs/tree/main/Spec#single-weight-families")
         return
 
-    entry = get_name_entry_strings(TTFont(regular), NameID.FONT_FAMILY_NAME)[0]
+    entry = get_name_entry_strings(open_ttfont(regular), NameID.FONT_FAMILY_NAME)[0]
     expected = entry.lower()
     expected = "".join(expected.split(' '))
     expected = "".join(expected.split('-'))
@@ -4743,7 +4759,8 @@ def com_google_fonts_check_repo_dirname_match_nameid_1(fonts,
         These files are meant to be served for users that still lack support for
         variable fonts in their web browsers.
     """,
-    proposal = 'https://github.com/googlefonts/fontbakery/issues/2654'
+    proposal = 'https://github.com/googlefonts/fontbakery/issues/2654',
+    persistent = False
 )
 def com_google_fonts_check_repo_vf_has_static_fonts(family_directory):
     """A static fonts directory with at least two fonts must accompany variable fonts"""
@@ -4772,7 +4789,8 @@ def com_google_fonts_check_repo_vf_has_static_fonts(family_directory):
         A FontBakery report is ephemeral and so should be used for posting issues on a
         bug-tracker instead of being hosted in the font project repository.
     """,
-    proposal = 'https://github.com/googlefonts/fontbakery/issues/2888'
+    proposal = 'https://github.com/googlefonts/fontbakery/issues/2888',
+    persistent = False
 )
 def com_google_fonts_check_repo_fb_report(family_directory):
     """A font repository should not include fontbakery report files"""
@@ -4827,7 +4845,8 @@ def com_google_fonts_check_repo_upstream_yaml_has_required_fields(upstream_yaml)
         Note: a source purist position is that only source files and build scripts
         should be checked in.
     """,
-    proposal = 'https://github.com/googlefonts/fontbakery/issues/2903'
+    proposal = 'https://github.com/googlefonts/fontbakery/issues/2903',
+    persistent = False
 )
 def com_google_fonts_check_repo_zip_files(family_directory, config):
     """A font repository should not include ZIP files"""
@@ -5214,10 +5233,9 @@ def com_google_fonts_check_cjk_vertical_metrics_regressions(regular_ttFont, regu
     """,
     proposal = 'https://github.com/googlefonts/fontbakery/pull/3214'
 )
-def com_google_fonts_check_cjk_not_enough_glyphs(ttFont):
+def com_google_fonts_check_cjk_not_enough_glyphs(get_cjk_glyphs):
     """Does the font contain less than 40 CJK characters?"""
-    from .shared_conditions import get_cjk_glyphs
-    cjk_glyphs = get_cjk_glyphs(ttFont)
+    cjk_glyphs = get_cjk_glyphs
     cjk_glyph_count = len(cjk_glyphs)
     if cjk_glyph_count > 0 and cjk_glyph_count < 40:
         if cjk_glyph_count == 1:
@@ -5395,9 +5413,10 @@ def com_google_fonts_check_varfont_unsupported_axes(ttFont):
 )
 def com_google_fonts_check_varfont_grade_reflow(ttFont, config):
     """ Ensure VFs with the GRAD axis do not vary horizontal advance. """
+    import numpy as np
+    from fontbakery.kerning import get_kerning
     from fontbakery.profiles.shared_conditions import grad_axis
-    from fontbakery.utils import (all_kerning,
-                                  pretty_print_list)
+    from fontbakery.utils import pretty_print_list
     if not grad_axis(ttFont):
         yield SKIP,\
               Message("no-grad",
@@ -5441,24 +5460,30 @@ def com_google_fonts_check_varfont_grade_reflow(ttFont, config):
 
         # Some regions vary *something* along the GRAD axis. But what?
         if effective_regions:
-            kerning = all_kerning(ttFont)
-            for left, right, v1, v2 in kerning:
-                if v1 and hasattr(v1, "XAdvDevice") and v1.XAdvDevice:
-                    variation = [v1.XAdvDevice.StartSize, v1.XAdvDevice.EndSize]
-                    regions = varstore.VarData[variation[0]].VarRegionIndex
-                    if any(region in effective_regions for region in regions):
-                        deltas = varstore.VarData[variation[0]].Item[variation[1]]
-                        effective_deltas = [deltas[ix]
-                                            for ix, region in enumerate(regions)
-                                            if region in effective_regions]
-                        if any(x for x in effective_deltas):
-                            yield FAIL,\
-                                  Message("grad-kern-causes-reflow",
-                                          f"Kerning rules cause variation in"
-                                          f" horizontal advance on the GRAD axis"
-                                          f" (e.g. {left}/{right})")
-                            bad_kerning = True
-                            break
+            # The VarStore indices (packed like fontbakery.kerning.variation_index)
+            # of the deltas that vary along the GRAD axis
+            varying = []
+            for outer, vardata in enumerate(varstore.VarData):
+                regions = vardata.VarRegionIndex
+                if not any(region in effective_regions for region in regions):
+                    continue
+                for inner, deltas in enumerate(vardata.Item):
+                    if any(deltas[ix] for ix, region in enumerate(regions)
+                           if region in effective_regions):
+                        varying.append((outer << 16) | inner)
+
+            if varying:
+                kerning = get_kerning(ttFont)
+                pairs = kerning.pairs_where(1, "XAdvDevice",
+                                            lambda values: np.isin(values, varying))
+                for left, right, _, _ in pairs:
+                    yield FAIL,\
+                          Message("grad-kern-causes-reflow",
+                                  f"Kerning rules cause variation in"
+                                  f" horizontal advance on the GRAD axis"
+                                  f" (e.g. {left}/{right})")
+                    bad_kerning = True
+                    break
 
     # Check kerning here
     if not bad_glyphs and not bad_kerning:
@@ -5733,13 +5758,13 @@ def com_google_fonts_check_metadata_consistent_axis_enumeration(family_metadata,
 def com_google_fonts_check_STAT_axis_order(fonts):
     """ Check axis ordering on the STAT table. """
     from collections import Counter
-    from fontTools.ttLib import TTFont
+    from fontbakery.utils import open_ttfont
 
     no_stat = 0
     summary = []
     for font in fonts:
         try:
-            ttFont = TTFont(font)
+            ttFont = open_ttfont(font)
             if 'STAT' in ttFont:
                 order = {}
                 for axis in ttFont['STAT'].table.DesignAxisRecord.Axis:
@@ -5813,6 +5838,7 @@ def com_google_fonts_check_metadata_designer_profiles(family_metadata):
     DESIGNER_INFO_RAW_URL = ("https://raw.githubusercontent.com/google/"
                              "fonts/master/catalog/designers/{}/")
     from fontbakery.utils import get_DesignerInfoProto_Message
+    from fontbakery import network
     import requests
 
     # NOTE: See issue #3316
@@ -5848,6 +5874,11 @@ def com_google_fonts_check_metadata_designer_profiles(family_metadata):
                 normalized_name += TRANSLATE[c]
         return normalized_name
 
+    # Fetch the profiles of all designers concurrently.
+    for designer in family_metadata.designer.split(','):
+        normalized_name = normalize(designer.strip())
+        network.submit("GET", DESIGNER_INFO_RAW_URL.format(normalized_name) + "info.pb")
+
     passed = True
     for designer in family_metadata.designer.split(','):
         designer = designer.strip()
@@ -5860,7 +5891,7 @@ def com_google_fonts_check_metadata_designer_profiles(family_metadata):
             continue
 
         url = DESIGNER_INFO_RAW_URL.format(normalized_name) + "info.pb"
-        response = requests.get(url)
+        response = network.get(url)
         if response.status_code != requests.codes.OK:
             passed = False
             yield WARN,\
@@ -5896,7 +5927,7 @@ def com_google_fonts_check_metadata_designer_profiles(family_metadata):
                           f"Please provide one.")
         else:
             avatar_url = DESIGNER_INFO_RAW_URL.format(normalized_name) + info.avatar.file_name
-            response = requests.get(avatar_url)
+            response = network.get(avatar_url)
             if response.status_code != requests.codes.OK:
                 passed = False
                 yield FAIL,\
@@ -6245,6 +6276,7 @@ def com_google_fonts_check_render_own_name(ttFont):
     conditions = ["readme_contents",
                   "readme_directory"],
     proposal = 'https://github.com/googlefonts/fontbakery/issues/2898',
+    persistent = False
 )
 def com_google_fonts_check_repo_sample_image(readme_contents, readme_directory, config):
     """Check README.md has a sample image."""
@@ -1,6 +1,6 @@
 import os
 import re
-import yaml
+from functools import lru_cache
 
 from fontbakery.callable import condition
 from fontbakery.constants import (
@@ -109,11 +109,10 @@ def stylenames_are_canonical(fonts):
 @condition
 def canonical_stylename(font):
     """ Returns the canonical stylename of a given font. """
-    from fontbakery.utils import suffix
+    from fontbakery.utils import open_ttfont, suffix
     from fontbakery.constants import (STATIC_STYLE_NAMES,
                                       VARFONT_SUFFIXES)
     from .shared_conditions import is_variable_font
-    from fontTools.ttLib import TTFont
 
     # remove spaces in style names
     valid_style_suffixes = [name.replace(' ', '') for name in STATIC_STYLE_NAMES]
@@ -121,14 +120,14 @@ def canonical_stylename(font):
     filename = os.path.basename(font)
     basename = os.path.splitext(filename)[0]
     s = suffix(font)
-    varfont = os.path.exists(font) and is_variable_font(TTFont(font))
+    varfont = os.path.exists(font) and is_variable_font(open_ttfont(font))
     if ('-' in basename and
         (s in VARFONT_SUFFIXES and varfont)
         or (s in valid_style_suffixes and not varfont)):
         return s
 
 
-@condition
+@condition(persistent=False)
 def descfile(font):
     """Get the path of the DESCRIPTION file of a given font project."""
     if font:
@@ -168,7 +167,7 @@ def readme_contents(readme_md):
     return open(readme_md, "r", encoding="utf-8").read()
 
 
-@condition
+@condition(persistent=False)
 def metadata_file(family_directory,
                   metadata_pb=None):
     if metadata_pb:
@@ -196,54 +195,14 @@ def family_metadata(metadata_file):
         return None
 
 
-@condition
+@condition(persistent=False)
 def registered_vendor_ids():
-    """Get a list of vendor IDs from Microsoft's website."""
-    from bs4 import BeautifulSoup
-    from pkg_resources import resource_filename
-
-    registered_vendor_ids = {}
-    CACHED = resource_filename('fontbakery',
-                               'data/fontbakery-microsoft-vendorlist.cache')
-    content = open(CACHED, encoding='utf-8').read()
-    # Strip all <A> HTML tags from the raw HTML. The current page contains a
-    # closing </A> for which no opening <A> is present, which causes
-    # beautifulsoup to silently stop processing that section from the error
-    # onwards. We're not using the href's anyway.
-    content = re.sub("<a[^>]*>", "", content, flags=re.IGNORECASE)
-    content = re.sub("</a>", "", content, flags=re.IGNORECASE)
-    soup = BeautifulSoup(content, 'html.parser')
-
-    IDs = [chr(c + ord('a')) for c in range(ord('z') - ord('a') + 1)]
-    IDs.append("0-9-")
-
-    for section_id in IDs:
-        section = soup.find('h2', {'id': section_id})
-        table = section.find_next_sibling('table')
-        if not table: continue
-
-        #print ("table: '{}'".format(table))
-        for row in table.findAll('tr'):
-            #print("ROW: '{}'".format(row))
-            cells = row.findAll('td')
-            if not cells:
-                continue
-
-            labels = [label for label in cells[1].stripped_strings]
-
-            # pad the code to make sure it is a 4 char string,
-            # otherwise eg "CF  " will not be matched to "CF"
-            code = cells[0].string.strip()
-            code = code + (4 - len(code)) * ' '
-            registered_vendor_ids[code] = labels[0]
+    """Get a list of vendor IDs from Microsoft's website.
 
-            # Do the same with NULL-padding:
-            code = cells[0].string.strip()
-            code = code + (4 - len(code)) * chr(0)
-            registered_vendor_ids[code] = labels[0]
-
-
-    return registered_vendor_ids
+    The list is compiled from a cached copy of the page,
+    see `fontbakery build-assets`."""
+    from fontbakery.assets import load_asset
+    return load_asset("vendor-ids")
 
 
 def git_rootdir(family_dir):
@@ -268,7 +227,7 @@ def git_rootdir(family_dir):
     return root_dir
 
 
-@condition
+@condition(persistent=False)
 def licenses(family_directory):
     """Get a list of paths for every license
        file found in a font project."""
@@ -334,14 +293,14 @@ def hinting_stats(font):
     """
     from io import BytesIO
     from dehinter.font import dehint
-    from fontTools.ttLib import TTFont
     from fontTools.subset import main as pyftsubset
+    from fontbakery.utils import open_ttfont
     from fontbakery.profiles.shared_conditions import (is_ttf,
                                                        is_cff,
                                                        is_cff2)
 
     hinted_size = os.stat(font).st_size
-    ttFont = TTFont(font)
+    ttFont = open_ttfont(font)
 
     if is_ttf(ttFont):
         dehinted_buffer = BytesIO()
@@ -379,7 +338,7 @@ def hinting_stats(font):
     }
 
 
-@condition
+@condition(persistent=False)
 def listed_on_gfonts_api(familyname):
     if not familyname:
         return False
@@ -439,6 +398,20 @@ def font_familyname(font_familynames):
     return font_familynames[0]
 
 
+@lru_cache(maxsize=None)
+def familyname_exceptions(exceptions_txt):
+    """The entries of an exceptions list, read once per process."""
+    from pkg_resources import resource_filename
+
+    exceptions = []
+    filename = resource_filename('fontbakery', exceptions_txt)
+    for exception in open(filename, "r").readlines():
+        exception = exception.split('#')[0].strip()
+        if exception != "":
+            exceptions.append(exception)
+    return tuple(exceptions)
+
+
 # TODO: Design special case handling mechanism:
 # https://github.com/googlefonts/fontbakery/issues/1540
 # TODO: Improve camelcase check result explanation and whitelisting process:
@@ -449,15 +422,8 @@ def camelcased_familyname_exception(familyname):
        familynames but there are a few exceptions to that
        rule, that we keep listed here, for now.
     '''
-    from pkg_resources import resource_filename
-
     camelcase_exceptions_txt = 'data/googlefonts/camelcased_familyname_exceptions.txt'
-    filename = resource_filename('fontbakery', camelcase_exceptions_txt)
-    for exception in open(filename, "r").readlines():
-        exception = exception.split('#')[0].strip()
-        if exception == "":
-            continue
-
+    for exception in familyname_exceptions(camelcase_exceptions_txt):
         if exception in familyname:
             return True
 
@@ -469,52 +435,50 @@ def rfn_exception(familyname):
        been published previously with an RFN, or fonts which benefit from
        an agreement with Google Fonts.
     '''
-    from pkg_resources import resource_filename
-
     rfn_exceptions_txt = 'data/googlefonts/reserved_font_name_exceptions.txt'
-    filename = resource_filename('fontbakery', rfn_exceptions_txt)
-    for exception in open(filename, "r").readlines():
-        exception = exception.split('#')[0].strip()
-        if exception == "":
-            continue
-
+    for exception in familyname_exceptions(rfn_exceptions_txt):
         if exception in familyname:
             return True
 
 
-@condition
+@condition(persistent=False)
 def remote_styles(familyname_with_spaces):
     """Get a dictionary of TTFont objects of all font files of
        a given family as currently hosted at Google Fonts.
     """
 
-    def download_family_from_Google_Fonts(familyname):
-        """Return a zipfile containing a font family hosted on fonts.google.com"""
+    def ttf_files_from_zip(response):
+        '''return a list of (file name, bytes) of the ttf files of a zip'''
         from zipfile import ZipFile
-        from fontbakery.utils import download_file
+        from io import BytesIO
+        with ZipFile(BytesIO(response.content)) as zipfile:
+            return [(file_name, zipfile.read(file_name))
+                    for file_name in zipfile.namelist()
+                    if file_name.lower().endswith(".ttf")]
+
+
+    def download_family_from_Google_Fonts(familyname):
+        """Return the ttf files of a font family hosted on fonts.google.com.
+           The HTTP cache stores the extracted files, not the zip archive."""
+        from fontbakery import network
         url_prefix = 'https://fonts.google.com/download?family='
         url = '{}{}'.format(url_prefix, familyname.replace(' ', '+'))
-        return ZipFile(download_file(url))  # pylint: disable=R1732
+        return network.get_derived(url, "ttf-files", ttf_files_from_zip)
 
 
-    def fonts_from_zip(zipfile):
+    def fonts_from_files(files):
         '''return a list of fontTools TTFonts'''
         from fontTools.ttLib import TTFont
         from io import BytesIO
-        fonts = []
-        for file_name in zipfile.namelist():
-            if file_name.lower().endswith(".ttf"):
-                file_obj = BytesIO(zipfile.open(file_name).read())
-                fonts.append([file_name, TTFont(file_obj)])
-        return fonts
+        return [[file_name, TTFont(BytesIO(data))] for file_name, data in files]
 
     if not listed_on_gfonts_api(familyname_with_spaces):
         return None
 
-    remote_fonts_zip = download_family_from_Google_Fonts(familyname_with_spaces)
+    remote_font_files = download_family_from_Google_Fonts(familyname_with_spaces)
     rstyles = {}
 
-    for remote_filename, remote_font in fonts_from_zip(remote_fonts_zip):
+    for remote_filename, remote_font in fonts_from_files(remote_font_files):
         remote_style = os.path.splitext(remote_filename)[0]
         if '-' in remote_style:
             remote_style = remote_style.split('-')[1]
@@ -570,7 +534,7 @@ def api_gfonts_ttFont(style, remote_styles):
         return remote_styles[style]
 
 
-@condition
+@condition(persistent=False)
 def github_gfonts_ttFont(ttFont, license):
     """Get a TTFont object of a font downloaded
        from Google Fonts git repository.
@@ -598,7 +562,7 @@ def github_gfonts_ttFont(ttFont, license):
         return None
 
 
-@condition
+@condition(persistent=False)
 def github_gfonts_description(ttFont, license):
     """Get the contents of the DESCRIPTION.en_us.html file
        from the google/fonts github repository corresponding
@@ -681,23 +645,24 @@ def gfonts_repo_structure(fonts):
     return abspath.split(os.path.sep)[-3] in ["ufl", "ofl", "apache"]
 
 
-@condition
+@condition(persistent=False)
 def production_metadata():
     """Get the Google Fonts production metadata"""
-    import requests
+    from fontbakery import network
     meta_url = "http://fonts.google.com/metadata/fonts"
-    return requests.get(meta_url).json()
+    return network.get(meta_url).json()
 
 
-@condition
+@condition(persistent=False)
 def GFAxisRegistry():
-    from axisregistry import AxisRegistry
-    return AxisRegistry()
+    from fontbakery.assets import load_asset
+    return load_asset("gf-axis-registry")
 
 
-@condition
+@condition(persistent=False)
 def upstream_yaml(family_directory):
     fp = os.path.join(family_directory, "upstream.yaml")
     if not os.path.isfile(fp):
         return None
+    import yaml
     return yaml.load(open(fp, "r"), yaml.FullLoader)
@@ -4,7 +4,7 @@ from fontbakery.message import Message
 # used to inform get_module_profile whether and how to create a profile
 from fontbakery.fonts_profile import profile_factory  # NOQA pylint: disable=unused-import
 
-profile_imports = [('.shared_conditions', ('missing_whitespace_chars',))]
+profile_imports = [('.shared_conditions', ('font_facts', 'missing_whitespace_chars'))]
 
 
 @check(
@@ -7,12 +7,8 @@ from fontbakery.section import Section
 from fontbakery.status import PASS, FAIL, WARN
 from fontbakery.fonts_profile import profile_factory
 from fontbakery.message import Message
+from fontbakery.utils import get_hb_font
 from fontTools.pens.boundsPen import BoundsPen
-from beziers.path import BezierPath
-from beziers.line import Line
-from beziers.point import Point
-import beziers
-import uharfbuzz as hb
 
 
 profile = profile_factory(default_section=Section("Suitability for In-Car Display"))
@@ -31,6 +27,9 @@ CHECKS = [
 
 
 def xheight_intersections(ttFont, glyph):
+    from beziers.path import BezierPath
+    from beziers.line import Line
+    from beziers.point import Point
     glyphset = ttFont.getGlyphSet()
     if glyph not in glyphset:
         return []
@@ -65,12 +64,8 @@ def stem_width(ttFont):
 
 def pair_kerning(font, left, right):
     """The kerning between two glyphs (specified by name), in font units."""
-    with open(font, "rb") as fontfile:
-        fontdata = fontfile.read()
-    face = hb.Face(fontdata)
-    font = hb.Font(face)
-    scale = face.upem
-    font.scale = (scale, scale)
+    import uharfbuzz as hb
+    font = get_hb_font(font)
     buf = hb.Buffer()
     buf.add_str(left + right)
     buf.guess_segment_properties()
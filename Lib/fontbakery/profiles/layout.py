@@ -4,16 +4,9 @@ from fontbakery.message import Message
 from fontbakery.fonts_profile import profile_factory # NOQA pylint: disable=unused-import
 
 
-from opentypespec.tags import FEATURE_TAGS, SCRIPT_TAGS, LANGUAGE_TAGS
-
-
 def feature_tags(ttFont):
-    in_this_font = set()
-    for table in ["GSUB", "GPOS"]:
-        if ttFont.get(table) and ttFont[table].table.FeatureList:
-            for fr in ttFont[table].table.FeatureList.FeatureRecord:
-                in_this_font.add(fr.FeatureTag)
-    return in_this_font
+    from fontbakery.layoutindex import get_layout_index
+    return set(get_layout_index(ttFont).feature_tags)
 
 
 DEPRECATED_TAGS = ["hngl", "opbd", "size"]
@@ -31,6 +24,7 @@ DEPRECATED_TAGS = ["hngl", "opbd", "size"]
 )
 def com_google_fonts_check_layout_valid_feature_tags(ttFont):
     """Does the font have any invalid feature tags?"""
+    from opentypespec.tags import FEATURE_TAGS
 
     # We'll accept any of the OpenType specified feature tags:
     acceptable_tags = list(FEATURE_TAGS.keys())
@@ -52,12 +46,8 @@ def com_google_fonts_check_layout_valid_feature_tags(ttFont):
 
 
 def script_tags(ttFont):
-    in_this_font = set()
-    for table in ["GSUB", "GPOS"]:
-        if ttFont.get(table) and ttFont[table].table.ScriptList:
-            for fr in ttFont[table].table.ScriptList.ScriptRecord:
-                in_this_font.add(fr.ScriptTag)
-    return in_this_font
+    from fontbakery.layoutindex import get_layout_index
+    return set(get_layout_index(ttFont).script_tags)
 
 
 @check(
@@ -72,6 +62,7 @@ def script_tags(ttFont):
 )
 def com_google_fonts_check_layout_valid_script_tags(ttFont):
     """Does the font have any invalid script tags?"""
+    from opentypespec.tags import SCRIPT_TAGS
     bad_tags = set()
     for tag in script_tags(ttFont):
         if tag not in SCRIPT_TAGS.keys():
@@ -86,13 +77,8 @@ def com_google_fonts_check_layout_valid_script_tags(ttFont):
 
 
 def language_tags(ttFont):
-    in_this_font = set()
-    for table in ["GSUB", "GPOS"]:
-        if ttFont.get(table) and ttFont[table].table.ScriptList:
-            for fr in ttFont[table].table.ScriptList.ScriptRecord:
-                for lsr in fr.Script.LangSysRecord:
-                    in_this_font.add(lsr.LangSysTag)
-    return in_this_font
+    from fontbakery.layoutindex import get_layout_index
+    return set(get_layout_index(ttFont).language_tags)
 
 
 @check(
@@ -107,6 +93,7 @@ def language_tags(ttFont):
 )
 def com_google_fonts_check_layout_valid_language_tags(ttFont):
     """Does the font have any invalid language tags?"""
+    from opentypespec.tags import LANGUAGE_TAGS
     bad_tags = set()
     for tag in language_tags(ttFont):
         if tag not in LANGUAGE_TAGS.keys():
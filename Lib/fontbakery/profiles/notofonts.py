@@ -14,7 +14,8 @@ from fontbakery.constants import (PlatformID,
 from .googlefonts_conditions import * # pylint: disable=wildcard-import,unused-wildcard-import
 profile_imports = [
     'fontbakery.profiles.googlefonts',
-    ('.shared_conditions', ('glyph_metrics_stats', 'preferred_cmap', 'unicoderange'))
+    ('.shared_conditions', ('font_facts', 'glyph_metrics_stats', 'is_cjk_font',
+                            'preferred_cmap', 'unicoderange'))
 ]
 
 profile = profile_factory(default_section=Section("Noto Fonts"))
@@ -129,10 +130,8 @@ def _get_advance_width_for_char(ttFont, ch):
     """,
     proposal = 'https://github.com/googlefonts/fontbakery/issues/2676'
 )
-def com_google_fonts_check_cmap_unexpected_subtables(ttFont):
+def com_google_fonts_check_cmap_unexpected_subtables(ttFont, is_cjk_font):
     """Ensure all cmap subtables are the typical types expected in a font."""
-    from fontbakery.profiles.shared_conditions import is_cjk_font
-
     passed = True
     # Note:
     #   Format 0 = Byte encoding table
@@ -154,7 +153,7 @@ def com_google_fonts_check_cmap_unexpected_subtables(ttFont):
         ( 4, PlatformID.UNICODE, UnicodeEncodingID.UNICODE_2_0_BMP_ONLY),        #  97.0% of GFonts TTFs (only 84 files lack it)
         (12, PlatformID.UNICODE, UnicodeEncodingID.UNICODE_2_0_FULL)             #   2.9% of GFonts TTFs (82 files)
     ]
-    if is_cjk_font(ttFont):
+    if is_cjk_font:
         EXPECTED_SUBTABLES.extend([
             # Adobe says historically some programs used these to identify
             # the script in the font.  The encodingID is the quickdraw
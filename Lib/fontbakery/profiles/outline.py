@@ -1,5 +1,3 @@
-from beziers.path import BezierPath
-
 from fontbakery.callable import condition, check
 from fontbakery.status import FAIL, PASS, WARN
 from fontbakery.section import Section
@@ -20,6 +18,7 @@ FALSE_POSITIVE_CUTOFF = 100  # More than this and we don't make a report
 
 @condition
 def outlines_dict(ttFont):
+    from beziers.path import BezierPath
     cmap = ttFont['cmap'].getBestCmap()
     return {(codepoint, glyphname): BezierPath.fromFonttoolsGlyph(ttFont, glyphname)
             for codepoint, glyphname in cmap.items()}
@@ -23,10 +23,8 @@ from fontbakery.checkrunner import FAIL, PASS, SKIP
 from fontbakery.fonts_profile import profile_factory
 from fontbakery.message import Message
 from fontbakery.section import Section
-from vharfbuzz import Vharfbuzz, FakeBuffer
+from fontbakery.utils import get_hb_font
 from os.path import basename, relpath
-from stringbrewer import StringBrewer
-from collidoscope import Collidoscope
 
 shaping_basedir = Path("qa", "shaping_tests")
 
@@ -76,6 +74,7 @@ def create_report_item(vharfbuzz,
                        type="item",
                        note=None,
                        extra_data=None):
+    from vharfbuzz import FakeBuffer
     if text:
         message += f': <span class="tf">{text}</span>'
 
@@ -141,6 +140,31 @@ def get_shaping_parameters(test, configuration):
     return params
 
 
+def get_vharfbuzz(ttFont):
+    """A Vharfbuzz of the font file of a check. It uses the TTFont of the
+    check, and its harfbuzz font shares the memory mapped face of the file
+    with the other checks, instead of reading the file and parsing it once
+    more."""
+    from vharfbuzz import Vharfbuzz
+
+    class FontVharfbuzz(Vharfbuzz):
+        # Sets up what Vharfbuzz.__init__ (of the versions in setup.py)
+        # would, without its copy of the file and its own TTFont.
+        def __init__(self, ttFont):  # pylint: disable=super-init-not-called
+            self.filename = ttFont.reader.file.name
+            self.ttfont = ttFont
+            self.glyphOrder = ttFont.getGlyphOrder()
+            self.prepare_shaper()
+            self.shapers = None
+            self.drawfuncs = None
+
+        def prepare_shaper(self):
+            # Called before each shaping, for a font without variations set.
+            self.hbfont = get_hb_font(self.filename)
+
+    return FontVharfbuzz(ttFont)
+
+
 # This is a very generic "do something with shaping" test runner.
 # It'll be given concrete meaning later.
 def run_a_set_of_shaping_tests(config,
@@ -150,7 +174,7 @@ def run_a_set_of_shaping_tests(config,
                                generate_report,
                                preparation=None):
     filename = Path(ttFont.reader.file.name)
-    vharfbuzz = Vharfbuzz(filename)
+    vharfbuzz = get_vharfbuzz(ttFont)
     shaping_file_found = False
     ran_a_test = False
     extra_data = None
@@ -338,6 +362,7 @@ def run_forbidden_glyph_test(
     parameters = get_shaping_parameters(test, configuration)
     forbidden_glyphs = configuration["forbidden_glyphs"]
     if is_stringbrewer:
+        from stringbrewer import StringBrewer
         sb = StringBrewer(
             recipe=test["input"], ingredients=configuration["ingredients"]
         )
@@ -407,6 +432,7 @@ def setup_glyph_collides(ttFont, configuration):
             "faraway": True,
             "adjacent_clusters": True,
         }
+    from collidoscope import Collidoscope
     col = Collidoscope(filename,
                        collidoscope_configuration,
                        direction=configuration.get("direction", "LTR"))
@@ -430,6 +456,7 @@ def run_collides_glyph_test(filename,
                                                     "allowedcollisions",
                                                     [])
     if is_stringbrewer:
+        from stringbrewer import StringBrewer
         sb = StringBrewer(recipe=test["input"],
                           ingredients=configuration["ingredients"])
         strings = sb.generate_all()
@@ -9,8 +9,16 @@ from fontbakery.fonts_profile import profile_factory # NOQA pylint: disable=unus
 
 @condition
 def ttFont(font):
-    from fontTools.ttLib import TTFont
-    return TTFont(font)
+    from fontbakery.utils import open_ttfont
+    return open_ttfont(font)
+
+
+@condition(shared=True)
+def font_facts(ttFont):
+    """The basic data of the font (cmap, glyph order, advance widths, GDEF
+    glyph classes, table tags), see fontbakery.fontfacts."""
+    from fontbakery.fontfacts import FontFacts
+    return FontFacts.from_ttfont(ttFont)
 
 
 @condition
@@ -106,7 +114,7 @@ def family_directory(font):
         return dirname
 
 
-@condition
+@condition(persistent=False)
 def sibling_directories(family_directory):
     """
     Given a directory, this function tries to figure out where else in the filesystem
@@ -142,7 +150,7 @@ def sibling_directories(family_directory):
     return directories
 
 
-@condition
+@condition(persistent=False)
 def superfamily(sibling_directories):
     """
     Given a list of directories, this functions looks for font files
@@ -160,60 +168,40 @@ def superfamily(sibling_directories):
 
 @condition
 def superfamily_ttFonts(superfamily):
-    from fontTools.ttLib import TTFont
+    from fontbakery.utils import open_ttfont
     result = []
     for family in superfamily:
-        result.append([TTFont(f) for f in family])
+        result.append([open_ttfont(f) for f in family])
     return result
 
 
 @condition
 def ligatures(ttFont):
-    from fontTools.ttLib.tables.otTables import LigatureSubst
+    from fontbakery.layoutindex import get_layout_index
 
     all_ligatures = {}
     try:
-        if "GSUB" in ttFont and ttFont["GSUB"].table.LookupList:
-            for record in ttFont["GSUB"].table.FeatureList.FeatureRecord:
-                if record.FeatureTag == 'liga':
-                    for index in record.Feature.LookupListIndex:
-                        lookup = ttFont["GSUB"].table.LookupList.Lookup[index]
-                        for subtable in lookup.SubTable:
-                            if isinstance(subtable, LigatureSubst):
-                                for firstGlyph in subtable.ligatures.keys():
-                                    all_ligatures[firstGlyph] = []
-                                    for lig in subtable.ligatures[firstGlyph]:
-                                        if lig.Component not in all_ligatures[firstGlyph]:
-                                            all_ligatures[firstGlyph].append(lig.Component)
-        return all_ligatures
+        for firstGlyph, components, _ in get_layout_index(ttFont).feature_ligatures('liga'):
+            all_ligatures.setdefault(firstGlyph, {})[components] = None
+        return {firstGlyph: list(map(list, components))
+                for firstGlyph, components in all_ligatures.items()}
     except:
         return -1 # Indicate fontTools-related crash...
 
 
 @condition
 def ligature_glyphs(ttFont):
-    from fontTools.ttLib.tables.otTables import LigatureSubst
+    from fontbakery.layoutindex import get_layout_index
 
-    all_ligature_glyphs = []
     try:
-        if "GSUB" in ttFont and ttFont["GSUB"].table.LookupList:
-            for record in ttFont["GSUB"].table.FeatureList.FeatureRecord:
-                if record.FeatureTag == 'liga':
-                    for index in record.Feature.LookupListIndex:
-                        lookup = ttFont["GSUB"].table.LookupList.Lookup[index]
-                        for subtable in lookup.SubTable:
-                            if isinstance(subtable, LigatureSubst):
-                                for firstGlyph in subtable.ligatures.keys():
-                                    for lig in subtable.ligatures[firstGlyph]:
-                                        if lig.LigGlyph not in all_ligature_glyphs:
-                                            all_ligature_glyphs.append(lig.LigGlyph)
-        return all_ligature_glyphs
+        return list(dict.fromkeys(ligGlyph for _, _, ligGlyph
+                                  in get_layout_index(ttFont).feature_ligatures('liga')))
     except:
         return -1  # Indicate fontTools-related crash...
 
 
 @condition
-def glyph_metrics_stats(ttFont):
+def glyph_metrics_stats(font_facts):
     """Returns a dict containing whether the font seems_monospaced,
     what's the maximum glyph width and what's the most common width.
 
@@ -222,15 +210,18 @@ def glyph_metrics_stats(ttFont):
     width, otherwise all glyphs of printable characters must have one of
     two widths or be zero-width.
     """
-    glyph_metrics = ttFont['hmtx'].metrics
+    from fontbakery.fontfacts import MARK_GLYPH
+    glyph_metrics = list(zip(font_facts.glyph_order,
+                             zip(font_facts.advances, font_facts.lsbs)))
+    cmap = font_facts.best_cmap
     # NOTE: `range(a, b)` includes `a` and does not include `b`.
     #       Here we don't include 0-31 as well as 127
     #       because these are control characters.
-    ascii_glyph_names = [ttFont.getBestCmap()[c] for c in range(32, 127)
-                         if c in ttFont.getBestCmap()]
+    ascii_glyph_names = {cmap[c] for c in range(32, 127) if c in cmap}
+    ascii_count = len(font_facts.codepoints_in_range(32, 126))
 
-    if len(ascii_glyph_names) > 0.8 * (127 - 32):
-        ascii_widths = [adv for name, (adv, lsb) in glyph_metrics.items()
+    if ascii_count > 0.8 * (127 - 32):
+        ascii_widths = [adv for name, (adv, lsb) in glyph_metrics
                         if name in ascii_glyph_names and adv != 0]
         ascii_width_count = Counter(ascii_widths)
         ascii_most_common_width = ascii_width_count.most_common(1)[0][1]
@@ -242,26 +233,20 @@ def glyph_metrics_stats(ttFont):
         # Add character glyphs that are in one of these categories:
         # Letter, Mark, Number, Punctuation, Symbol, Space_Separator.
         # This excludes Line_Separator, Paragraph_Separator and Control.
-        for value, name in ttFont.getBestCmap().items():
+        for value, name in cmap.items():
             if unicodedata.category(chr(value)).startswith(
                 ("L", "M", "N", "P", "S", "Zs")
             ):
                 relevant_glyph_names.add(name)
         # Remove character glyphs that are mark glyphs.
-        gdef = ttFont.get("GDEF")
-        if gdef and gdef.table.GlyphClassDef:
-            marks = {name
-                     for name, c in gdef.table.GlyphClassDef.classDefs.items()
-                     if c == 3
-                    }
-            relevant_glyph_names.difference_update(marks)
-
-        widths = sorted({adv for name, (adv, lsb) in glyph_metrics.items()
+        relevant_glyph_names.difference_update(font_facts.glyphs_of_class(MARK_GLYPH))
+
+        widths = sorted({adv for name, (adv, lsb) in glyph_metrics
                          if name in relevant_glyph_names and adv != 0})
         seems_monospaced = len(widths) <= 2
 
-    width_max = max(adv for k, (adv, lsb) in glyph_metrics.items())
-    most_common_width = Counter([g for g in glyph_metrics.values()
+    width_max = max(font_facts.advances)
+    most_common_width = Counter([g for _, g in glyph_metrics
                                  if g[0] != 0]).most_common(1)[0][0][0]
     return {
         "seems_monospaced": seems_monospaced,
@@ -271,11 +256,10 @@ def glyph_metrics_stats(ttFont):
 
 
 @condition
-def missing_whitespace_chars(ttFont):
-    from fontbakery.utils import get_glyph_name
-    space = get_glyph_name(ttFont, 0x0020)
-    nbsp = get_glyph_name(ttFont, 0x00A0)
-    # tab = get_glyph_name(ttFont, 0x0009)
+def missing_whitespace_chars(font_facts):
+    space = font_facts.best_cmap.get(0x0020)
+    nbsp = font_facts.best_cmap.get(0x00A0)
+    # tab = font_facts.best_cmap.get(0x0009)
 
     missing = []
     if space is None: missing.append("0x0020")
@@ -448,7 +432,7 @@ def unicoderange(ttFont):
             os2.ulUnicodeRange4 << 96)
 
 @condition
-def is_cjk_font(ttFont):
+def is_cjk_font(ttFont, font_facts):
     """Test font object to confirm that it meets our definition of a CJK font file.
 
     The definition is met if any of the following conditions are True:
@@ -481,28 +465,22 @@ def is_cjk_font(ttFont):
                 return True
 
     # defined CJK Unicode code point in cmap table checks
-    cmap = ttFont.getBestCmap()
-    for unicode_range in CJK_UNICODE_RANGES:
-        for x in range(unicode_range[0], unicode_range[1]+1):
-            if int(x) in cmap:
-                return True
+    for start, end in CJK_UNICODE_RANGES:
+        if font_facts.codepoints_in_range(start, end):
+            return True
 
     # default, return False if the above checks did not identify a CJK font
     return False
 
 
 @condition
-def get_cjk_glyphs(ttFont):
+def get_cjk_glyphs(font_facts):
     """Return all glyphs which belong to a CJK unicode block"""
     from fontbakery.constants import CJK_UNICODE_RANGES
-    results = []
     cjk_unicodes = set()
     for start, end in CJK_UNICODE_RANGES:
-        cjk_unicodes |= set(u for u in range(start, end+1))
-    for uni, glyph_name in ttFont.getBestCmap().items():
-        if uni in cjk_unicodes:
-            results.append(glyph_name)
-    return results
+        cjk_unicodes.update(font_facts.codepoints_in_range(start, end))
+    return [font_facts.best_cmap[uni] for uni in sorted(cjk_unicodes)]
 
 
 @condition
@@ -333,15 +333,17 @@ def is_up_to_date(installed, latest):
         Older versions will also not report problems that are detected by new checks
         added to the tool in more recent updates.
     """,
-    proposal = 'https://github.com/googlefonts/fontbakery/issues/2093'
+    proposal = 'https://github.com/googlefonts/fontbakery/issues/2093',
+    persistent = False
 )
 def com_google_fonts_check_fontbakery_version(font):
     """Do we have the latest version of FontBakery installed?"""
     import requests
     import pip_api
+    from fontbakery import network
 
     try:
-        response = requests.get('https://pypi.org/pypi/fontbakery/json')
+        response = network.get('https://pypi.org/pypi/fontbakery/json')
 
     except requests.exceptions.ConnectionError as err:
         return FAIL, Message(
@@ -1238,51 +1240,7 @@ def com_google_fonts_check_designspace_has_consistent_codepoints(designSpace, co
 def com_google_fonts_check_unreachable_glyphs(ttFont, config):
     """Check font contains no unreachable glyphs"""
 
-    def remove_lookup_outputs(all_glyphs, lookup):
-        if lookup.LookupType == 1: # Single:
-                                   # Replace one glyph with one glyph
-            for sub in lookup.SubTable:
-                all_glyphs -= set(sub.mapping.values())
-
-        if lookup.LookupType == 2: # Multiple:
-                                   # Replace one glyph with more than one glyph
-            for sub in lookup.SubTable:
-                for slot in sub.mapping.values():
-                    all_glyphs -= set(slot)
-
-        if lookup.LookupType == 3: # Alternate:
-                                   # Replace one glyph with one of many glyphs
-            for sub in lookup.SubTable:
-                for slot in sub.alternates.values():
-                    all_glyphs -= set(slot)
-
-        if lookup.LookupType == 4: # Ligature:
-                                   # Replace multiple glyphs with one glyph
-            for sub in lookup.SubTable:
-                for ligatures in sub.ligatures.values():
-                    all_glyphs -= set(lig.LigGlyph for lig in ligatures)
-
-        if lookup.LookupType in [5, 6]:
-            # We do nothing here, because these contextual lookup types don't
-            # generate glyphs directly; they only dispatch to other lookups
-            # stored elsewhere in the lookup list. As we are examining all
-            # lookups in the lookup list, other calls to this function will
-            # deal with the lookups that a contextual lookup references.
-            pass
-
-        if lookup.LookupType == 7: # Extension Substitution:
-                                   # Extension mechanism for other substitutions
-            for xt in lookup.SubTable:
-                xt.SubTable = [xt.ExtSubTable]
-                xt.LookupType = xt.ExtSubTable.LookupType
-                remove_lookup_outputs(all_glyphs, xt)
-
-        if lookup.LookupType == 8: # Reverse chaining context single:
-                                   # Applied in reverse order,
-                                   # replace single glyph in chaining context
-            for sub in lookup.SubTable:
-                all_glyphs -= set(sub.Substitute)
-
+    from fontbakery.layoutindex import get_layout_index
 
     all_glyphs = set(ttFont.getGlyphOrder())
 
@@ -1290,18 +1248,13 @@ def com_google_fonts_check_unreachable_glyphs(ttFont, config):
     all_glyphs -= set(ttFont.getBestCmap().values())
     all_glyphs.discard(".notdef")
 
-    if "GSUB" in ttFont and ttFont["GSUB"].table.LookupList:
-        lookups = ttFont["GSUB"].table.LookupList.Lookup
-
-        for lookup in lookups:
-            remove_lookup_outputs(all_glyphs, lookup)
+    # Exclude glyphs produced by substitution rules
+    all_glyphs -= get_layout_index(ttFont).substitution_outputs
 
     # Remove components used in TrueType table
     if "glyf" in ttFont:
-        for glyph_name in ttFont["glyf"].keys():
-            base_glyph = ttFont["glyf"][glyph_name]
-            if base_glyph.isComposite():
-                all_glyphs -= set(base_glyph.getComponentNames(ttFont["glyf"]))
+        from fontbakery.glyphgraph import get_component_graph
+        all_glyphs -= get_component_graph(ttFont).used_components
 
     if all_glyphs:
         from fontbakery.utils import bullet_list
@@ -1346,41 +1299,17 @@ def com_google_fonts_check_contour_count(ttFont, config):
     In the future, additional glyph data can be included. A good addition would
     be the 'recommended' anchor counts for each glyph.
     """
-    from fontbakery.glyphdata import desired_glyph_data as glyph_data
+    from fontbakery.assets import load_asset
     from fontbakery.constants import (PlatformID,
                                       WindowsEncodingID)
     from fontbakery.utils import (bullet_list,
                                   get_font_glyph_data,
                                   pretty_print_list)
 
-    def in_PUA_range(codepoint):
-        """
-          In Unicode, a Private Use Area (PUA) is a range of code points that,
-          by definition, will not be assigned characters by the Unicode Consortium.
-          Three private use areas are defined:
-            one in the Basic Multilingual Plane (U+E000–U+F8FF),
-            and one each in, and nearly covering, planes 15 and 16
-            (U+F0000–U+FFFFD, U+100000–U+10FFFD).
-        """
-        return (codepoint >= 0xE000 and codepoint <= 0xF8FF) or \
-               (codepoint >= 0xF0000 and codepoint <= 0xFFFFD) or \
-               (codepoint >= 0x100000 and codepoint <= 0x10FFFD)
-
-    # rearrange data structure:
-    desired_glyph_data_by_codepoint = {}
-    desired_glyph_data_by_glyphname = {}
-    for glyph in glyph_data:
-        desired_glyph_data_by_glyphname[glyph['name']] = glyph
-        # since the glyph in PUA ranges have unspecified meaning,
-        # it doesnt make sense for us to have an expected contour cont for them
-        if not in_PUA_range(glyph['unicode']):
-            desired_glyph_data_by_codepoint[glyph['unicode']] = glyph
-
+    # Glyphs in the PUA ranges have no expected contour count by codepoint.
+    desired_glyph_contours_by_codepoint = load_asset("glyph-contours-by-codepoint")
+    desired_glyph_contours_by_glyphname = load_asset("glyph-contours-by-name")
     bad_glyphs = []
-    desired_glyph_contours_by_codepoint = {f: desired_glyph_data_by_codepoint[f]['contours']
-                                           for f in desired_glyph_data_by_codepoint}
-    desired_glyph_contours_by_glyphname = {f: desired_glyph_data_by_glyphname[f]['contours']
-                                           for f in desired_glyph_data_by_glyphname}
 
     font_glyph_data = get_font_glyph_data(ttFont)
 
@@ -1404,21 +1333,19 @@ def com_google_fonts_check_contour_count(ttFont, config):
                           " It is mostly an obsolete mechanism now, and the character"
                           " is only included in fonts for legacy codepage coverage.")
 
-        shared_glyphs_by_codepoint = set(desired_glyph_contours_by_codepoint) & \
-                                     set(font_glyph_contours_by_codepoint)
-        for glyph in sorted(shared_glyphs_by_codepoint):
-            if font_glyph_contours_by_codepoint[glyph] not in desired_glyph_contours_by_codepoint[glyph]:
+        for glyph in sorted(font_glyph_contours_by_codepoint):
+            desired = desired_glyph_contours_by_codepoint.get(glyph)
+            if desired is not None and font_glyph_contours_by_codepoint[glyph] not in desired:
                 bad_glyphs.append([glyph,
                                    font_glyph_contours_by_codepoint[glyph],
-                                   desired_glyph_contours_by_codepoint[glyph]])
+                                   desired])
 
-        shared_glyphs_by_glyphname = set(desired_glyph_contours_by_glyphname) & \
-                                     set(font_glyph_contours_by_glyphname)
-        for glyph in sorted(shared_glyphs_by_glyphname):
-            if font_glyph_contours_by_glyphname[glyph] not in desired_glyph_contours_by_glyphname[glyph]:
+        for glyph in sorted(font_glyph_contours_by_glyphname):
+            desired = desired_glyph_contours_by_glyphname.get(glyph)
+            if desired is not None and font_glyph_contours_by_glyphname[glyph] not in desired:
                 bad_glyphs.append([glyph,
                                    font_glyph_contours_by_glyphname[glyph],
-                                   desired_glyph_contours_by_glyphname[glyph]])
+                                   desired])
 
         if len(bad_glyphs) > 0:
             cmap = ttFont['cmap'].getcmap(PlatformID.WINDOWS,
@@ -1523,13 +1450,12 @@ def com_google_fonts_check_cjk_chws_feature(ttFont):
 )
 def com_google_fonts_check_transformed_components(ttFont, is_hinted):
     """Ensure component transforms do not perform scaling or rotation."""
+    from fontbakery.glyphgraph import component_transform, get_component_graph
+    graph = get_component_graph(ttFont)
     failures = ""
-    for glyph_name in ttFont.getGlyphOrder():
-        glyf = ttFont["glyf"][glyph_name]
-        if not glyf.isComposite():
-            continue
-        for component in glyf.components:
-            comp_name, transform = component.getComponentInfo()
+    for glyph_name in graph.composites:
+        for component in graph.components(glyph_name):
+            comp_name, transform = component.glyphName, component_transform(component)
 
             # Font is hinted, complain about *any* transformations
             if is_hinted:
@@ -1575,9 +1501,9 @@ def com_google_fonts_check_transformed_components(ttFont, is_hinted):
 )
 def com_google_fonts_check_dotted_circle(ttFont, config):
     """Ensure dotted circle glyph is present and can attach marks."""
+    from fontbakery.layoutindex import get_layout_index
     from fontbakery.utils import (bullet_list,
-                                  is_complex_shaper_font,
-                                  iterate_lookup_list_with_extensions)
+                                  is_complex_shaper_font)
 
     mark_glyphs = []
     if "GDEF" in ttFont and \
@@ -1610,22 +1536,12 @@ def com_google_fonts_check_dotted_circle(ttFont, config):
     # Check they all attach to dotted circle
     # if they attach to something else
     dotted_circle = ttFont.getBestCmap()[0x25CC]
-    attachments = {dotted_circle: []}
-    does_attach = {}
-    def find_mark_base(lookup, attachments):
-        if lookup.LookupType == 4:
-            # Assume all-to-all
-            for st in lookup.SubTable:
-                for base in st.BaseCoverage.glyphs:
-                    for mark in st.MarkCoverage.glyphs:
-                        attachments.setdefault(base,[]).append(mark)
-                        does_attach[mark] = True
-
-    iterate_lookup_list_with_extensions(ttFont, "GPOS", find_mark_base, attachments)
+    layout = get_layout_index(ttFont)
+    dotted_circle_marks = layout.mark_bases.get(dotted_circle, set())
 
     unattached = []
     for g in nonspacing_mark_glyphs:
-        if g in does_attach and g not in attachments[dotted_circle]:
+        if g in layout.attached_marks and g not in dotted_circle_marks:
             unattached.append(g)
 
     if unattached:
@@ -1659,16 +1575,9 @@ def com_google_fonts_check_dotted_circle(ttFont, config):
 )
 def com_google_fonts_check_gpos7(ttFont):
     """Ensure no GPOS7 lookups are present."""
-    from fontbakery.utils import iterate_lookup_list_with_extensions
-
-    has_gpos7 = False
-    def find_gpos7(lookup):
-        nonlocal has_gpos7
-        if lookup.LookupType == 7:
-            has_gpos7 = True
-    iterate_lookup_list_with_extensions(ttFont, "GPOS", find_gpos7)
+    from fontbakery.layoutindex import get_layout_index
 
-    if not has_gpos7:
+    if 7 not in get_layout_index(ttFont).lookup_types("GPOS"):
         yield PASS, "Font has no GPOS7 lookups"
         return
 
@@ -26,6 +26,10 @@ from fontbakery.checkrunner import (
 from fontbakery.errors import ProtocolViolationError
 
 class FontbakeryReporter:
+    # Streaming reporters that don't need the ENDCHECK events after they
+    # were output can set this to False, to keep their memory constant.
+    keep_results = True
+
     def __init__(self, is_async=False, runner=None, output_file=None, loglevels=None):
         self._started = None
         self._ended = None
@@ -101,7 +105,8 @@ class FontbakeryReporter:
             self._ended = event
 
         if status == ENDCHECK:
-            self._results.append(event)
+            if self.keep_results:
+                self._results.append(event)
             self._counter[message.name] += 1
             self._counter['(not finished)'] -= 1
 
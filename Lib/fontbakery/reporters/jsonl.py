@@ -0,0 +1,167 @@
+"""
+Font Bakery reporters/jsonl writes the events of the Font Bakery CheckRunner
+Protocol as a stream of JSON Lines, one record per check result, as soon as
+the results arrive. Its memory usage doesn't grow with the number of checks,
+and the output of an interrupted run is usable up to its last complete line.
+
+`build_document` rebuilds the document of the SerializeReporter from such
+a stream.
+
+Separation of Concerns Disclaimer:
+While created specifically for checking fonts and font-families this
+module has no domain knowledge about fonts. It can be used for any kind
+of (document) checking. Please keep it so. It will be valuable for other
+domains as well.
+Domain specific knowledge should be encoded only in the Profile (Checks,
+Conditions) and MAYBE in *customized* reporters e.g. subclasses.
+"""
+from collections import Counter
+import json
+
+from fontbakery.checkrunner import (
+              DEBUG
+            , STARTCHECK
+            , ENDCHECK
+            , SECTIONSUMMARY
+            , START
+            , END
+            )
+from fontbakery.reporters import FontbakeryReporter
+
+
+class JSONLinesReporter(FontbakeryReporter):
+    """
+    Writes one JSON object per line to output_file. The "event" of a record
+    is one of:
+      "start":   {"count": number of check executions in the order}
+      "check":   a check item of the SerializeReporter document, plus the
+                 "index" of the check execution in the order
+      "section": {"key", "result"}, a section summary
+      "end":     {"result"}, the summary of the run
+
+    usage:
+    >> jr = JSONLinesReporter(runner=runner, output_file='report.jsonl')
+    >> jr.run()
+    """
+    keep_results = False
+
+    def __init__(self, loglevels=None,
+                     succinct=None,
+                     collect_results_by=None,
+                     **kwd):
+        super().__init__(**kwd)
+        self.succinct = succinct
+        self.loglevels = loglevels
+        # The logs of the checks that are running, usually just one.
+        self._logs = {}
+        self._fh = None
+
+    def _write_record(self, record):
+        self._fh.write(json.dumps(record, sort_keys=True) + "\n")
+        # Keep the output usable if the run is interrupted.
+        self._fh.flush()
+
+    def _check_record(self, identity, result, logs):
+        _section, check, iterargs = identity
+        key = self._get_key(identity)
+        record = {'event': 'check',
+                  'index': self._get_index(identity),
+                  'key': key,
+                  'result': result.name,
+                  'logs': logs,
+                  'description': check.description}
+        if check.rationale:
+            record['rationale'] = check.rationale
+        if check.severity:
+            record['severity'] = check.severity
+        if iterargs != () and self.runner:
+            record['filename'] = self.runner.get_iterarg(*iterargs[0])
+        if self.runner:
+            timing = self.runner.get_timing(identity)
+            if timing is not None:
+                record['timing'] = timing
+        return record
+
+    def _output(self, event):
+        status, message, identity = event
+        _section, check, _iterargs = identity
+        if status == START:
+            self._fh = open(self.output_file, "w")
+            self._write_record({'event': 'start', 'count': len(self._order)})
+        elif status == STARTCHECK:
+            self._logs[self._get_key(identity)] = []
+        elif status == ENDCHECK:
+            logs = self._logs.pop(self._get_key(identity), [])
+            self._write_record(self._check_record(identity, message, logs))
+        elif status == SECTIONSUMMARY:
+            _, counter = message
+            self._write_record({'event': 'section',
+                                'key': self._get_key(identity),
+                                'result': counter})
+        elif status == END:
+            self._write_record({'event': 'end', 'result': message})
+            self._fh.close()
+        elif check and status >= DEBUG:
+            self._logs[self._get_key(identity)].append({
+                'status': status.name,
+                'message': f'{message}',
+                'traceback': getattr(message, 'traceback', None)
+            })
+
+    def write(self):
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
+        print(f'A report in JSON Lines format has been saved to "{self.output_file}"')
+
+
+def iter_records(fh):
+    """Yields the records of a JSON Lines report. A truncated last line,
+    e.g. of an interrupted run, is skipped."""
+    for line in fh:
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            if line.endswith("\n"):
+                raise
+
+
+def build_document(records):
+    """Returns the document of the SerializeReporter (without clustering,
+    see --gather-by) from the records of a JSONLinesReporter.
+
+    If the run was interrupted, the summaries that are missing are counted
+    from the check results and the check executions without a result are
+    counted as "(not finished)"."""
+    doc = {'result': None, 'sections': []}
+    count = None
+    checks = []
+    section_results = {}
+    for record in records:
+        event = record.pop('event')
+        if event == 'start':
+            count = record['count']
+        elif event == 'check':
+            checks.append(record)
+        elif event == 'section':
+            section_results[tuple(record['key'][:1])] = record['result']
+        elif event == 'end':
+            doc['result'] = record['result']
+
+    sections = {}
+    for check in sorted(checks, key=lambda check: check.pop('index')):
+        section_key = tuple(check['key'][:1])
+        if section_key not in sections:
+            sections[section_key] = {'key': [section_key[0], None, None],
+                                     'result': section_results.get(section_key),
+                                     'checks': []}
+            doc['sections'].append(sections[section_key])
+        sections[section_key]['checks'].append(check)
+
+    for section in doc['sections']:
+        if section['result'] is None:
+            section['result'] = Counter(check['result'] for check in section['checks'])
+    if doc['result'] is None:
+        doc['result'] = Counter(check['result'] for check in checks)
+        if count is not None:
+            doc['result']['(not finished)'] = count - len(checks)
+    return doc
@@ -143,6 +143,10 @@ class SerializeReporter(FontbakeryReporter):
             sectionDoc = self._items[sectionKey]
 
             check = self._items[key]
+            if self.runner:
+                timing = self.runner.get_timing(identity)
+                if timing is not None:
+                    check['timing'] = timing
             if self._results_by:
                 if not len(sectionDoc['checks']):
                     clusterlen = self._max_cluster_by_index + 1
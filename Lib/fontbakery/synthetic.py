@@ -0,0 +1,309 @@
+"""
+Synthetic fonts of parameterized size, for scaling benchmarks.
+
+The fonts in data/test are mostly small Latin families, the expensive cases
+are elsewhere: CJK fonts with tens of thousands of glyphs built from shared
+components, class kerning with hundreds of classes, variable fonts with many
+masters. `build_font` makes a font with as much of each as asked for, so
+that `fontbakery benchmark --scale` can show how the runtime of each check
+grows with it.
+
+The parameters (see PARAMETERS) are:
+    glyphs:           number of glyphs, including .notdef and space.
+    composite_depth:  nesting depth of the composite glyphs. With a depth
+                      of n, half of the glyphs are simple and the others are
+                      spread over n levels of composites, each made of two
+                      glyphs of the level below (which are heavily reused).
+    kerning_classes:  number of left and of right classes of a PairPos
+                      format 2 subtable.
+    gsub_lookups:     number of GSUB lookups, alternating single, ligature
+                      and alternate substitutions over slices of the glyphs.
+    axes:             number of fvar axes (wght, wdth, opsz, slnt, ital,
+                      then private axes). With axes, the font is variable.
+    masters:          number of masters, including the default one. Each
+                      other master is a gvar region on one of the axes.
+
+The glyph outlines and values are arbitrary but deterministic.
+"""
+from collections import namedtuple
+
+FAMILY_NAME = "Synthetic Sans"
+
+Parameter = namedtuple("Parameter", "default maximum")
+
+PARAMETERS = {
+    "glyphs": Parameter(1000, 65535),
+    "composite_depth": Parameter(0, 16),
+    "kerning_classes": Parameter(0, 1000),
+    "gsub_lookups": Parameter(0, 1000),
+    "axes": Parameter(0, 16),
+    "masters": Parameter(1, 64),
+}
+
+# (tag, minimum, default, maximum) of the first axes.
+REGISTERED_AXES = [
+    ("wght", 100, 400, 900),
+    ("wdth", 50, 100, 200),
+    ("opsz", 6, 14, 144),
+    ("slnt", -15, 0, 0),
+    ("ital", 0, 0, 1),
+]
+
+UPM = 1000
+ADVANCE = 1000
+# Mapped glyphs get codepoints from the CJK ideographs on, skipping the
+# surrogates and the private use area.
+FIRST_CODEPOINT = 0x4E00
+SKIPPED_CODEPOINTS = range(0xD800, 0xF900)
+# The glyph name indices of post format 2 start after the 258 standard names.
+MAX_NAMED_GLYPHS = 0xFFFF - 258
+
+
+def check_parameters(parameters):
+    """Returns the complete parameters, raises ValueError for unknown
+    parameters or values out of range."""
+    result = {name: parameter.default for name, parameter in PARAMETERS.items()}
+    for name, value in parameters.items():
+        if name not in PARAMETERS:
+            raise ValueError(f'Unknown synthetic font parameter "{name}",'
+                             f' must be one of {", ".join(PARAMETERS)}.')
+        if not 0 <= value <= PARAMETERS[name].maximum:
+            raise ValueError(f'The synthetic font parameter "{name}" must be'
+                             f' between 0 and {PARAMETERS[name].maximum}.')
+        result[name] = value
+    if result["glyphs"] < 2:
+        raise ValueError('A synthetic font needs at least 2 glyphs.')
+    if result["masters"] > 1 and result["axes"] == 0:
+        raise ValueError('A synthetic font with several masters needs axes.')
+    return result
+
+
+def _codepoints(count):
+    codepoint = FIRST_CODEPOINT
+    while count:
+        if codepoint in SKIPPED_CODEPOINTS:
+            codepoint = SKIPPED_CODEPOINTS.stop
+        yield codepoint
+        codepoint += 1
+        count -= 1
+
+
+def _glyph_name(codepoint):
+    if codepoint > 0xFFFF:
+        return f"u{codepoint:05X}"
+    return f"uni{codepoint:04X}"
+
+
+def _levels(names, depth):
+    """Splits the glyph names in the levels of composites: names[0] are the
+    simple glyphs, names[n] the composites of nesting depth n."""
+    if depth == 0:
+        return [names]
+    simple = (len(names) + 1) // 2
+    levels = [names[:simple]]
+    rest = names[simple:]
+    size = -(-len(rest) // depth)
+    levels += [rest[i:i + size] for i in range(0, len(rest), size)]
+    return levels
+
+
+def _simple_glyph(index):
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    pen = TTGlyphPen(None)
+    # From one to four rectangles.
+    for contour in range(1 + index % 4):
+        x = 50 + 220 * contour
+        height = 200 + (index * 37 + contour * 101) % 600
+        pen.moveTo((x, 0))
+        pen.lineTo((x, height))
+        pen.lineTo((x + 180, height))
+        pen.lineTo((x + 180, 0))
+        pen.closePath()
+    return pen.glyph()
+
+
+def _empty_glyph():
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    return TTGlyphPen(None).glyph()
+
+
+def _composite_glyph(index, components, glyphs):
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    pen = TTGlyphPen(glyphs)
+    for position, component in enumerate(components):
+        if position == 0:
+            transformation = (1, 0, 0, 1, 0, 0)
+        elif index % 8 == 0:
+            # Some components are scaled, like in real CJK fonts.
+            transformation = (0.5, 0, 0, 0.5, 500, 250)
+        else:
+            transformation = (1, 0, 0, 1, 0, 100 + index % 300)
+        pen.addComponent(component, transformation)
+    return pen.glyph()
+
+
+def _axes(count):
+    axes = list(REGISTERED_AXES[:count])
+    for index in range(len(axes), count):
+        axes.append((f"X{index:03d}", 0, 0, 1000))
+    return axes
+
+
+def _regions(axes, count):
+    """Returns `count` distinct regions, {tag: (start, peak, end)}, alternating
+    over the axes: first the extremes, then intermediate peaks."""
+    regions = []
+    for index in range(count):
+        tag, minimum, default, maximum = axes[index % len(axes)]
+        side = (index // len(axes)) % 2
+        if side == 0 and maximum == default or side == 1 and minimum == default:
+            side = 1 - side
+        peak = (1.0 if side == 0 else -1.0) / (1 + index // (2 * len(axes)))
+        regions.append({tag: (min(peak, 0.0), peak, max(peak, 0.0))})
+    return regions
+
+
+def _variations(glyf, glyph_order, regions):
+    from fontTools.ttLib.tables.TupleVariation import TupleVariation
+    variations = {}
+    for glyph_index, name in enumerate(glyph_order):
+        glyph = glyf[name]
+        if glyph.isComposite():
+            points = len(glyph.components)
+        elif glyph.numberOfContours > 0:
+            points = len(glyph.coordinates)
+        else:
+            points = 0
+        variations[name] = []
+        for region_index, region in enumerate(regions):
+            delta = 10 + (glyph_index + region_index * 7) % 50
+            # The deltas of the phantom points: only the advance varies.
+            coordinates = [(delta, 0)] * points + [(0, 0), (delta, 0), (0, 0), (0, 0)]
+            variations[name].append(TupleVariation(region, coordinates))
+    return variations
+
+
+def _kerning_features(glyph_order, count):
+    """Returns a feature file with a class kerning lookup of `count` left
+    and right classes (at most one per glyph). One glyph in five stays in
+    class 0."""
+    kerned = [name for index, name in enumerate(glyph_order[1:]) if index % 5]
+    count = min(count, len(kerned))
+    classes = [kerned[index::count] for index in range(count)]
+    lines = [f"@K{index} = [{' '.join(members)}];"
+             for index, members in enumerate(classes)]
+    lines.append("lookup kerning {")
+    for left in range(count):
+        for right in range(count):
+            # Some class pairs have no kerning.
+            if (left + right) % 7:
+                value = -(10 + (left * 7 + right * 13) % 90)
+                lines.append(f"  pos @K{left} @K{right} {value};")
+    lines.append("} kerning;")
+    lines.append("feature kern { lookup kerning; } kern;")
+    return "\n".join(lines)
+
+
+def _substitution_features(glyph_order, count):
+    """Returns a feature file with `count` GSUB lookups, alternating single
+    substitutions (calt), ligatures (liga) and alternates (salt)."""
+    names = glyph_order[2:]
+    if len(names) < 4:
+        return ""
+    lines = []
+    features = {"calt": [], "liga": [], "salt": []}
+    for index in range(count):
+        start = (index * 97) % len(names)
+        chunk = [names[(start + i) % len(names)] for i in range(min(100, len(names) - 3))]
+        target = [names[(start + i + index + 1) % len(names)] for i in range(len(chunk))]
+        lines.append(f"lookup subst{index} {{")
+        if index % 3 == 0:
+            lines.append(f"  sub [{' '.join(chunk)}] by [{' '.join(target)}];")
+            features["calt"].append(index)
+        elif index % 3 == 1:
+            for first, second, ligature in zip(chunk, chunk[1:], target):
+                lines.append(f"  sub {first} {second} by {ligature};")
+            features["liga"].append(index)
+        else:
+            for first, second, third in zip(chunk, target, target[1:]):
+                lines.append(f"  sub {first} from [{second} {third}];")
+            features["salt"].append(index)
+        lines.append(f"}} subst{index};")
+    for tag, indices in features.items():
+        if indices:
+            lookups = " ".join(f"lookup subst{index};" for index in indices)
+            lines.append(f"feature {tag} {{ {lookups} }} {tag};")
+    return "\n".join(lines)
+
+
+def build_font(**parameters):
+    """Returns a TTFont built with the given parameters (see PARAMETERS),
+    the missing ones take their default value."""
+    from fontTools.fontBuilder import FontBuilder
+
+    parameters = check_parameters(parameters)
+    codepoints = list(_codepoints(parameters["glyphs"] - 2))
+    cmap = {codepoint: _glyph_name(codepoint) for codepoint in codepoints}
+    cmap[0x20] = "space"
+    glyph_order = [".notdef", "space"] + [_glyph_name(codepoint) for codepoint in codepoints]
+
+    glyphs = {".notdef": _simple_glyph(0), "space": _empty_glyph()}
+    levels = _levels(glyph_order[2:], parameters["composite_depth"])
+    for index, name in enumerate(levels[0]):
+        glyphs[name] = _simple_glyph(index)
+    for below, level in zip(levels, levels[1:]):
+        for index, name in enumerate(level):
+            components = [below[(2 * index) % len(below)],
+                          below[(2 * index + 1) % len(below)]]
+            glyphs[name] = _composite_glyph(index, components, glyphs)
+
+    builder = FontBuilder(UPM, isTTF=True)
+    builder.setupGlyphOrder(glyph_order)
+    builder.setupCharacterMap(cmap)
+    builder.setupGlyf(glyphs)
+    glyf = builder.font["glyf"]
+    metrics = {}
+    for name in glyph_order:
+        # The bounds were computed by setupGlyf.
+        metrics[name] = (ADVANCE, getattr(glyf[name], "xMin", 0))
+    builder.setupHorizontalMetrics(metrics)
+    builder.setupHorizontalHeader(ascent=880, descent=-120)
+    builder.setupNameTable({"familyName": FAMILY_NAME,
+                            "styleName": "Regular",
+                            "uniqueFontIdentifier": f"{FAMILY_NAME} Regular",
+                            "fullName": f"{FAMILY_NAME} Regular",
+                            "psName": FAMILY_NAME.replace(" ", "") + "-Regular",
+                            "version": "Version 1.000"})
+    builder.setupOS2(sTypoAscender=880, sTypoDescender=-120, sTypoLineGap=0,
+                     usWinAscent=1000, usWinDescent=200,
+                     achVendID="NONE", fsType=0)
+    # Like large CJK fonts, those with more glyphs than post format 2 can
+    # name get a post format 3 table.
+    builder.setupPost(keepGlyphNames=len(glyph_order) <= MAX_NAMED_GLYPHS)
+
+    if parameters["axes"]:
+        axes = _axes(parameters["axes"])
+        instances = [{"location": {tag: default for tag, _, default, _ in axes},
+                      "stylename": "Regular"}]
+        builder.setupFvar([(tag, minimum, default, maximum, tag)
+                           for tag, minimum, default, maximum in axes], instances)
+        regions = _regions(axes, parameters["masters"] - 1)
+        builder.setupGvar(_variations(glyf, glyph_order, regions))
+
+    features = "\n".join(filter(None, [
+        _kerning_features(glyph_order, parameters["kerning_classes"])
+        if parameters["kerning_classes"] else "",
+        _substitution_features(glyph_order, parameters["gsub_lookups"])
+        if parameters["gsub_lookups"] else "",
+    ]))
+    if features:
+        builder.addOpenTypeFeatures(features)
+    return builder.font
+
+
+def font_filename(parameters):
+    """Returns a file name that describes the parameters."""
+    parameters = check_parameters(parameters)
+    settings = "-".join(f"{name.replace('_', '')}{parameters[name]}"
+                        for name in PARAMETERS)
+    return f"Synthetic-{settings}.ttf"
@@ -13,16 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+from functools import lru_cache
+import mmap
 import os
 import subprocess
 import sys
 
 from fontTools.ttLib import TTFont
-from fontTools.unicodedata import ot_tag_to_script
 from typing import Text, Optional
 from fontbakery.constants import NO_COLORS_THEME, DARK_THEME, LIGHT_THEME
-from ufo2ft.constants import INDIC_SCRIPTS, USE_SCRIPTS
-from vharfbuzz import Vharfbuzz
 
 
 
@@ -242,6 +241,47 @@ def filesize_formatting(s):
         return f"{s/(1024*1024):.1f}Mb"
 
 
+class _MappedFontFile(mmap.mmap):
+    """A read-only memory map of a font file, with the `name` attribute
+    that fontTools and the checks expect of a file object."""
+
+
+def open_ttfont(path, **kwargs):
+    """Returns a TTFont of the font file at `path`, which reads the file
+    through a read-only memory map instead of copying it into memory.
+    Tables are decompiled on first access (lazy=True), so the tables that
+    no check asks for (e.g. glyf, CFF or GPOS when only the name table is
+    checked) are never decompiled."""
+    with open(path, "rb") as fh:
+        try:
+            data = _MappedFontFile(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # An empty file or a file system that can't be memory mapped.
+            return TTFont(path, **kwargs)
+    data.name = path
+    return TTFont(data, lazy=True, **kwargs)
+
+
+@lru_cache(maxsize=8)
+def _get_hb_face(path, mtime_ns, size):
+    import uharfbuzz as hb
+    # HarfBuzz maps the file itself, like open_ttfont.
+    return hb.Face(hb.Blob.from_file_path(path))
+
+
+def get_hb_font(path):
+    """Returns a new harfbuzz font of the font file at `path`, scaled to
+    font units. The faces of recently used files are reused, and their
+    data is memory mapped, not read into memory."""
+    import uharfbuzz as hb
+    stat = os.stat(path)
+    face = _get_hb_face(path, stat.st_mtime_ns, stat.st_size)
+    font = hb.Font(face)
+    font.scale = (face.upem, face.upem)
+    hb.ot_font_set_funcs(font)
+    return font
+
+
 def get_bounding_box(font):
     """ Returns max and min bbox of given truetype font """
     ymin = 0
@@ -264,14 +304,8 @@ def get_name_entries(font,
                      platformID=None,
                      encodingID=None,
                      langID=None):
-    results = []
-    for entry in font['name'].names:
-        if entry.nameID == nameID and \
-           (platformID is None or entry.platformID == platformID) and \
-           (encodingID is None or entry.platEncID == encodingID) and \
-           (langID is None or entry.langID == langID):
-            results.append(entry)
-    return results
+    from fontbakery.nameindex import get_name_index
+    return get_name_index(font).entries(nameID, platformID, encodingID, langID)
 
 
 def get_name_entry_strings(font,
@@ -279,8 +313,8 @@ def get_name_entry_strings(font,
                            platformID=None,
                            encodingID=None,
                            langID=None):
-    entries = get_name_entries(font, nameID, platformID, encodingID, langID)
-    return list(map(lambda e: e.string.decode(e.getEncoding()), entries))
+    from fontbakery.nameindex import get_name_index
+    return get_name_index(font).strings(nameID, platformID, encodingID, langID)
 
 
 def name_entry_id(name):
@@ -306,18 +340,8 @@ def glyph_contour_count(font, name):
     This implementation will also return contour count for
     composite glyphs.
     """
-    contour_count = 0
-    items = [font['glyf'][name]]
-
-    while items:
-        g = items.pop(0)
-        if g.isComposite():
-            for comp in g.components:
-                if comp.glyphName != ".ttfautohint":
-                    items.append(font['glyf'][comp.glyphName])
-        if g.numberOfContours != -1:
-            contour_count += g.numberOfContours
-    return contour_count
+    from fontbakery.glyphgraph import get_component_graph
+    return get_component_graph(font).contour_count(name)
 
 
 def get_font_glyph_data(font):
@@ -391,13 +415,13 @@ class BadCertificateSetupException(Exception):
 
 
 def download_file(url):
-    from urllib.request import urlopen
-    from urllib.error import URLError
+    import requests
     from io import BytesIO
+    from fontbakery import network
     try:
-        return BytesIO(urlopen(url).read())
-    except URLError as e:
-        if "CERTIFICATE_VERIFY_FAILED" in str(e.reason):
+        response = network.get(url)
+    except requests.exceptions.RequestException as e:
+        if "CERTIFICATE_VERIFY_FAILED" in str(e):
             raise BadCertificateSetupException(
                 "You probably installed official"
                 " Mac python from python.org but forgot to also install"
@@ -405,6 +429,9 @@ def download_file(url):
                 " Readme about that. Check the Python folder in the"
                 " Applications directory, you should find a shell script"
                 " to install the certificates.")
+        return None
+    if response.status_code == requests.codes.ok:
+        return BytesIO(response.content)
 
 
 def cff_glyph_has_ink(font: TTFont, glyph_name: Text) -> bool:
@@ -422,22 +449,8 @@ def cff_glyph_has_ink(font: TTFont, glyph_name: Text) -> bool:
 
 
 def ttf_glyph_has_ink(font: TTFont, name: Text) -> bool:
-    glyph = font['glyf'].glyphs[name]
-    glyph.expand(font['glyf'])
-
-    if not glyph.isComposite():
-        if glyph.numberOfContours == 0:
-            return False
-        (coords, _, _) = glyph.getCoordinates(font['glyf'])
-        # you need at least 3 points to draw
-        return len(coords) > 2
-
-    # Check for ink in each sub-component.
-    for glyph_name in glyph.getComponentNames(glyph.components):
-        if glyph_has_ink(font, glyph_name):
-            return True
-
-    return False
+    from fontbakery.glyphgraph import get_component_graph
+    return get_component_graph(font).has_ink(name)
 
 
 def unicoderange_bit_name(bit):
@@ -461,26 +474,27 @@ def get_preferred_cmap(ttFont):
 
 
 def chars_in_range(ttFont, bit):
+    from bisect import bisect_left, bisect_right
     from fontbakery.constants import UNICODERANGE_DATA
-    cmap = get_preferred_cmap(ttFont)
+    codepoints = sorted(get_preferred_cmap(ttFont))
     chars = []
-    for c in sorted(cmap):
-        for entry in UNICODERANGE_DATA[bit]:
-            if c >= entry[2] and c <= entry[3]:
-                chars.append(c)
-    return chars
+    for _, _, start, end in UNICODERANGE_DATA[bit]:
+        chars.extend(codepoints[bisect_left(codepoints, start):
+                                bisect_right(codepoints, end)])
+    return sorted(chars)
 
 
 def compute_unicoderange_bits(ttFont):
+    from bisect import bisect_left
     from fontbakery.constants import UNICODERANGE_DATA
-    cmap = get_preferred_cmap(ttFont)
+    codepoints = sorted(get_preferred_cmap(ttFont))
     result = 0
-    for c in sorted(cmap):
-        for bit in range(len(UNICODERANGE_DATA)):
-            for entry in UNICODERANGE_DATA[bit]:
-                bit = entry[0]
-                if c >= entry[2] and c <= entry[3]:
-                    result |= (1 << bit)
+    for entries in UNICODERANGE_DATA:
+        for bit, _, start, end in entries:
+            # Is any codepoint of the font within the range?
+            index = bisect_left(codepoints, start)
+            if index < len(codepoints) and codepoints[index] <= end:
+                result |= (1 << bit)
     return result
 
 
@@ -543,59 +557,36 @@ def can_shape(ttFont, text, parameters=None):
     Returns true if the font can render a text string without any
     .notdef characters.
     '''
-    filename = ttFont.reader.file.name
-    vharfbuzz = Vharfbuzz(filename)
-    buf = vharfbuzz.shape(text, parameters)
+    import uharfbuzz as hb
+    parameters = parameters or {}
+    font = get_hb_font(ttFont.reader.file.name)
+    if parameters.get("variations"):
+        font.set_variations(parameters["variations"])
+    buf = hb.Buffer()
+    buf.add_str(text)
+    buf.guess_segment_properties()
+    for key in ("script", "direction", "language"):
+        if parameters.get(key):
+            setattr(buf, key, parameters[key])
+    shapers = [parameters["shaper"]] if parameters.get("shaper") else None
+    hb.shape(font, buf, parameters.get("features"), shapers=shapers)
     return all(g.codepoint != 0 for g in buf.glyph_infos)
 
 
 def all_kerning(ttFont):
+    """Lazily yields the kerning pairs of the font as (left glyph, right glyph,
+    Value1, Value2), class based kerning expanded to the pairs of glyphs.
+    Use `fontbakery.kerning.get_kerning` to query the kerning without
+    making all the pairs."""
+    from fontbakery.kerning import get_kerning
     if "GPOS" not in ttFont:
-        return []
-    rules = []
-
-    def _invertClassDef(a, font):
-        classes = {}
-        for glyph, klass in a.items():
-            if klass not in classes:
-                classes[klass] = []
-            classes[klass].append(glyph)
-        glyphset = set(font.getGlyphOrder())
-        classes[0] = glyphset - set(a.keys())
-        return classes
-
-    kern_subtables = []
-    for lu in ttFont["GPOS"].table.LookupList.Lookup:
-        for subtable in lu.SubTable:
-            if subtable.LookupType == 9:
-                subtable = subtable.ExtSubTable
-            if subtable.LookupType == 2:
-                kern_subtables.append(subtable)
-
-    for subtable in kern_subtables:
-        if subtable.Format == 1:
-            for g, pair in zip(subtable.Coverage.glyphs, subtable.PairSet):
-                for vr in pair.PairValueRecord:
-                    rules.append((g, vr.SecondGlyph, vr.Value1, vr.Value2))
-        else:
-            class1 = _invertClassDef(subtable.ClassDef1.classDefs, ttFont)
-            class2 = _invertClassDef(subtable.ClassDef2.classDefs, ttFont)
-            for ix1, c1 in enumerate(subtable.Class1Record):
-                if ix1 not in class1:
-                    continue
-                for ix2, c2 in enumerate(c1.Class2Record):
-                    if ix2 not in class2:
-                        continue
-                    firstClass = list(
-                        set(class1[ix1]) & set(subtable.Coverage.glyphs)
-                    )
-                    for left in firstClass:
-                        for right in class2[ix2]:
-                            rules.append((left, right, c2.Value1, c2.Value2))
-    return rules
+        return iter(())
+    return get_kerning(ttFont).pairs()
 
 
 def is_complex_shaper_font(ttFont):
+    from fontTools.unicodedata import ot_tag_to_script
+    from ufo2ft.constants import INDIC_SCRIPTS, USE_SCRIPTS
     for table in ["GSUB", "GPOS"]:
         if table not in ttFont:
             continue
@@ -613,20 +604,23 @@ def is_complex_shaper_font(ttFont):
 def iterate_lookup_list_with_extensions(ttFont, table, callback, *args):
     """Iterates over the lookup list of a font's GSUB/GPOS table, calling
     the callback with the lookup and the provided arguments, but descending
-    into Extension subtables."""
-    if table not in ttFont or not ttFont[table].table.LookupList:
+    into Extension subtables. Lookups of extensions are passed as an object
+    with the LookupType and the SubTable of the extended lookup, the font
+    itself is not modified."""
+    from types import SimpleNamespace
+    from fontbakery.layoutindex import get_layout_index
+
+    layout = get_layout_index(ttFont)
+    if table not in layout.tables or not layout.tables[table].table.LookupList:
         return
 
-    extension_type = 9 if table == "GPOS" else 7
-
-    for lookup in ttFont[table].table.LookupList.Lookup:
-        if lookup.LookupType == extension_type:
-            for xt in lookup.SubTable:
-                xt.SubTable = [xt.ExtSubTable]
-                xt.LookupType = xt.ExtSubTable.LookupType
-                callback(xt, *args)
-        else:
-            callback(lookup, *args)
+    for lookup, (lookup_type, subtables) in zip(layout.tables[table].table.LookupList.Lookup,
+                                                layout.lookups[table]):
+        if lookup.LookupType != lookup_type:
+            lookup = SimpleNamespace(LookupType=lookup_type,
+                                     LookupFlag=lookup.LookupFlag,
+                                     SubTable=subtables)
+        callback(lookup, *args)
 
 
 
@@ -46,6 +46,7 @@ setup(
               'fontbakery.sphinx_extensions'
               ],
     package_data={'fontbakery': ['data/*.cache',
+                                 'data/compiled/*.bin',
                                  'data/googlefonts/*_exceptions.txt']},
     classifiers=[
         'Environment :: Console',
@@ -73,6 +74,7 @@ setup(
         'gflanguages>=0.3.0', # there was an api simplification/update on v0.3.0 (see https://github.com/googlefonts/gflanguages/pull/7)
         'glyphsets>=0.5.0',
         'lxml',
+        'numpy',
         'opentype-sanitizer>=7.1.9',  # 7.1.9 fixes caret value format = 3 bug
                                       # (see https://github.com/khaledhosny/ots/pull/182)
         'opentypespec',
@@ -87,7 +89,7 @@ setup(
         'ufolint',
         'ufo2ft>=2.25.2',  # 2.25.2 updated the script lists for Unicode 14.0
         'unicodedata2',
-        'vharfbuzz',
+        'vharfbuzz>=0.1.3,<0.2',  # profiles/shaping.py sets up Vharfbuzz objects itself
     ],
     extras_require={
         'docs': [
@@ -0,0 +1,135 @@
+import glob
+import json
+import os
+import re
+import signal
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from fontbakery.daemon import DAEMON_ENV, get_authkey_path, is_supported, submit
+
+
+def _wait_for(predicate, timeout=30):
+    for _ in range(int(timeout * 10)):
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _start_daemon(tmp_path, workers=1):
+    socket_path = str(tmp_path / "daemon.sock")
+    log = open(tmp_path / "daemon.log", "w")
+    daemon = subprocess.Popen([sys.executable, "-m", "fontbakery.commands.daemon",
+                               "--socket", socket_path,
+                               "--profile", "universal",
+                               "--workers", str(workers)],
+                              stdout=log)
+    log.close()
+    assert _wait_for(lambda: os.path.exists(socket_path))
+    return daemon, socket_path
+
+
+def _served(tmp_path):
+    """The (pid, command line) of the runs the daemon served."""
+    with open(tmp_path / "daemon.log") as fh:
+        return [(int(pid), command) for pid, command
+                in re.findall(r"Serving \(pid (\d+)\): (.*)", fh.read())]
+
+
+@pytest.mark.skipif(not is_supported(), reason="requires fork and Unix sockets")
+def test_daemon_runs_checks_in_client_cwd(tmp_path):
+    test_font = os.path.abspath(os.path.join("data", "test", "nunito",
+                                             "Nunito-Regular.ttf"))
+    assert submit(["--version"], str(tmp_path / "daemon.sock")) is None  # not running yet
+
+    daemon, socket_path = _start_daemon(tmp_path)
+    try:
+        env = dict(os.environ, **{DAEMON_ENV: socket_path})
+        for run in range(2):  # also served by a fresh fork after the first run
+            output = subprocess.check_output(
+                ["fontbakery", "check-universal",
+                 "-c", "com.google.fonts/check/family/single_directory",
+                 "--json", "report.json", test_font],
+                cwd=tmp_path, env=env).decode()
+            assert "DONE!" in output
+            # The report is written relative to the working directory of the client.
+            with open(tmp_path / "report.json") as fh:
+                assert json.load(fh)["result"]["PASS"] == 1
+            os.remove(tmp_path / "report.json")
+            # The run was served by the daemon, not run locally.
+            served = _served(tmp_path)
+            assert len(served) == run + 1
+            assert served[-1][1].startswith("fontbakery check-universal")
+
+        with pytest.raises(subprocess.CalledProcessError):
+            subprocess.check_output(["fontbakery", "check-universal"],
+                                    cwd=tmp_path, env=env,
+                                    stderr=subprocess.DEVNULL)
+        assert len(_served(tmp_path)) == 3
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=30)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+@pytest.mark.skipif(not is_supported(), reason="requires fork and Unix sockets")
+def test_daemon_interrupts_run_of_interrupted_client(tmp_path):
+    fonts = sorted(glob.glob(os.path.abspath(os.path.join("data", "test", "*", "*.ttf"))))
+    daemon, socket_path = _start_daemon(tmp_path)
+    try:
+        env = dict(os.environ, **{DAEMON_ENV: socket_path})
+        client = subprocess.Popen(["fontbakery", "check-universal"] + fonts,
+                                  cwd=tmp_path, env=env,
+                                  stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        assert _wait_for(lambda: _served(tmp_path))
+        pid = _served(tmp_path)[0][0]
+        assert _is_running(pid)
+
+        client.send_signal(signal.SIGINT)  # Ctrl-C
+        client.wait(timeout=30)
+        # The worker stopped the run long before it could have finished.
+        assert _wait_for(lambda: not _is_running(pid), timeout=10)
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=30)
+
+
+@pytest.mark.skipif(not is_supported(), reason="requires fork and Unix sockets")
+def test_daemon_is_private(tmp_path):
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o755)
+    result = subprocess.run([sys.executable, "-m", "fontbakery.commands.daemon",
+                             "--socket", str(shared / "daemon.sock")],
+                            capture_output=True, timeout=60)
+    assert result.returncode != 0
+    assert b"Refusing to serve" in result.stderr
+    assert not os.path.exists(shared / "daemon.sock")
+
+    daemon, socket_path = _start_daemon(tmp_path)
+    try:
+        for path in (socket_path, get_authkey_path(socket_path)):
+            assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+        with pytest.raises(AuthenticationError):
+            Client(socket_path, family="AF_UNIX", authkey=b"guessed")
+        assert submit(["--version"], socket_path) == 0
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=30)
+    assert not os.path.exists(get_authkey_path(socket_path))
@@ -1,3 +1,4 @@
+import json
 import os
 import subprocess
 import sys
@@ -148,3 +149,57 @@ explicit_checks:
     # This font has a WARN here, so should now FAIL
     assert "FAIL: 1" in stdout
     os.unlink(config.name)
+
+
+def test_command_jsonl_to_json(tmp_path):
+    """Test if a --jsonl report converts to the --json report of the same run."""
+    test_font = os.path.join("data", "test", "nunito", "Nunito-Regular.ttf")
+    jsonl_file = str(tmp_path / "report.jsonl")
+    json_file = str(tmp_path / "report.json")
+    converted_file = str(tmp_path / "converted.json")
+    subprocess.check_output([
+        "fontbakery", "check-universal",
+        "-c", "com.google.fonts/check/family/single_directory",
+        "-c", "com.google.fonts/check/whitespace_glyphs",
+        "--json", json_file, "--jsonl", jsonl_file, test_font
+    ])
+    subprocess.check_output(["fontbakery", "jsonl-to-json", jsonl_file, converted_file])
+
+    import json
+    with open(json_file) as fh:
+        expected = json.load(fh)
+    with open(converted_file) as fh:
+        converted = json.load(fh)
+    for doc in (expected, converted):
+        for section in doc["sections"]:
+            for check in section["checks"]:
+                del check["timing"]
+    assert converted == expected
+
+    # the report of an interrupted run
+    with open(jsonl_file) as fh:
+        lines = fh.readlines()
+    with open(jsonl_file, "w") as fh:
+        fh.writelines(lines[:2] + [lines[2][:10]])
+    subprocess.check_output(["fontbakery", "jsonl-to-json", jsonl_file, converted_file])
+    with open(converted_file) as fh:
+        converted = json.load(fh)
+    assert converted["result"]["(not finished)"] == 1
+    assert len(converted["sections"][0]["checks"]) == 1
+
+
+# Third-party packages that only some checks need. Listing the checks of a
+# profile must not import them.
+HEAVY_IMPORTS = ["beziers", "bs4", "cmarkgfm", "collidoscope", "defcon",
+                 "glyphsLib", "glyphsets", "opentypespec", "requests",
+                 "stringbrewer", "toml", "ufo2ft", "uharfbuzz", "vharfbuzz",
+                 "yaml", "fontbakery.multiproc", "fontbakery.reporters.html"]
+
+@pytest.mark.parametrize("profile", ["universal", "googlefonts"])
+def test_list_checks_startup(profile):
+    """Test that `--list-checks` doesn't import the dependencies of the checks.
+      Its time is measured by `fontbakery benchmark --startup`."""
+    from fontbakery.benchmark import measure_startup
+    result = measure_startup(profile, repeat=1)
+    imported = [name for name in HEAVY_IMPORTS if name in result["modules"]]
+    assert imported == []
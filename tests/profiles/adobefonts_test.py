@@ -309,7 +309,7 @@ def test_check_override_freetype_rasterizer(mock_import_error):
     assert "FreeType is not available" in msg
 
 
-@patch("requests.get", side_effect=ConnectionError)
+@patch("fontbakery.network.get", side_effect=ConnectionError)
 def test_check_override_fontbakery_version(mock_get):
     """Check that overridden test yields SKIP rather than FAIL."""
     check = CheckTester(
@@ -3173,6 +3173,57 @@ def test_check_kerning_for_non_ligated_sequences():
         "\t- f + f\n\n\t- f + t \n\n\t- And t + f"
     )
 
+    # Its kern feature has a format 1 PairPos subtable (glyph pairs, as opposed
+    # to class kerning), which kerns the "f + f" sequence once we add it.
+    from fontTools.ttLib.tables import otTables
+    from fontbakery.layoutindex import get_layout_index
+
+    def kern_pair(subtable, first, second):
+        record = otTables.PairValueRecord()
+        record.SecondGlyph = second
+        record.Value1 = otTables.ValueRecord()
+        record.Value1.XAdvance = -10
+        if first not in subtable.Coverage.glyphs:
+            pair_set = otTables.PairSet()
+            pair_set.PairValueRecord = []
+            subtable.Coverage.glyphs.append(first)
+            subtable.PairSet.append(pair_set)
+        index = subtable.Coverage.glyphs.index(first)
+        subtable.PairSet[index].PairValueRecord.append(record)
+
+    layout = get_layout_index(ttFont)
+    subtable = next(subtable
+                    for index in layout.feature_lookups["GPOS"]["kern"]
+                    for subtable in layout.lookups["GPOS"][index][1]
+                    if subtable.Format == 1)
+    kern_pair(subtable, "f", "f")
+    msg = assert_results_contain(check(ttFont), WARN, "lacks-kern-info")
+    assert msg == (
+        "GPOS table lacks kerning info for the following non-ligated sequences:\n\n"
+        "\t- f + t \n\n\t- And t + f"
+    )
+
+    kern_pair(subtable, "f", "t")
+    kern_pair(subtable, "t", "f")
+    assert_PASS(check(ttFont))
+
+    # Class kerning (PairPos format 2) counts too, but only for the cells
+    # that actually adjust the pair: every glyph has an (empty) cell with "f".
+    ttFont = TTFont(TEST_FILE("source-sans-pro/OTF/SourceSansPro-Bold.otf"))
+    subtable = next(subtable
+                    for subtable in get_layout_index(ttFont).subtables("GPOS", 2)
+                    if subtable.Format == 2 and "f" in subtable.Coverage.glyphs)
+    class1 = subtable.ClassDef1.classDefs.get("f", 0)
+    class2 = subtable.ClassDef2.classDefs.get("t", 0)
+    record = subtable.Class1Record[class1].Class2Record[class2]
+    assert not getattr(record.Value1, "XAdvance", 0)
+    record.Value1.XAdvance = -10
+    msg = assert_results_contain(check(ttFont), WARN, "lacks-kern-info")
+    assert msg == (
+        "GPOS table lacks kerning info for the following non-ligated sequences:\n\n"
+        "\t- f + f \n\n\t- And t + f"
+    )
+
 
 def test_check_family_control_chars():
     """Are any unacceptable control characters present in font files?"""
@@ -98,3 +98,21 @@ def test_check_shaping_collides():
         assert_results_contain(check(wrap_args(config, font)),
                                FAIL, "shaping-collides",
                                "ïï collides in Nunito")
+
+
+def test_get_vharfbuzz():
+    from fontbakery.profiles.shaping import get_vharfbuzz
+    from fontbakery.utils import get_hb_font
+
+    font = TEST_FILE("nunito/Nunito-Regular.ttf")
+    ttFont = TTFont(font)
+    vharfbuzz = get_vharfbuzz(ttFont)
+    # The harfbuzz font shares the face of the other checks, and the
+    # font is not read or parsed once more.
+    assert vharfbuzz.hbfont.face is get_hb_font(font).face
+    assert vharfbuzz.ttfont is ttFont
+    assert not hasattr(vharfbuzz, "fontdata")
+    buf = vharfbuzz.shape("AV", {})
+    assert vharfbuzz.serialize_buf(buf) == "A=0+664|V=1+691"
+    assert vharfbuzz.serialize_buf(vharfbuzz.buf_from_string("A=0+664|V=1+691")) \
+        == "A=0+664|V=1+691"
@@ -317,7 +317,7 @@ class MockDistribution:
 # We don't want to make an actual GET request to PyPI.org, so we'll mock it.
 # We'll also mock pip-api's 'installed_distributions' method.
 @patch("pip_api.installed_distributions")
-@patch("requests.get")
+@patch("fontbakery.network.get")
 def test_check_fontbakery_version(mock_get, mock_installed):
     """Check if Font Bakery is up-to-date"""
     check = CheckTester(universal_profile,
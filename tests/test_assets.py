@@ -0,0 +1,94 @@
+import pickle
+
+import pytest
+
+from fontbakery.assets import (ASSETS,
+                               AssetTable,
+                               asset_path,
+                               compile_asset,
+                               compile_table,
+                               load_asset)
+
+
+@pytest.mark.parametrize("name", sorted(ASSETS))
+def test_compiled_assets_are_up_to_date(name):
+    """The tables in data/compiled must be rebuilt with
+      `fontbakery build-assets` when one of their sources changes."""
+    with open(asset_path(name), "rb") as fh:
+        assert fh.read() == compile_asset(name)
+
+
+def test_asset_table_lookups():
+    table = AssetTable("vendor-ids", compile_table([(b"GOOG", b"Google"),
+                                                    (b"ADBE", b"Adobe"),
+                                                    (b"MS  ", b"Microsoft")]))
+    assert len(table) == 3
+    assert list(table) == ["ADBE", "GOOG", "MS  "]
+    assert table["GOOG"] == "Google"
+    assert "MS" not in table
+    assert "ZZZZ" not in table
+    assert 42 not in table
+    assert table.get("AAAA") is None
+
+
+def test_load_asset():
+    vendor_ids = load_asset("vendor-ids")
+    assert vendor_ids is load_asset("vendor-ids")
+    assert vendor_ids["ADBE"] == "Adobe"
+    assert pickle.loads(pickle.dumps(vendor_ids)) is vendor_ids
+
+    contours = load_asset("glyph-contours-by-codepoint")
+    assert contours[ord("A")] == [2]
+    assert 0xE000 not in contours  # Private Use Area
+    assert load_asset("glyph-contours-by-name")["A"] == [2]
+    assert load_asset("gf-axis-registry")["wght"].default_value == 400
+
+
+def test_load_asset_of_other_source_version(monkeypatch):
+    from importlib.metadata import version
+    assert load_asset("gf-axis-registry").version == \
+        "axisregistry " + version("axisregistry")
+    assert load_asset("vendor-ids").version.startswith("sha256 ")
+
+    # Another version of axisregistry is installed
+    asset = ASSETS["gf-axis-registry"]
+    monkeypatch.setitem(ASSETS, "gf-axis-registry",
+                        asset._replace(version=lambda: "axisregistry 99.0"))
+    load_asset.cache_clear()
+    try:
+        table = load_asset("gf-axis-registry")
+        # compiled in memory from the installed version
+        assert table.version == "axisregistry 99.0"
+        assert isinstance(table._data, bytes)
+        assert table["wght"].default_value == 400
+    finally:
+        load_asset.cache_clear()
+
+
+def test_shipped_source_version(tmp_path):
+    """Data shipped with fontbakery is versioned by a hash of its files,
+    so a table built before they were edited isn't used."""
+    from fontbakery.assets import _files_version
+    source = tmp_path / "source"
+    source.write_text("A 2")
+    version = _files_version(str(source))
+    before = version()
+    assert before == version()
+    source.write_text("A 3")
+    assert version() != before
+
+
+
+def test_load_asset_of_edited_source(monkeypatch):
+    # vendor-ids.bin was built before the vendor list was edited
+    asset = ASSETS["vendor-ids"]
+    monkeypatch.setitem(ASSETS, "vendor-ids",
+                        asset._replace(version=lambda: "sha256 edited"))
+    load_asset.cache_clear()
+    try:
+        table = load_asset("vendor-ids")
+        assert table.version == "sha256 edited"
+        assert isinstance(table._data, bytes)
+        assert table["ADBE"] == "Adobe"
+    finally:
+        load_asset.cache_clear()
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from fontbakery.benchmark import (BENCHMARK_FORMAT,
+                                  compare,
+                                  find_families,
+                                  growth,
+                                  load_results,
+                                  run_benchmark,
+                                  run_scaling_benchmark,
+                                  save_results)
+from fontbakery.codetesting import TEST_FILE
+from fontbakery.configuration import Configuration
+from fontbakery.profiles.universal import profile as universal_profile
+
+
+def test_find_families(tmp_path):
+    family = tmp_path / "family"
+    (family / "Source.ufo").mkdir(parents=True)
+    (family / "Source.ufo" / "Font.ttf").write_bytes(b"")
+    (family / "Font-Regular.ttf").write_bytes(b"")
+    (family / "Font-Bold.otf").write_bytes(b"")
+    (family / "FONTLOG.txt").write_bytes(b"")
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "empty" / "README.md").write_bytes(b"")
+
+    families = find_families([str(tmp_path)], universal_profile.accepted_files)
+    assert families == [{"fonts": [str(family / "Font-Bold.otf"),
+                                   str(family / "Font-Regular.ttf")]}]
+
+    font = str(family / "Font-Regular.ttf")
+    assert find_families([font], universal_profile.accepted_files) == [{"fonts": [font]}]
+
+
+def _results(**records):
+    return {"format": BENCHMARK_FORMAT,
+            "meta": {},
+            "profiles": {"universal": {"checks": records, "conditions": {}}}}
+
+
+def test_compare():
+    baseline = _results(slower={"wall": 1.0, "memory": 1000},
+                        noise={"wall": 0.001, "memory": 100},
+                        faster={"wall": 1.0})
+    results = _results(slower={"wall": 2.0, "memory": 2000},
+                       noise={"wall": 0.005, "memory": 500},
+                       faster={"wall": 0.5},
+                       new={"wall": 10.0})
+
+    assert compare(results, baseline, min_memory=0) == [
+        {"profile": "universal", "kind": "checks", "name": "noise",
+         "metric": "memory", "baseline": 100, "value": 500},
+        {"profile": "universal", "kind": "checks", "name": "slower",
+         "metric": "wall", "baseline": 1.0, "value": 2.0},
+        {"profile": "universal", "kind": "checks", "name": "slower",
+         "metric": "memory", "baseline": 1000, "value": 2000},
+    ]
+    assert [regression["name"] for regression in compare(results, baseline)] == ["slower"]
+    assert compare(results, baseline, threshold=5, min_memory=0) == []
+
+
+def test_run_benchmark(tmp_path):
+    font = TEST_FILE("nunito/Nunito-Regular.ttf")
+    config = Configuration(explicit_checks=["com.google.fonts/check/xavgcharwidth"],
+                           full_lists=True)
+    results = run_benchmark(["universal"], [font], config=config, repeat=2)
+
+    profile_results = results["profiles"]["universal"]
+    assert profile_results["fonts"] == 1
+    record = profile_results["checks"]["com.google.fonts/check/xavgcharwidth"]
+    assert record["count"] == 1
+    assert record["wall"] >= 0 and record["memory"] > 0
+    assert "ttFont" in profile_results["conditions"]
+
+    filename = str(tmp_path / "results.json")
+    save_results(results, filename)
+    assert load_results(filename) == json.loads(json.dumps(results))
+    assert compare(results, load_results(filename)) == []
+
+    with open(filename, "w") as fh:
+        json.dump({"profiles": {}}, fh)
+    with pytest.raises(ValueError):
+        load_results(filename)
+
+
+def test_growth():
+    assert growth([1, 2, 4], [1.0, 2.0, 4.0]) == pytest.approx(1)
+    assert growth([10, 20, 40], [0.1, 0.4, 1.6]) == pytest.approx(2)
+    # checks that weren't run or took no measurable time are skipped
+    assert growth([10, 20, 40], [0.0, 0.4, 1.6]) == pytest.approx(2)
+    assert growth([10, 20], [0.0, 0.4]) is None
+
+
+def test_run_scaling_benchmark(tmp_path):
+    config = Configuration(explicit_checks=["com.google.fonts/check/unique_glyphnames"],
+                           full_lists=True)
+    results = run_scaling_benchmark(["universal"], "glyphs", [10, 20],
+                                    {"composite_depth": 1}, config=config,
+                                    trace_memory=False, directory=str(tmp_path))
+
+    assert (results["parameter"], results["values"]) == ("glyphs", [10, 20])
+    records = results["profiles"]["universal"]["checks"]["com.google.fonts/check/unique_glyphnames"]
+    assert [record["count"] for record in records] == [1, 1]
+    assert len(list(tmp_path.glob("*.ttf"))) == 2
+
+    with pytest.raises(ValueError):
+        run_scaling_benchmark(["universal"], "glyphs", [1])
@@ -0,0 +1,221 @@
+import os
+
+from fontbakery.cache import PersistentCache, hash_value
+from fontbakery.callable import check, condition
+from fontbakery.checkrunner import CheckRunner, ENDCHECK, PASS
+from fontbakery.configuration import Configuration
+from fontbakery.fonts_profile import profile_factory
+from fontbakery.section import Section
+
+condition_calls = []
+
+
+@condition
+def file_length(font):
+    condition_calls.append(font)
+    with open(font, "rb") as fh:
+        return len(fh.read())
+
+
+@check(id="com.example/check/file_length")
+def check_file_length(file_length):
+    """File is not empty."""
+    yield PASS, f"Length: {file_length}"
+
+
+def _make_profile():
+    profile = profile_factory(default_section=Section("Cache Test"))
+    profile.auto_register({"file_length": file_length,
+                           "check_file_length": check_file_length})
+    return profile
+
+
+def _run(profile, fonts, cache):
+    runner = CheckRunner(profile, {"fonts": fonts}, Configuration(),
+                         condition_cache=cache)
+    return [message for status, message, _ in runner.run() if status == ENDCHECK]
+
+
+def test_persistent_cache_roundtrip(tmp_path):
+    cache = PersistentCache(str(tmp_path))
+    key = cache.make_key("a", "b")
+    assert cache.get(key) == (False, None)
+    assert cache.set(key, {"value": [1, 2, 3]})
+    assert cache.get(key) == (True, {"value": [1, 2, 3]})
+
+    # Unpickleable values are just not cached.
+    with open(__file__) as fh:
+        assert not cache.set(cache.make_key("file"), fh)
+
+
+def test_persistent_cache_eviction(tmp_path):
+    cache = PersistentCache(str(tmp_path), max_size=4096)
+    keys = [cache.make_key(i) for i in range(10)]
+    for key in keys:
+        cache.set(key, b"x" * 1000)
+    assert cache.size <= 4096
+    # the most recently written entry survives
+    assert cache.get(keys[-1])[0]
+    assert not cache.get(keys[0])[0]
+
+
+def test_hash_value_uses_file_path_and_content(tmp_path):
+    a = tmp_path / "a.ttf"
+    b = tmp_path / "b.ttf"
+    a.write_bytes(b"same")
+    b.write_bytes(b"same")
+    # Values may depend on the name of a file
+    assert hash_value(str(a)) != hash_value(str(b))
+
+    digest = hash_value(str(a))
+    os.utime(a, ns=(0, 0))
+    assert hash_value(str(a)) == digest
+    a.write_bytes(b"other")
+    os.utime(a, ns=(0, 0))
+    assert hash_value(str(a)) != digest
+
+
+def test_condition_cache_reuse(tmp_path):
+    font = tmp_path / "Font-Regular.ttf"
+    font.write_bytes(b"12345")
+    cache = PersistentCache(str(tmp_path / "cache"))
+    profile = _make_profile()
+
+    del condition_calls[:]
+    assert _run(profile, [str(font)], cache) == [PASS]
+    assert _run(profile, [str(font)], cache) == [PASS]
+    # The second run was served from the cache
+    assert condition_calls == [str(font)]
+
+    font.write_bytes(b"123456")
+    assert _run(profile, [str(font)], cache) == [PASS]
+    assert len(condition_calls) == 2
+
+
+def test_result_cache_replay(tmp_path):
+    from fontbakery.message import Message
+    from fontbakery.status import WARN
+
+    font = tmp_path / "Font-Regular.ttf"
+    font.write_bytes(b"12345")
+    cache = PersistentCache(str(tmp_path / "cache"))
+    check_calls = []
+
+    @check(id="com.example/check/warn")
+    def check_warn(font):
+        """Warn about everything."""
+        check_calls.append(font)
+        yield WARN, Message("warn-code", "A warning.")
+
+    profile = profile_factory(default_section=Section("Result Cache Test"))
+    profile.auto_register({"check_warn": check_warn})
+
+    def run():
+        runner = CheckRunner(profile, {"fonts": [str(font)]}, Configuration(),
+                             result_cache=cache.with_namespace("results"))
+        return [(status, getattr(message, "code", message))
+                for status, message, _ in runner.run()
+                if status in (WARN, ENDCHECK)]
+
+    first = run()
+    assert first == [(WARN, "warn-code"), (ENDCHECK, WARN)]
+    assert run() == first
+    assert len(check_calls) == 1
+
+    font.write_bytes(b"changed")
+    assert run() == first
+    assert len(check_calls) == 2
+
+
+@condition
+def font_directory(font):
+    condition_calls.append(font)
+    return os.path.dirname(font)
+
+
+@condition(persistent=False)
+def sibling_names(font):
+    condition_calls.append(font)
+    return sorted(os.listdir(os.path.dirname(font)))
+
+
+@check(id="com.example/check/font_directory")
+def check_font_directory(font_directory, sibling_names):
+    """Report the directory of the font."""
+    yield PASS, f"{font_directory}: {sibling_names}"
+
+
+def test_condition_cache_keys_paths(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    regular = tmp_path / "a" / "Font-Regular.ttf"
+    bold = tmp_path / "b" / "Font-Bold.ttf"
+    regular.write_bytes(b"12345")
+    bold.write_bytes(b"12345")
+    cache = PersistentCache(str(tmp_path / "cache"))
+    profile = profile_factory(default_section=Section("Cache Test"))
+    profile.auto_register({"font_directory": font_directory,
+                           "sibling_names": sibling_names,
+                           "check_font_directory": check_font_directory})
+
+    def run(font):
+        runner = CheckRunner(profile, {"fonts": [str(font)]}, Configuration(),
+                             condition_cache=cache)
+        return [message for status, message, _ in runner.run() if status == PASS]
+
+    del condition_calls[:]
+    assert run(regular) == [f"{tmp_path / 'a'}: ['Font-Regular.ttf']"]
+    # A byte-identical font elsewhere doesn't get the cached directory
+    assert run(bold) == [f"{tmp_path / 'b'}: ['Font-Bold.ttf']"]
+    assert len(condition_calls) == 4
+
+    # sibling_names reads other files, it is never persisted
+    (tmp_path / "a" / "METADATA.pb").write_bytes(b"")
+    assert run(regular) == [f"{tmp_path / 'a'}: ['Font-Regular.ttf', 'METADATA.pb']"]
+    assert condition_calls[4:] == [str(regular)]
+
+
+def test_result_cache_moved_font(tmp_path):
+    from fontbakery.message import Message
+    from fontbakery.status import WARN
+
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    font = tmp_path / "a" / "Font-Regular.ttf"
+    font.write_bytes(b"12345")
+    cache = PersistentCache(str(tmp_path / "cache")).with_namespace("results")
+    check_calls = []
+
+    @check(id="com.example/check/filename")
+    def check_filename(font):
+        """Warn about the filename."""
+        check_calls.append(font)
+        yield WARN, Message("filename", f"Checked {font}.")
+
+    profile = profile_factory(default_section=Section("Result Cache Test"))
+    profile.auto_register({"check_filename": check_filename})
+
+    def run(font):
+        runner = CheckRunner(profile, {"fonts": [str(font)]}, Configuration(),
+                             result_cache=cache)
+        return [message.message for status, message, _ in runner.run()
+                if status == WARN]
+
+    assert run(font) == [f"Checked {font}."]
+    assert run(font) == [f"Checked {font}."]
+    assert len(check_calls) == 1
+
+    # A renamed and moved, byte-identical font gets its own results
+    moved = tmp_path / "b" / "Font-Bold.ttf"
+    os.rename(font, moved)
+    assert run(moved) == [f"Checked {moved}."]
+    assert len(check_calls) == 2
+
+
+def test_persistent_cache_size_of_replaced_entries(tmp_path):
+    cache = PersistentCache(str(tmp_path), max_size=1024 * 1024)
+    key = cache.make_key("stale")
+    for _ in range(10):
+        cache.set(key, b"x" * 1000)
+    assert cache.size == sum(size for _, size, _ in cache._entries())
+    assert cache.size < 2000
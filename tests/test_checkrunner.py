@@ -0,0 +1,293 @@
+import time
+import tracemalloc
+
+import pytest
+
+from fontbakery.callable import check, condition
+from fontbakery.checkrunner import (CheckRunner, ENDCHECK, ERROR, PASS,
+                                    can_limit_time)
+from fontbakery.configuration import Configuration
+from fontbakery.instrumentation import TimingHistory
+from fontbakery.fonts_profile import profile_factory
+from fontbakery.section import Section
+
+condition_calls = []
+
+
+@condition
+def font_name(font):
+    condition_calls.append(font)
+    return font.upper()
+
+
+@check(id="com.example/check/font_name")
+def check_font_name(font_name):
+    """Font has a name."""
+    yield PASS, font_name
+
+
+@check(id="com.example/check/font_name/again")
+def check_font_name_again(font_name):
+    """Font still has a name."""
+    yield PASS, font_name
+
+
+@check(id="com.example/check/family")
+def check_family(fonts):
+    """Family has fonts."""
+    yield PASS, ", ".join(fonts)
+
+
+def _make_runner(**kwds):
+    profile = profile_factory(default_section=Section("Runner Test"))
+    profile.auto_register({"font_name": font_name,
+                           "check_font_name": check_font_name,
+                           "check_font_name_again": check_font_name_again,
+                           "check_family": check_family})
+    fonts = ["a.ttf", "b.ttf", "c.ttf"]
+    return CheckRunner(profile, {"fonts": fonts}, Configuration(), **kwds)
+
+
+def test_release_conditions():
+    del condition_calls[:]
+    runner = _make_runner()
+    results = [message for status, message, _ in runner.run() if status == ENDCHECK]
+    assert results == [PASS] * 7
+    # Each condition was evaluated exactly once and released after its last use.
+    assert sorted(condition_calls) == ["a.ttf", "b.ttf", "c.ttf"]
+    assert runner._cache["conditions"] == {}
+    assert runner.max_cached_conditions == 1
+
+
+def test_release_conditions_externally_controlled():
+    # The jobs of a worker, e.g. of a multiprocessing run: the checks of
+    # two of the fonts, one font after the other.
+    runner = _make_runner()
+    jobs = [identity for identity in runner.order
+            if identity[2] and identity[2][0][1] < 2]
+    jobs.sort(key=lambda identity: identity[2])
+    results = []
+    runner.run_externally_controlled(results.append, iter(jobs))
+    # Without knowing the jobs in advance, nothing is released.
+    assert len(runner._cache["conditions"]) == 2
+
+    del condition_calls[:]
+    runner = _make_runner()
+    runner.expect_checks(jobs)
+    results = []
+    runner.run_externally_controlled(results.append, iter(jobs))
+    assert [message for status, message, _ in results
+            if status == ENDCHECK] == [PASS] * 4
+    assert condition_calls == ["a.ttf", "b.ttf"]
+    assert runner._cache["conditions"] == {}
+    assert runner.max_cached_conditions == 1
+
+
+def test_keep_conditions():
+    del condition_calls[:]
+    runner = _make_runner(release_conditions=False)
+    list(runner.run())
+    assert len(runner._cache["conditions"]) == 3
+    assert runner.max_cached_conditions == 3
+
+
+def test_timings():
+    runner = _make_runner(trace_memory=True)
+    try:
+        identities = [identity for status, _, identity in runner.run()
+                      if status == ENDCHECK]
+    finally:
+        tracemalloc.stop()
+    first, second = identities[1:3]
+    assert first[1].id == "com.example/check/font_name"
+    assert second[1].id == "com.example/check/font_name/again"
+
+    timing = runner.get_timing(first)
+    assert set(timing) == {"wall", "cpu", "memory", "conditions"}
+    # The condition is attributed to the check that needed it first.
+    (condition,) = timing["conditions"]
+    assert condition["name"] == "font_name"
+    assert condition["iterargs"] == {"font": 0}
+    assert "conditions" not in runner.get_timing(second)
+
+    slowest_checks, slowest_conditions = runner.instrumentation.get_slowest(2)
+    assert len(slowest_checks) == 2
+    assert slowest_checks[0][1]["wall"] >= slowest_checks[1][1]["wall"]
+    assert len(slowest_conditions) == 2
+
+
+@condition
+def slow_condition(font):
+    condition_calls.append(font)
+    time.sleep(10)
+    return font
+
+
+@check(id="com.example/check/slow")
+def check_slow(slow_condition):
+    """Needs a slow condition."""
+    yield PASS, slow_condition
+
+
+@pytest.mark.skipif(not can_limit_time(), reason="requires SIGALRM")
+def test_check_timeout():
+    del condition_calls[:]
+    profile = profile_factory(default_section=Section("Timeout Test"))
+    profile.auto_register({"slow_condition": slow_condition,
+                           "check_slow": check_slow,
+                           "font_name": font_name,
+                           "check_font_name": check_font_name})
+    config = Configuration(timeout=1)
+    config["com.example/check/slow"] = {"timeout": 0.1}
+    runner = CheckRunner(profile, {"fonts": ["a.ttf"]}, config)
+
+    start = time.monotonic()
+    events = [(status, message, identity[1].id)
+              for status, message, identity in runner.run()
+              if identity[1] is not None]
+    assert time.monotonic() - start < 5
+
+    slow_events = [(status, getattr(message, "code", message))
+                   for status, message, check_id in events
+                   if check_id == "com.example/check/slow"]
+    assert slow_events[1:] == [(ERROR, "timeout"), (ENDCHECK, ERROR)]
+    # The interrupted condition was not cached as a result.
+    assert ("slow_condition", (("font", 0),)) not in runner._cache["conditions"]
+    # The other check ran normally.
+    assert (ENDCHECK, PASS, "com.example/check/font_name") in events
+
+
+@check(id="com.example/check/font_name/slow")
+def check_font_name_slow(font_name):
+    """Font name takes forever."""
+    time.sleep(10)
+    yield PASS, font_name
+
+
+@pytest.mark.skipif(not can_limit_time(), reason="requires SIGALRM")
+def test_check_timeout_forgets_conditions():
+    del condition_calls[:]
+    profile = profile_factory(default_section=Section("Timeout Test"))
+    profile.auto_register({"font_name": font_name,
+                           "check_font_name": check_font_name,
+                           "check_font_name_slow": check_font_name_slow,
+                           "check_font_name_again": check_font_name_again})
+    config = Configuration()
+    config["com.example/check/font_name/slow"] = {"timeout": 0.1}
+    runner = CheckRunner(profile, {"fonts": ["a.ttf", "b.ttf"]}, config,
+                         release_conditions=False)
+    results = [(identity[1].id, message) for status, message, identity
+               in runner.run() if status == ENDCHECK]
+    assert results.count(("com.example/check/font_name/slow", ERROR)) == 2
+    # The aborted check may have left the values it used in a broken
+    # state, they are evaluated again for the checks that follow.
+    assert sorted(condition_calls) == ["a.ttf", "a.ttf", "b.ttf", "b.ttf"]
+    assert len(runner._cache["conditions"]) == 2
+
+
+def test_timing_history(tmp_path):
+    runner = _make_runner()
+    list(runner.run())
+    history = TimingHistory()
+    history.update(runner)
+    assert set(history.checks["com.example/check/font_name"]["files"]) == {
+        "a.ttf", "b.ttf", "c.ttf"}
+
+    history.checks["com.example/check/font_name"]["files"]["a.ttf"] = 10
+    filename = str(tmp_path / "timings.json")
+    history.save(filename)
+
+    loaded = TimingHistory()
+    assert loaded.load(filename)
+    assert loaded.get_cost("com.example/check/font_name", "a.ttf") == 10
+    assert loaded.get_cost("com.example/check/family") < 10
+    # unknown check ids get the median
+    assert loaded.get_cost("com.example/unknown") == sorted(
+        entry["wall"] for entry in loaded.checks.values())[1]
+
+
+def test_check_order():
+    runner = _make_runner()
+    order = runner.order
+    assert runner.check_order(order[::2]) == order[::2]
+    section, check, iterargs = order[1]
+    with pytest.raises(ValueError):
+        runner.check_order([(section, check, (("font", 99),))])
+    with pytest.raises(ValueError):
+        runner.check_order([(section, check_family, iterargs)])
+
+
+def test_execution_plan():
+    runner = _make_runner()
+    plan = runner._plan
+    assert plan.resolve("fonts") == ("values", "fonts", None)
+    assert plan.resolve("font") == ("iterargs", "font", "fonts")
+    assert plan.resolve("font_name") == ("conditions", "font_name", None)
+    assert plan.resolve("unknown") == (None, "unknown", None)
+    assert plan.project("font_name", (("font", 2),)) == (("font", 2),)
+    assert plan.project("font_name", (("other", 1),)) == ()
+    assert plan.arguments(check_font_name) == (("font_name", False),)
+    assert plan.reachable_conditions(("font_name",)) == ({"font_name"}, set())
+    # Values win over conditions of the same name.
+    runner = CheckRunner(runner.profile, {"fonts": ["a.ttf"], "font_name": "A"},
+                         Configuration())
+    assert runner._plan.resolve("font_name") == ("values", "font_name", None)
+    assert runner._plan.reachable_conditions(("font_name",)) == (set(), set())
+    results = [message for status, message, _ in runner.run() if status == ENDCHECK]
+    assert results == [PASS] * 3
+
+
+shared_calls = []
+
+
+@condition(shared=True)
+def shared_font_name(font_name):
+    shared_calls.append(font_name)
+    return font_name.lower()
+
+
+@check(id="com.example/check/shared_font_name")
+def check_shared_font_name(shared_font_name):
+    """Font has a shared name."""
+    yield PASS, shared_font_name
+
+
+@check(id="com.example/check/shared_font_name/again")
+def check_shared_font_name_again(shared_font_name):
+    """Font still has a shared name."""
+    yield PASS, shared_font_name
+
+
+def test_shared_conditions():
+    def make_runner(**kwds):
+        profile = profile_factory(default_section=Section("Shared Test"))
+        profile.auto_register({"font_name": font_name,
+                               "shared_font_name": shared_font_name,
+                               "check_shared_font_name": check_shared_font_name,
+                               "check_shared_font_name_again":
+                                   check_shared_font_name_again})
+        return CheckRunner(profile, {"fonts": ["a.ttf", "b.ttf"]}, Configuration(), **kwds)
+
+    del shared_calls[:]
+    parent = make_runner()
+    by_font = [[index for index, (_, _, iterargs) in enumerate(parent.order)
+                if iterargs == (("font", font),)]
+               for font in range(2)]
+    # Each font in a shard of its own, nothing is shared.
+    assert parent.get_shared_condition_values(by_font) == [{}, {}]
+    assert shared_calls == []
+
+    # The first font in both shards
+    shards = [by_font[0][:1], by_font[0][1:] + by_font[1]]
+    values = parent.get_shared_condition_values(shards)
+    a_key = ("shared_font_name", (("font", 0),))
+    assert values == [{a_key: "a.ttf"}, {a_key: "a.ttf"}]
+    assert shared_calls == ["A.TTF"]
+    # the parent doesn't keep the conditions it evaluated for that
+    assert parent._cache["conditions"] == {}
+
+    worker = make_runner(condition_values=values[1])
+    results = [message for status, message, _ in worker.run() if status == PASS]
+    assert results == ["a.ttf", "a.ttf", "b.ttf", "b.ttf"]
+    # only the value of the other font was evaluated by the worker
+    assert shared_calls == ["A.TTF", "B.TTF"]
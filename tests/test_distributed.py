@@ -0,0 +1,94 @@
+import os
+import threading
+from multiprocessing.connection import Client
+
+import pytest
+
+from fontbakery.distributed import (Coordinator,
+                                    _local_path,
+                                    _rewrite_values,
+                                    get_input_files,
+                                    parse_address)
+from fontbakery.multiproc import _status2index
+
+AUTHKEY = b"secret"
+
+
+def test_parse_address():
+    assert parse_address("localhost:9090") == ("localhost", 9090)
+    assert parse_address("::1:9090") == ("::1", 9090)
+    for address in ("localhost", ":9090", "localhost:port"):
+        with pytest.raises(ValueError):
+            parse_address(address)
+
+
+def test_input_files_are_recreated_below_root(tmp_path):
+    family = tmp_path / "family"
+    family.mkdir()
+    (family / "Font-Regular.ttf").write_bytes(b"regular")
+    (family / "METADATA.pb").write_bytes(b"metadata")
+    (family / "static").mkdir()
+    (family / "static" / "Font-Bold.ttf").write_bytes(b"bold")
+    (family / "fontbakery-report.html").write_bytes(b"report")
+    (tmp_path / "OFL.txt").write_bytes(b"license")
+    values = {"fonts": [str(family / "Font-Regular.ttf")], "other": "not a file"}
+
+    # Only the files that are declared, not everything in the directory
+    files = get_input_files(values, ["METADATA.pb", "OFL.txt", "static/*.ttf"])
+    assert sorted(files) == [str(family / "Font-Regular.ttf"),
+                             str(family / "METADATA.pb"),
+                             str(family / "static" / "Font-Bold.ttf")]
+    assert len(set(files.values())) == 3
+    assert list(get_input_files(values)) == [str(family / "Font-Regular.ttf")]
+
+    root = str(tmp_path / "worker")
+    local = _local_path(root, str(family / "Font-Regular.ttf"))
+    assert local.startswith(root + os.sep)
+    assert local.endswith(os.path.join("family", "Font-Regular.ttf"))
+    paths = {str(family / "Font-Regular.ttf"): local}
+    assert _rewrite_values(values, paths) == {"fonts": [local], "other": "not a file"}
+
+
+def _fake_worker(address, results, lose_at=None):
+    """Registers at the coordinator and passes every check it gets, until
+    it reaches the index lose_at, then it disconnects."""
+    with Client(address, authkey=AUTHKEY) as connection:
+        from fontbakery import __version__
+        connection.send(("hello", "test", os.getpid(), __version__))
+        assert connection.recv()[0] == "setup"
+        connection.send(("need", []))
+        connection.send(("ready",))
+        while True:
+            message = connection.recv()
+            if message[0] == "done":
+                return
+            for index in message[1]:
+                if index == lose_at:
+                    connection.send(("status", index, 0.0))
+                    return
+                result = (index, _status2index["PASS"], (), ({}, ()))
+                connection.send(("results", (result,)))
+                results.append(index)
+
+
+def test_coordinator_reassigns_jobs_of_lost_worker():
+    setup = (None, {}, "digest", {}, {})
+    coordinator = Coordinator(("127.0.0.1", 0), AUTHKEY, setup, [[0, 1, 2, 3]])
+    executed = []
+
+    def workers():
+        _fake_worker(coordinator.address, executed, lose_at=2)
+        _fake_worker(coordinator.address, executed)
+
+    thread = threading.Thread(target=workers, daemon=True)
+    thread.start()
+    try:
+        results = list(coordinator.results())
+    finally:
+        coordinator.close()
+    thread.join(timeout=10)
+
+    assert sorted(result[0] for result in results) == [0, 1, 2, 3]
+    assert all(result[1] == _status2index["PASS"] for result in results)
+    # the check that was running on the lost worker was tried again
+    assert executed == [0, 1, 2, 3]
@@ -0,0 +1,33 @@
+import pickle
+
+from fontTools.ttLib import TTFont
+
+from fontbakery.codetesting import TEST_FILE
+from fontbakery.fontfacts import MARK_GLYPH, FontFacts
+
+
+def test_font_facts():
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    facts = FontFacts.from_ttfont(ttFont)
+
+    assert facts.glyph_order == tuple(ttFont.getGlyphOrder())
+    assert facts.num_glyphs == ttFont["maxp"].numGlyphs
+    assert facts.best_cmap == ttFont.getBestCmap()
+    assert facts.reverse_cmap == {name: codepoints
+                                  for name, codepoints in ttFont["cmap"].buildReversed().items()
+                                  if name in facts.reverse_cmap}
+    assert facts.tables == set(ttFont.keys()) - {"GlyphOrder"}
+    assert facts.units_per_em == ttFont["head"].unitsPerEm
+    for name, (advance, lsb) in ttFont["hmtx"].metrics.items():
+        assert facts.advance(name) == advance
+        assert facts.lsbs[facts.glyph_ids[name]] == lsb
+    marks = {name for name, glyph_class in ttFont["GDEF"].table.GlyphClassDef.classDefs.items()
+             if glyph_class == MARK_GLYPH}
+    assert marks and facts.glyphs_of_class(MARK_GLYPH) == marks
+    assert list(facts.codepoints_in_range(0x41, 0x5A)) == list(range(0x41, 0x5B))
+
+    copy = pickle.loads(pickle.dumps(facts))
+    assert copy.glyph_order == facts.glyph_order
+    assert copy.best_cmap == facts.best_cmap
+    assert copy.advances == facts.advances
+    assert copy.glyph_classes == facts.glyph_classes
@@ -0,0 +1,167 @@
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import GlyphComponent
+
+from fontbakery.codetesting import TEST_FILE
+from fontbakery.glyphgraph import (
+    component_transform,
+    get_component_graph,
+    glyphs_may_have_changed,
+)
+
+
+def _contour_count(glyf, name):
+    """Counts the contours walking down the components of the glyph."""
+    glyph = glyf[name]
+    if not glyph.isComposite():
+        return glyph.numberOfContours
+    return sum(_contour_count(glyf, component.glyphName)
+               for component in glyph.components
+               if component.glyphName != ".ttfautohint")
+
+
+def test_component_graph_aggregates():
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    glyf = ttFont["glyf"]
+    graph = get_component_graph(ttFont)
+    assert get_component_graph(ttFont) is graph
+
+    assert graph.composites == [name for name in glyf.keys()
+                                if glyf[name].isComposite()]
+    assert "quotedbl" in graph.composites
+    assert not graph.is_composite("A")
+    assert graph.used_components == {component.glyphName
+                                     for name in graph.composites
+                                     for component in glyf[name].components}
+
+    for name in glyf.keys():
+        assert graph.contour_count(name) == _contour_count(glyf, name)
+        glyph = glyf[name]
+        glyph.recalcBounds(glyf)
+        if hasattr(glyph, "xMin") and graph.has_ink(name):
+            assert graph.bounds(name) == (glyph.xMin, glyph.yMin,
+                                          glyph.xMax, glyph.yMax)
+    assert graph.depth("A") == 0
+    assert graph.depth("quotedbl") >= 1
+    assert not graph.has_ink("space")
+    assert graph.has_ink("quotedbl")
+
+
+def test_component_graph_transforms():
+    # Amiri has four flipped components
+    ttFont = TTFont(TEST_FILE("amiri/AmiriQuranColored.ttf"))
+    graph = get_component_graph(ttFont)
+    flipped = []
+    for name in graph.composites:
+        for component in graph.components(name):
+            xx, _, _, yy = component_transform(component)
+            if xx * yy < 0:
+                flipped.append(name)
+    assert len(flipped) == 4
+    assert all(graph.transformed(name) for name in flipped)
+    assert not all(graph.transformed(name) for name in graph.composites)
+
+
+def _component(name, x=0, y=0):
+    component = GlyphComponent()
+    component.glyphName, component.x, component.y, component.flags = name, x, y, 0
+    return component
+
+
+def test_component_graph_cycles():
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    glyf = ttFont["glyf"]
+    # A broken font: "quotedbl" is made of two "quotesingle",
+    # which is now made of "quotedbl" and "A"
+    quotesingle = glyf["quotesingle"]
+    quotesingle.numberOfContours = -1
+    quotesingle.components = [_component("quotedbl"), _component("A", 100)]
+
+    graph = get_component_graph(ttFont)
+    contours = graph.contour_count("A")
+    assert graph.contour_count("quotedbl") == 2 * contours
+    assert graph.contour_count("quotesingle") == contours
+    assert graph.depth("quotedbl") == 2
+    assert graph.has_ink("quotedbl")
+    bounds = graph.bounds("A")
+    assert graph.bounds("quotesingle") == (bounds[0] + 100, bounds[1],
+                                           bounds[2] + 100, bounds[3])
+
+
+def test_component_graph_notices_edited_glyphs():
+    from fontTools.ttLib.tables._g_l_y_f import Glyph
+
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    glyf = ttFont["glyf"]
+    graph = get_component_graph(ttFont)
+    contours = graph.contour_count("A")
+    assert graph.contour_count("quotedbl") == 2 * graph.contour_count("quotesingle")
+    assert "quotedbl" in graph.composites
+
+    # A component replaced by an empty glyph, e.g. by a condition,
+    # before the next check runs
+    glyf["quotesingle"] = Glyph()
+    glyf["quotesingle"].numberOfContours = 0
+    glyphs_may_have_changed(ttFont)
+    assert graph.contour_count("quotedbl") == 0
+    assert not graph.has_ink("quotedbl")
+
+    # A composite edited in place
+    glyf["quotedbl"].components = [_component("A"), _component("A", 100)]
+    glyphs_may_have_changed(ttFont)
+    assert graph.contour_count("quotedbl") == 2 * contours
+    assert graph.has_ink("quotedbl")
+    assert graph.bounds("quotedbl")[2] == graph.bounds("A")[2] + 100
+    assert graph.used_components >= {"A"}
+
+    # A point moved, without changing the number of points
+    x_min, y_min, x_max, y_max = graph.bounds("A")
+    coordinates = glyf["A"].coordinates
+    index = max(range(len(coordinates)), key=lambda i: coordinates[i][0])
+    coordinates[index] = (x_max + 50, coordinates[index][1])
+    glyphs_may_have_changed(ttFont)
+    assert graph.bounds("A") == (x_min, y_min, x_max + 50, y_max)
+    assert graph.bounds("quotedbl")[2] == x_max + 150
+
+    # A simple glyph made a composite
+    glyph = glyf["B"]
+    glyph.numberOfContours = -1
+    glyph.components = [_component("A")]
+    del glyph.coordinates
+    glyphs_may_have_changed(ttFont)
+    assert "B" in graph.composites
+    assert graph.contour_count("B") == contours
+    assert get_component_graph(ttFont) is graph
+
+    # A new glyf table gets a new graph
+    ttFont["glyf"] = ttFont["glyf"].__class__()
+    assert get_component_graph(ttFont) is not graph
+
+
+def test_component_graph_sees_edits_of_previous_checks():
+    from fontbakery.callable import check
+    from fontbakery.checkrunner import CheckRunner, PASS
+    from fontbakery.configuration import Configuration
+    from fontbakery.fonts_profile import profile_factory
+    from fontbakery.section import Section
+    from fontbakery.utils import glyph_contour_count
+
+    @check(id="com.example/check/empty_quotesingle")
+    def check_empty_quotesingle(ttFont):
+        """Replaces quotesingle by an empty glyph (which checks shouldn't do)."""
+        contours = glyph_contour_count(ttFont, "quotedbl")
+        ttFont["glyf"]["quotesingle"].numberOfContours = 0
+        del ttFont["glyf"]["quotesingle"].coordinates
+        yield PASS, contours
+
+    @check(id="com.example/check/quotedbl_contours")
+    def check_quotedbl_contours(ttFont):
+        """Counts the contours of quotedbl."""
+        yield PASS, glyph_contour_count(ttFont, "quotedbl")
+
+    profile = profile_factory(default_section=Section("Glyph Graph Test"))
+    profile.auto_register({"check_empty_quotesingle": check_empty_quotesingle,
+                           "check_quotedbl_contours": check_quotedbl_contours})
+    runner = CheckRunner(profile, {"fonts": [TEST_FILE("nunito/Nunito-Regular.ttf")]},
+                         Configuration())
+    messages = [message for status, message, _ in runner.run() if status == PASS]
+    assert messages == [2, 0]
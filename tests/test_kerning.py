@@ -0,0 +1,85 @@
+import numpy as np
+from fontTools.ttLib import TTFont
+
+from fontbakery.codetesting import TEST_FILE
+from fontbakery.kerning import NO_DEVICE, ClassKerning, get_kerning, variation_index
+from fontbakery.layoutindex import get_layout_index
+
+
+def _expanded_pairs(ttFont):
+    """All pairs, class kerning expanded the straightforward way."""
+    glyphs = set(ttFont.getGlyphOrder())
+    pairs = set()
+    for subtable in get_layout_index(ttFont).subtables("GPOS", 2):
+        if subtable.Format == 1:
+            for first, pair_set in zip(subtable.Coverage.glyphs, subtable.PairSet):
+                for pair in pair_set.PairValueRecord:
+                    pairs.add((first, pair.SecondGlyph, id(pair.Value1), id(pair.Value2)))
+            continue
+        class_defs1 = subtable.ClassDef1.classDefs
+        class_defs2 = subtable.ClassDef2.classDefs
+        for first in subtable.Coverage.glyphs:
+            class1 = subtable.Class1Record[class_defs1.get(first, 0)]
+            for second in glyphs:
+                record = class1.Class2Record[class_defs2.get(second, 0)]
+                pairs.add((first, second,
+                           id(getattr(record, "Value1", None)),
+                           id(getattr(record, "Value2", None))))
+    return pairs
+
+
+def test_kerning_pairs():
+    ttFont = TTFont(TEST_FILE("mada/Mada-Regular.ttf"))
+    kerning = get_kerning(ttFont)
+    assert get_kerning(ttFont) is kerning
+    assert any(isinstance(subtable, ClassKerning) for subtable in kerning.subtables)
+
+    expected = _expanded_pairs(ttFont)
+    pairs = {(left, right, id(value1), id(value2))
+             for left, right, value1, value2 in kerning.pairs()}
+    assert pairs == expected
+    assert kerning.count_pairs() == len(expected)
+
+
+def test_kerning_queries():
+    ttFont = TTFont(TEST_FILE("mada/Mada-Regular.ttf"))
+    kerning = get_kerning(ttFont)
+
+    def strong(values):
+        return values < -100
+
+    expected = [(left, right) for left, right, value1, _ in kerning.pairs()
+                if value1 is not None and getattr(value1, "XAdvance", 0) < -100]
+    assert expected
+    assert kerning.any(1, "XAdvance", strong)
+    assert [(left, right) for left, right, _, _
+            in kerning.pairs_where(1, "XAdvance", strong)] == expected
+    assert not kerning.any(1, "XAdvance", lambda values: values < -10000)
+
+
+def test_kerning_kerns():
+    ttFont = TTFont(TEST_FILE("mada/Mada-Regular.ttf"))
+    kerning = get_kerning(ttFont)
+    for left, right, value1, value2 in kerning.pairs():
+        if value1 is not None and getattr(value1, "XAdvance", 0):
+            assert kerning.kerns(left, right)
+    assert not kerning.kerns("no such glyph", ttFont.getGlyphOrder()[0])
+    assert not kerning.kerns(".notdef", ".notdef")
+
+
+def test_kerning_devices():
+    ttFont = TTFont(TEST_FILE("BadGrades/BadGrades-VF.ttf"))
+    kerning = get_kerning(ttFont)
+
+    expected = {(left, right, variation_index(value1.XAdvDevice))
+                for left, right, value1, _ in kerning.pairs()
+                if value1 is not None and getattr(value1, "XAdvDevice", None)}
+    assert expected
+    assert kerning.any(1, "XAdvDevice", lambda values: values != NO_DEVICE)
+
+    some_index = next(iter(expected))[2]
+    found = {(left, right) for left, right, _, _
+             in kerning.pairs_where(1, "XAdvDevice",
+                                    lambda values: np.isin(values, [some_index]))}
+    assert found == {(left, right) for left, right, index in expected
+                     if index == some_index}
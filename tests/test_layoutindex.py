@@ -0,0 +1,77 @@
+from fontTools.ttLib import TTFont
+
+from fontbakery.codetesting import TEST_FILE
+from fontbakery.layoutindex import LayoutIndex, get_layout_index
+from fontbakery.utils import all_kerning
+
+
+def test_layout_index_resolves_extensions():
+    ttFont = TTFont(TEST_FILE("indic-font-with-rupee-sign/NotoSerifDevanagari-Regular.ttf"))
+    index = get_layout_index(ttFont)
+    assert get_layout_index(ttFont) is index
+
+    lookups = ttFont["GSUB"].table.LookupList.Lookup
+    assert len(index.lookups["GSUB"]) == len(lookups)
+    outputs = set()
+    for lookup, (lookup_type, subtables) in zip(lookups, index.lookups["GSUB"]):
+        if lookup.LookupType == 7:
+            assert subtables == [extension.ExtSubTable for extension in lookup.SubTable]
+            assert lookup_type == lookup.SubTable[0].ExtensionLookupType
+            # The font is left untouched
+            assert not hasattr(lookup.SubTable[0], "SubTable")
+        else:
+            assert (lookup_type, subtables) == (lookup.LookupType, lookup.SubTable)
+        for subtable in subtables:
+            if lookup_type == 1:
+                outputs.update(subtable.mapping.values())
+            elif lookup_type == 4:
+                for ligatures in subtable.ligatures.values():
+                    outputs.update(ligature.LigGlyph for ligature in ligatures)
+    assert outputs <= index.substitution_outputs
+    assert 7 not in index.lookup_types("GSUB")
+
+    assert index.feature_tags >= {"akhn", "blwf", "half"}
+    assert "dev2" in index.script_tags
+    assert index.ligature_components
+    for sequences in index.ligature_components.values():
+        assert all(len(sequence) >= 2 for sequence in sequences)
+
+
+def test_layout_index_kerning_and_marks():
+    ttFont = TTFont(TEST_FILE("mada/Mada-Regular.ttf"))
+    index = get_layout_index(ttFont)
+    assert index.has_kerning
+    assert 9 not in index.lookup_types("GPOS")
+
+    # Reading the kerning twice gives the same result: extension subtables
+    # aren't rewritten by the first traversal anymore.
+    assert list(all_kerning(ttFont)) == list(all_kerning(ttFont))
+
+    for base, marks in index.mark_bases.items():
+        assert marks <= index.attached_marks
+
+    del ttFont["GPOS"]
+    assert not get_layout_index(ttFont).has_kerning
+
+
+def test_layout_index_ligatures():
+    ttFont = TTFont(TEST_FILE("source-sans-pro/OTF/SourceSansPro-Bold.otf"))
+    index = get_layout_index(ttFont)
+    ligatures = index.feature_ligatures("liga")
+    assert ("f", ("f",), "f_f") in ligatures
+    assert ("f", "f") in index.ligature_components["f_f"]
+    assert index.feature_ligatures("no feature") == []
+
+
+def test_layout_index_skips_lookup_indices_out_of_range():
+    ttFont = TTFont(TEST_FILE("source-sans-pro/OTF/SourceSansPro-Bold.otf"))
+    gsub = ttFont["GSUB"].table
+    record = next(record for record in gsub.FeatureList.FeatureRecord
+                  if record.FeatureTag == "liga")
+    lookup_count = len(gsub.LookupList.Lookup)
+    expected = get_layout_index(ttFont).feature_ligatures("liga")
+
+    record.Feature.LookupListIndex.append(lookup_count + 10)
+    index = LayoutIndex(ttFont)
+    assert all(i < lookup_count for i in index.feature_lookups["GSUB"]["liga"])
+    assert index.feature_ligatures("liga") == expected
@@ -0,0 +1,118 @@
+import pytest
+
+from fontbakery.errors import SetupError
+from fontbakery.message import Message
+from fontbakery.multiproc import (JobDispatcher,
+                                  WorkerPool,
+                                  _canonical_order,
+                                  decode_check_log,
+                                  distribute_jobs,
+                                  encode_check_log)
+from fontbakery.status import ERROR, FAIL, INFO
+
+
+def _identity(check, *iterargs):
+    return ("section", check, tuple(iterargs))
+
+
+def test_distribute_jobs_keeps_affinity():
+    order = [_identity(check, ("font", font))
+             for font in range(5) for check in ("a", "b", "c")]
+    order += [_identity("family_a"), _identity("family_b")]
+
+    workers = [[order[index] for index in indexes]
+               for indexes in distribute_jobs(order, 3)]
+    assert len(workers) == 3
+    assert sorted(job for jobs in workers for job in jobs) == sorted(order)
+
+    # each font and the family checks are handled by exactly one worker
+    owners = {}
+    for worker, jobs in enumerate(workers):
+        for _, _, iterargs in jobs:
+            assert owners.setdefault(iterargs[:1], worker) == worker
+
+    # the original order is kept within each worker
+    for jobs in workers:
+        assert jobs == sorted(jobs, key=order.index)
+
+    # the load is balanced
+    assert sorted(len(jobs) for jobs in workers) == [5, 6, 6]
+
+
+def test_distribute_jobs_fewer_groups_than_processes():
+    order = [_identity("a", ("font", 0)), _identity("b", ("font", 0))]
+    assert distribute_jobs(order, 4) == [[0, 1]]
+    assert distribute_jobs([], 4) == []
+
+
+def test_encode_check_log_roundtrip():
+    status, message = decode_check_log(encode_check_log(FAIL, Message("code", "text")))
+    assert status == FAIL
+    assert (message.code, message.message) == ("code", "text")
+
+    assert decode_check_log(encode_check_log(INFO, "just text")) == (INFO, "just text")
+
+    error = Exception("boom")
+    error.traceback = "Traceback ..."
+    status, message = decode_check_log(encode_check_log(ERROR, error))
+    assert status == ERROR
+    assert str(message) == "boom"
+    assert message.traceback == "Traceback ..."
+
+
+class _ListQueue(list):
+    put = list.append
+
+
+def test_job_dispatcher_redispatches_jobs_of_replaced_worker():
+    dispatcher = JobDispatcher([list(range(20)), [20, 21]])
+    queues = [_ListQueue(), _ListQueue()]
+    for worker_id, jobs_queue in enumerate(queues):
+        dispatcher.set_queue(worker_id, jobs_queue)
+    # two batches of the initial size
+    assert queues[0] == [list(range(8)), list(range(8, 16))]
+    assert queues[1] == [[20, 21]]
+
+    dispatcher.done(0, [0, 1, 2])
+    assert dispatcher.is_in_flight(0, 3)
+    assert not dispatcher.is_in_flight(0, 2)
+
+    # The worker was replaced, its unfinished jobs are dispatched again.
+    replacement = _ListQueue()
+    dispatcher.set_queue(0, replacement)
+    assert replacement[0] == [3, 4, 5, 6, 7, 8, 9, 10]
+    assert sum(replacement, []) == list(range(3, 19))
+
+
+def test_distribute_jobs_by_cost():
+    order = [_identity(check, ("font", font))
+             for font in range(4) for check in ("a", "b", "c", "d")]
+    # font 0 is as expensive as all other fonts together
+    costs = [10 if index < 4 else 1 for index in range(len(order))]
+    workers = distribute_jobs(order, 2, costs.__getitem__)
+    assert sorted(workers) == [[0, 1, 2, 3], list(range(4, 16))]
+
+
+def test_distribute_jobs_splits_big_groups():
+    order = [_identity(check, ("font", 0)) for check in range(12)]
+    workers = distribute_jobs(order, 3)
+    assert workers == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11]]
+    # but not into too small chunks
+    assert len(distribute_jobs(order, 8)) == 3
+
+
+def test_canonical_order():
+    results = [(2, "c"), (0, "a"), (3, "d"), (1, "b")]
+    assert list(_canonical_order(iter(results))) == sorted(results)
+
+
+def test_worker_pool_fails_if_workers_die_on_startup():
+    # The workers can't import the profile, they die before running a check
+    locator = {"name": "fontbakery.profiles.no_such_profile", "origin": None}
+    pool = WorkerPool([[0, 1]], (locator, {}, "digest"))
+    pool.start()
+    try:
+        with pytest.raises(SetupError):
+            list(pool.results())
+    finally:
+        pool.terminate()
@@ -0,0 +1,74 @@
+import itertools
+
+from fontTools.ttLib import TTFont
+
+from fontbakery.codetesting import TEST_FILE
+from fontbakery.nameindex import clear_name_index, get_name_index
+
+
+def _scan(ttFont, nameID, platformID=None, encodingID=None, langID=None):
+    return [entry for entry in ttFont["name"].names
+            if entry.nameID == nameID
+            and platformID in (None, entry.platformID)
+            and encodingID in (None, entry.platEncID)
+            and langID in (None, entry.langID)]
+
+
+def test_name_index():
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    index = get_name_index(ttFont)
+    assert get_name_index(ttFont) is index
+
+    names = ttFont["name"].names
+    for nameID, platformID, encodingID, langID in itertools.product(
+            {entry.nameID for entry in names} | {1000},
+            (None, 1, 3),
+            (None, 0, 1),
+            (None, 0x0, 0x409)):
+        expected = _scan(ttFont, nameID, platformID, encodingID, langID)
+        assert index.entries(nameID, platformID, encodingID, langID) == expected
+        assert index.strings(nameID, platformID, encodingID, langID) == \
+            [entry.toUnicode() for entry in expected]
+
+
+def test_name_index_follows_changes():
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    index = get_name_index(ttFont)
+    assert index.strings(1, 3, 1, 0x409) == ["Nunito"]
+
+    record = ttFont["name"].getName(1, 3, 1, 0x409)
+    record.string = "Nunito Sans".encode(record.getEncoding())
+    record.nameID = 19
+    # Records edited in place are read again once the index is cleared,
+    # as CheckTester does for the fonts it gets.
+    clear_name_index(ttFont)
+    index = get_name_index(ttFont)
+    assert index.entries(1, 3, 1, 0x409) == []
+    assert index.strings(19, 3) == ["Nunito Sans"]
+
+    # Added and removed records are noticed by the index itself.
+    ttFont["name"].names.remove(record)
+    assert index.entries(19) == []
+    ttFont["name"].names.append(record)
+    assert index.entries(19) == [record]
+
+    ttFont["name"].names = []
+    assert index.entries(2) == []
+
+
+def test_name_index_is_per_font():
+    from fontbakery.checkrunner import CheckRunner
+    from fontbakery.configuration import Configuration
+    from fontbakery.fonts_profile import profile_factory
+    from fontbakery.section import Section
+
+    ttFont = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    other = TTFont(TEST_FILE("nunito/Nunito-Regular.ttf"))
+    index = get_name_index(ttFont)
+    assert get_name_index(other) is not index
+
+    # Neither another font nor another runner drop the index of a font.
+    clear_name_index(other)
+    CheckRunner(profile_factory(default_section=Section("Test")),
+                {"fonts": []}, Configuration())
+    assert get_name_index(ttFont) is index
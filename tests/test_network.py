@@ -0,0 +1,184 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from fontbakery import network
+from fontbakery.checkrunner import INFO, FAIL, WARN
+from fontbakery.codetesting import CheckTester
+from fontbakery.profiles import googlefonts as googlefonts_profile
+
+SLOW_DURATION = 0.5
+hits = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        hits.append(self.path)
+        if self.path.startswith("/slow"):
+            time.sleep(SLOW_DURATION)
+        self.send_response(404 if self.path == "/missing" else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            hits.append("/etag (not modified)")
+            self.send_response(304)
+            self.end_headers()
+            return
+        hits.append(self.path)
+        body = self.path.encode()
+        self.send_response(404 if self.path == "/missing" else 200)
+        if self.path == "/fresh":
+            self.send_header("Cache-Control", "max-age=3600")
+        elif self.path == "/etag":
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("ETag", '"v1"')
+        elif self.path == "/private":
+            self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    del hits[:]
+    network.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    network.clear()
+
+
+def test_request_all_is_concurrent(server):
+    urls = [f"{server}/slow/{i}" for i in range(8)]
+    start = time.monotonic()
+    responses = network.request_all("HEAD", urls)
+    assert time.monotonic() - start < SLOW_DURATION * 4
+    assert list(responses) == urls
+    assert all(response.status_code == 200 for response in responses.values())
+
+
+def test_requests_in_flight_are_deduplicated(server):
+    first = network.submit("GET", f"{server}/slow")
+    second = network.submit("GET", f"{server}/slow")
+    assert second is first
+    network.request_all("HEAD", [f"{server}/slow", f"{server}/slow"])
+    assert first.result().status_code == 200
+    assert hits == ["/slow", "/slow"]  # one GET and one HEAD
+
+    # Done requests are not remembered, whether they failed or not.
+    assert network.get(f"{server}/slow").status_code == 200
+    with pytest.raises(requests.exceptions.Timeout):
+        network.head(f"{server}/slow", timeout=0.1)
+    assert network.head(f"{server}/slow").status_code == 200
+    assert hits == ["/slow"] * 5
+
+
+def test_request_all_errors(server):
+    unused = "http://127.0.0.1:1/"
+    responses = network.request_all(
+        "HEAD", [f"{server}/missing", f"{server}/slow", unused], timeout=0.1
+    )
+    assert responses[f"{server}/missing"].status_code == 404
+    assert isinstance(responses[f"{server}/slow"], requests.exceptions.Timeout)
+    assert isinstance(responses[unused], requests.exceptions.ConnectionError)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        network.head(unused)
+
+
+@pytest.fixture(name="http_cache")
+def fixture_http_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(network.HTTP_CACHE_ENV, str(tmp_path))
+    monkeypatch.delenv(network.OFFLINE_ENV, raising=False)
+    return tmp_path
+
+
+def test_http_cache(server, http_cache):
+    for path in ("/fresh", "/etag", "/private", "/missing"):
+        network.get(server + path)
+    # A new run, within the same process.
+    network.clear()
+    for path in ("/fresh", "/etag", "/private", "/missing"):
+        response = network.get(server + path)
+        assert response.content == path.encode()
+    assert hits == ["/fresh", "/etag", "/private", "/missing",
+                    "/etag (not modified)", "/private", "/missing"]
+
+
+def test_offline(server, http_cache, monkeypatch):
+    network.get(server + "/etag")
+    network.clear()
+    monkeypatch.setenv(network.OFFLINE_ENV, "1")
+    assert network.get(server + "/etag").content == b"/etag"
+    with pytest.raises(network.OfflineError):
+        network.get(server + "/fresh")
+    results = network.request_all("HEAD", [server + "/ok"])
+    assert isinstance(results[server + "/ok"], network.OfflineError)
+    assert hits == ["/etag"]
+
+
+def test_get_derived(server, http_cache):
+    calls = []
+
+    def derive(response):
+        calls.append(response.status_code)
+        return response.content.upper()
+
+    assert network.get_derived(server + "/etag", "upper", derive) == b"/ETAG"
+    network.clear()
+    assert network.get_derived(server + "/etag", "upper", derive) == b"/ETAG"
+    # Revalidated, but not derived again.
+    assert calls == [200]
+    assert hits == ["/etag", "/etag (not modified)"]
+
+
+def test_check_description_broken_links(server):
+    check = CheckTester(googlefonts_profile,
+                        "com.google.fonts/check/description/broken_links")
+    from lxml import html
+    doc = html.fromstring(
+        f'<p><a href="{server}/ok">ok</a> <a href="{server}/missing">x</a>'
+        f' <a href="{server}/ok">again</a>'
+        f' <a href="mailto:someone@example.com">mail</a></p>')
+    results = check("", {"description_html": doc})
+    statuses = [status for status, _ in results]
+    assert statuses == [INFO, FAIL]
+    assert f"{server}/missing (status code: 404)" in results[1][1].message
+    assert sorted(hits) == ["/missing", "/ok"]
+    assert WARN not in statuses
+
+
+def test_check_broken_links_offline(server, http_cache, monkeypatch):
+    from lxml import html
+    monkeypatch.setenv(network.OFFLINE_ENV, "1")
+
+    # Links that are not in the HTTP cache are not reported as broken.
+    check = CheckTester(googlefonts_profile,
+                        "com.google.fonts/check/description/broken_links")
+    doc = html.fromstring(f'<p><a href="{server}/ok">ok</a></p>')
+    results = check("", {"description_html": doc})
+    assert [status for status, _ in results] == [INFO]
+    assert results[0][1].code == "offline"
+    assert f"{server}/ok" in results[0][1].message
+
+    from fontbakery.utils import get_FamilyProto_Message
+    check = CheckTester(googlefonts_profile,
+                        "com.google.fonts/check/metadata/broken_links")
+    family_metadata = get_FamilyProto_Message("data/test/nunito/METADATA.pb")
+    for font_metadata in family_metadata.fonts:
+        font_metadata.copyright = f"Copyright (see {server}/ok)"
+    results = check("", {"family_metadata": family_metadata})
+    assert [status for status, _ in results] == [INFO]
+    assert results[0][1].code == "offline"
+    assert hits == []
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+from fontTools.ttLib import TTFont
+
+from fontbakery.synthetic import build_font, check_parameters, font_filename
+
+
+def _reload(font):
+    stream = io.BytesIO()
+    font.save(stream)
+    stream.seek(0)
+    return TTFont(stream)
+
+
+def test_check_parameters():
+    assert check_parameters({"glyphs": 10})["glyphs"] == 10
+    assert check_parameters({})["composite_depth"] == 0
+    for parameters in ({"kerning": 1},
+                       {"glyphs": 1},
+                       {"glyphs": 70000},
+                       {"masters": 3}):
+        with pytest.raises(ValueError):
+            check_parameters(parameters)
+
+
+def test_build_font():
+    font = _reload(build_font(glyphs=300, composite_depth=3, kerning_classes=8,
+                              gsub_lookups=3, axes=2, masters=4))
+    assert len(font.getGlyphOrder()) == 300
+    assert len(font.getBestCmap()) == 299
+
+    glyf = font["glyf"]
+
+    def depth(name):
+        glyph = glyf[name]
+        if not glyph.isComposite():
+            return 0
+        return 1 + max(depth(component.glyphName) for component in glyph.components)
+
+    assert max(depth(name) for name in font.getGlyphOrder()) == 3
+
+    kerning = font["GPOS"].table.LookupList.Lookup[0].SubTable[0]
+    assert kerning.Format == 2
+    assert len(set(kerning.ClassDef2.classDefs.values())) == 8
+    assert [lookup.LookupType
+            for lookup in font["GSUB"].table.LookupList.Lookup] == [1, 4, 3]
+
+    assert [axis.axisTag for axis in font["fvar"].axes] == ["wght", "wdth"]
+    regions = {tuple(sorted(variation.axes.items()))
+               for variation in font["gvar"].variations["space"]}
+    assert len(regions) == 3
+
+
+def test_static_font_has_no_variations():
+    font = _reload(build_font(glyphs=10))
+    assert "fvar" not in font and "gvar" not in font
+    assert "GSUB" not in font and "GPOS" not in font
+    assert font_filename({"glyphs": 10}) == \
+        "Synthetic-glyphs10-compositedepth0-kerningclasses0-gsublookups0-axes0-masters1.ttf"
@@ -3,6 +3,8 @@ import pytest
 from fontbakery.utils import (
     bullet_list,
     can_shape,
+    get_hb_font,
+    open_ttfont,
     pretty_print_list,
     text_flow,
     unindent_and_unwrap_rationale,
@@ -99,6 +101,32 @@ def test_can_shape():
     assert not can_shape(font, "こんにちは")
 
 
+def test_open_ttfont():
+    path = portable_path("data/test/source-sans-pro/OTF/SourceSansPro-Regular.otf")
+    font = open_ttfont(path)
+    assert font.reader.file.name == path
+    assert font["name"].getDebugName(1) == "Source Sans Pro"
+    # only the requested tables are decompiled
+    assert font.isLoaded("name")
+    assert not font.isLoaded("CFF ")
+    assert not font.isLoaded("GPOS")
+
+    expected = TTFont(path)
+    assert font.getGlyphOrder() == expected.getGlyphOrder()
+    assert font.getBestCmap() == expected.getBestCmap()
+
+
+def test_get_hb_font():
+    path = portable_path("data/test/varfont/inter/Inter[slnt,wght].ttf")
+    font = get_hb_font(path)
+    assert font.scale == (font.face.upem, font.face.upem)
+    font.set_variations({"wght": 900})
+    # The face is shared, the variations are not.
+    other = get_hb_font(path)
+    assert other.face is font.face
+    assert other.get_var_coords_normalized() != font.get_var_coords_normalized()
+
+
 def test_unindent_and_unwrap_rationale():
     rationale = """
         This is a line that is very long, so long in fact that it must be hard wrapped